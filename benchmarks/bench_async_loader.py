@@ -0,0 +1,97 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for the concurrent node loading of BuildLog.collect_nodes_async
+
+Creates a build directory and injects an artificial latency into every file
+open, like a network file system would. The serial BuildLog.collect_nodes
+pays the latency once per node file, the concurrent loader overlaps it up to
+the given concurrency.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from bench_collect_nodes import create_build
+from jenkins_log_parser.buildlog import BuildLog
+
+
+def slow_build_log(path, latency) -> BuildLog:
+    """
+    Creates a BuildLog whose storage sleeps before opening a file
+
+    :param path: the build directory
+    :param latency: the injected latency in seconds
+    :returns: the BuildLog
+    """
+    build_log = BuildLog(path)
+    storage_open = build_log.storage.open
+
+    def slow_open(name):
+        time.sleep(latency)
+        return storage_open(name)
+
+    build_log.storage.open = slow_open
+    return build_log
+
+
+def measure(path, latency, concurrency) -> float:
+    """
+    Measures one node collection
+
+    :param path: the build directory
+    :param latency: the injected latency in seconds
+    :param concurrency: the concurrency of the loader, 0 for the serial one
+    :returns: the seconds needed to collect the nodes
+    """
+    build_log = slow_build_log(path, latency)
+    start = time.perf_counter()
+    if concurrency == 0:
+        build_log.collect_nodes()
+    else:
+        asyncio.run(build_log.collect_nodes_async(concurrency))
+    seconds = time.perf_counter() - start
+    build_log.close()
+    return seconds
+
+
+def main():
+    """
+    Runs the benchmark for the requested concurrencies
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "concurrencies",
+        type=int,
+        nargs="*",
+        default=[0, 1, 8, 32, 128]
+    )
+    parser.add_argument("-n", "--nodes", type=int, default=2000)
+    parser.add_argument(
+        "-l", "--latency",
+        type=float,
+        default=0.002,
+        help="injected latency per file in seconds"
+    )
+    args = parser.parse_args()
+    print("{:>12} {:>10} {:>12} {:>9}".format(
+        "concurrency", "seconds", "nodes/s", "speedup"
+    ))
+    with tempfile.TemporaryDirectory() as path:
+        create_build(path, args.nodes)
+        serial = None
+        for concurrency in args.concurrencies:
+            seconds = measure(path, args.latency, concurrency)
+            if serial is None:
+                serial = seconds
+            print("{:>12} {:>10.3f} {:>12.0f} {:>8.1f}x".format(
+                concurrency if concurrency > 0 else "serial",
+                seconds,
+                args.nodes / seconds,
+                serial / seconds
+            ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for the node discovery of BuildLog.collect_nodes
+
+Creates build directories with an increasing amount of workflow node files
+and measures the time needed to collect them. The time per node should stay
+roughly constant, when the node collection scales linear.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from jenkins_log_parser.buildlog import BuildLog
+
+NODE_XML = """<?xml version='1.1' encoding='UTF-8'?>
+<Tag plugin="workflow-support">
+  <node class="cps.n.StepAtomNode" plugin="workflow-cps">
+    <parentIds>
+      <string>{parent}</string>
+    </parentIds>
+    <id>{node}</id>
+    <descriptorId>org.jenkinsci.plugins.workflow.steps.EchoStep</descriptorId>
+  </node>
+  <actions/>
+</Tag>
+"""
+
+
+def create_build(path, count):
+    """
+    Writes a minimal build directory with a linear chain of nodes
+
+    :param path: the directory to write the build to
+    :param count: the number of workflow nodes
+    """
+    workflow = os.path.join(path, "workflow")
+    os.makedirs(workflow)
+    for node in range(2, count + 2):
+        node_file = os.path.join(workflow, "%d.xml" % node)
+        with open(node_file, "w", encoding="utf-8") as stream:
+            stream.write(NODE_XML.format(parent=node - 1, node=node))
+    for name in ("log", "log-index"):
+        with open(os.path.join(path, name), "w", encoding="utf-8") as stream:
+            stream.write("")
+
+
+def measure(count) -> float:
+    """
+    Measures the node collection for a build with the given node count
+
+    :param count: the number of workflow nodes
+    :returns: the seconds needed for BuildLog.collect_nodes
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        create_build(path, count)
+        try:
+            build_log = BuildLog(path)
+            start = time.perf_counter()
+            build_log.collect_nodes()
+            return time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+
+
+def main():
+    """
+    Runs the benchmark for the requested node counts
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "counts",
+        type=int,
+        nargs="*",
+        default=[1000, 2000, 4000, 8000, 16000]
+    )
+    args = parser.parse_args()
+    print("{:>8} {:>10} {:>12}".format("nodes", "seconds", "us/node"))
+    for count in args.counts:
+        seconds = measure(count)
+        print("{:>8} {:>10.3f} {:>12.1f}".format(
+            count, seconds, seconds / count * 1e6
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for the extraction of the node fields out of the workflow node
+xml files
+
+Reads the node files of a build into memory once and measures the
+throughput in nodes per second of parsing the whole xml tree, of the
+streaming ElementTree extraction of the lazy mode and of the byte scanner.
+Without a build location a synthetic set of node files is used.
+"""
+
+import argparse
+import io
+import time
+import xml.etree.ElementTree as ET
+from bench_collect_nodes import NODE_XML
+from jenkins_log_parser.noderecord import parse_record
+from jenkins_log_parser.scanner import extract_record
+from jenkins_log_parser.storage import open_storage
+
+EXTRACTORS = [
+    ("etree tree", lambda data: ET.parse(io.BytesIO(data)).getroot()),
+    ("etree lazy", lambda data: parse_record(io.BytesIO(data))),
+    ("scan", lambda data: extract_record(io.BytesIO(data)))
+]
+
+
+def load_corpus(location, count) -> list:
+    """
+    Loads the content of the node files
+
+    :param location: a build directory or zip archive, or None for
+        synthetic node files
+    :param count: the number of synthetic node files
+    :returns: a list of the contents
+    """
+    if location is None:
+        return [
+            NODE_XML.format(parent=node - 1, node=node).encode()
+            for node in range(2, count + 2)
+        ]
+    storage = open_storage(location)
+    corpus = list()
+    try:
+        for node_file in storage.scan_node_files().values():
+            with storage.open(node_file) as stream:
+                corpus.append(stream.read())
+    finally:
+        storage.close()
+    return corpus
+
+
+def main():
+    """
+    Runs the benchmark for all extractors
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("location", nargs="?", default=None)
+    parser.add_argument("-n", "--nodes", type=int, default=20000)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+    corpus = load_corpus(args.location, args.nodes)
+    print("{:>12} {:>12} {:>9}".format("extractor", "nodes/s", "speedup"))
+    baseline = None
+    for name, extractor in EXTRACTORS:
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for data in corpus:
+                extractor(data)
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        if baseline is None:
+            baseline = best
+        print("{:>12} {:>12.0f} {:>8.1f}x".format(
+            name, len(corpus) / best, baseline / best
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for building the FlowGraph of a large flow with heavy fan-in
+
+Creates a flow of stages, each running a parallel step with many branches
+whose ends are joined by one node, and measures building the FlowGraph and
+querying the stage and branch of every node against the AncestorIndex, which
+only follows the first parents.
+"""
+
+import argparse
+import time
+from jenkins_log_parser.ancestry import AncestorIndex
+from jenkins_log_parser.flowgraph import FlowGraph
+from jenkins_log_parser.lognode import LogNode
+from jenkins_log_parser.noderecord import NodeRecord
+
+STAGE = "org.jenkinsci.plugins.workflow.support.steps.StageStep"
+PARALLEL = "org.jenkinsci.plugins.workflow.cps.steps.ParallelStep"
+ECHO = "org.jenkinsci.plugins.workflow.steps.EchoStep"
+
+
+def create_flow(count, branches, steps) -> dict:
+    """
+    Creates the nodes of a synthetic flow
+
+    :param count: the minimum number of nodes
+    :param branches: the number of branches of every parallel step
+    :param steps: the number of steps in every branch
+    :returns: the nodes dictionary
+    """
+    nodes = dict()
+
+    def add(node_class, descriptor, parents, start=None, label=None,
+            branch=None):
+        node_no = len(nodes) + 2
+        record = NodeRecord(
+            node_class=node_class,
+            descriptor_id=descriptor,
+            label=label,
+            branch_name=branch,
+            start_id=start
+        )
+        for parent_id in parents:
+            record.add_parent_id(parent_id)
+        nodes[node_no] = LogNode(
+            node_no, node_file="{}.xml".format(node_no), record=record
+        )
+        return node_no
+
+    last = add("cps.n.FlowStartNode", None, ())
+    stage = 0
+    while len(nodes) < count:
+        outer = add("cps.n.StepStartNode", STAGE, (last,))
+        inner = add(
+            "cps.n.StepStartNode", STAGE, (outer,),
+            label="stage {}".format(stage)
+        )
+        parallel = add("cps.n.StepStartNode", PARALLEL, (inner,))
+        ends = list()
+        for branch in range(branches):
+            start = add(
+                "cps.n.StepStartNode", PARALLEL, (parallel,),
+                branch="branch {}".format(branch)
+            )
+            last = start
+            for _ in range(steps):
+                last = add("cps.n.StepAtomNode", ECHO, (last,))
+            ends.append(add(
+                "cps.n.StepEndNode", PARALLEL, (last,), start=start
+            ))
+        last = add("cps.n.StepEndNode", PARALLEL, ends, start=parallel)
+        last = add("cps.n.StepEndNode", STAGE, (last,), start=inner)
+        last = add("cps.n.StepEndNode", STAGE, (last,), start=outer)
+        stage += 1
+    add("cps.n.FlowEndNode", None, (last,))
+    return nodes
+
+
+def measure(function, repeat) -> float:
+    """
+    Measures the best time of a function
+
+    :param function: the function without parameters
+    :param repeat: the number of runs
+    :returns: the best time in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def main():
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--nodes", type=int, default=100000)
+    parser.add_argument("-b", "--branches", type=int, default=200)
+    parser.add_argument("-s", "--steps", type=int, default=3)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+    nodes = create_flow(args.nodes, args.branches, args.steps)
+    edges = sum(len(node.get_parent_ids()) for node in nodes.values())
+    print("{} nodes, {} edges".format(len(nodes), edges))
+
+    def query(index):
+        for node_no in nodes:
+            index.get_stage(node_no)
+            index.get_branch(node_no)
+
+    graph = FlowGraph(nodes)
+    ancestry = AncestorIndex(nodes)
+    print("{:>24} {:>10} {:>12}".format("", "seconds", "nodes/s"))
+    for name, function in (
+        ("FlowGraph build", lambda: FlowGraph(nodes)),
+        ("FlowGraph queries", lambda: query(graph)),
+        ("AncestorIndex build", lambda: AncestorIndex(nodes)),
+        ("AncestorIndex queries", lambda: query(ancestry)),
+    ):
+        seconds = measure(function, args.repeat)
+        print("{:>24} {:>10.3f} {:>12.0f}".format(
+            name, seconds, len(nodes) / seconds
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for parsing the log-index into the LogIndex
+
+Parses a synthetic log-index with alternating node and bare lines and
+reports the parse time and the memory needed per log range.
+"""
+
+import argparse
+import io
+import random
+import time
+import tracemalloc
+from jenkins_log_parser.logindex import LogIndex
+
+
+def create_lines(count, nodes=20000, seed=1):
+    """
+    Generates the lines of a synthetic log-index
+
+    :param count: the number of lines
+    :param nodes: the number of distinct node numbers
+    :param seed: the seed of the random generator
+    :returns: a generator of byte lines
+    """
+    rnd = random.Random(seed)
+    offset = 0
+    for i in range(count):
+        if i > 0 and rnd.random() < 0.3:
+            yield b"%d\n" % offset
+        else:
+            yield b"%d %d\n" % (offset, rnd.randint(2, nodes + 1))
+        offset += rnd.randint(1, 500)
+
+
+def parse(data) -> LogIndex:
+    """
+    Parses the log-index data and groups the ranges per node
+
+    :param data: the log-index as bytes
+    :returns: the LogIndex
+    """
+    index = LogIndex()
+    index.parse(io.BytesIO(data))
+    index.finish(2 ** 40)
+    index.get_ranges(2)
+    return index
+
+
+def measure(count) -> tuple:
+    """
+    Measures parsing a synthetic log-index, once for the time and once for
+    the memory
+
+    :param count: the number of lines
+    :returns: a tuple of seconds, number of ranges and bytes per range
+    """
+    data = b"".join(create_lines(count))
+    start = time.perf_counter()
+    index = parse(data)
+    seconds = time.perf_counter() - start
+    del index
+    tracemalloc.start()
+    index = parse(data)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return seconds, len(index), size / len(index)
+
+
+def main():
+    """
+    Runs the benchmark for the requested line counts
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "counts",
+        type=int,
+        nargs="*",
+        default=[100000, 1000000]
+    )
+    args = parser.parse_args()
+    print("{:>8} {:>10} {:>10} {:>12}".format(
+        "lines", "seconds", "ranges", "bytes/range"))
+    for count in args.counts:
+        seconds, ranges, per_range = measure(count)
+        print("{:>8} {:>10.3f} {:>10} {:>12.1f}".format(
+            count, seconds, ranges, per_range
+        ))
+
+
+if __name__ == "__main__":
+    main()
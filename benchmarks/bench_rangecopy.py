@@ -0,0 +1,105 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for copying the log ranges of the nodes into the log files
+
+Writes a raw log of the given size and copies it, split into ranges of the
+given size with a node header in front of each, into an output file: once
+through a buffered file out of the memory mapped log and once with the
+RangeWriter for every copy method, kernel copies for ranges of every size.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from jenkins_log_parser.rangecopy import COPY_METHODS, RangeWriter
+from jenkins_log_parser.storage import DirectoryStorage
+
+HEADER = b">>> NodeID: 1, Step: ShellStep\n"
+
+
+class RangeNode:
+    """
+    A stand-in for a LogNode with a single log range
+    """
+    def __init__(self, start, end, log_view):
+        self.start = start
+        self.end = end
+        self.log_view = log_view
+
+    def get_ranges(self) -> list:
+        return [(self.start, self.end)]
+
+    def get_log_views(self) -> list:
+        return [self.log_view[self.start:self.end]]
+
+
+def main():
+    """
+    Runs the benchmark
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", "--megabytes", type=int, default=256)
+    parser.add_argument("-r", "--range-size", type=int, default=256 * 1024)
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as path:
+        os.makedirs(os.path.join(path, "workflow"))
+        with open(os.path.join(path, "log-index"), "wb"):
+            pass
+        line = b"+ make -j8 all 0123456789 abcdefghijklmnopqrstuvwxyz\n"
+        with open(os.path.join(path, "log"), "wb") as stream:
+            block = line * (1024 * 1024 // len(line))
+            for _ in range(args.megabytes):
+                stream.write(block)
+        storage = DirectoryStorage(path)
+        log_view = storage.map_log()
+        nodes = [
+            RangeNode(start, min(start + args.range_size, len(log_view)),
+                      log_view)
+            for start in range(0, len(log_view), args.range_size)
+        ]
+        output = os.path.join(path, "out.log")
+
+        def buffered():
+            with open(output, "wb") as stream:
+                for node in nodes:
+                    stream.write(HEADER)
+                    for view in node.get_log_views():
+                        stream.write(view)
+
+        def range_writer(method):
+            with RangeWriter(
+                output, storage.open_log_source(), method, min_copy=0
+            ) as writer:
+                for node in nodes:
+                    writer.write(HEADER)
+                    writer.write_log(node)
+
+        runs = [("buffered file", buffered)]
+        for method in COPY_METHODS:
+            runs.append((
+                "RangeWriter " + method,
+                lambda method=method: range_writer(method)
+            ))
+        print("{} MiB in {} ranges".format(len(log_view) >> 20, len(nodes)))
+        print("{:>28} {:>10} {:>10}".format("", "seconds", "MiB/s"))
+        for name, function in runs:
+            best = None
+            for _ in range(args.repeat):
+                if os.path.exists(output):
+                    os.remove(output)
+                start = time.perf_counter()
+                function()
+                seconds = time.perf_counter() - start
+                best = seconds if best is None else min(best, seconds)
+            print("{:>28} {:>10.3f} {:>10.0f}".format(
+                name, best, len(log_view) / best / 1024 / 1024
+            ))
+        del nodes, log_view
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
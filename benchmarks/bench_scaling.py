@@ -0,0 +1,130 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for the scaling of the whole processing of a build
+
+Generates synthetic builds of increasing size and measures BuildLog, the
+TreeWalker traversal and LogProcessor.process end to end. For every size the
+seconds and nodes per second of each phase are reported, followed by the
+scaling exponent against the previous size: 1.0 means linear scaling, 2.0
+quadratic. The default processing walks the tree once per log file, so it
+scales quadratically, at 100k nodes --single-pass is advisable.
+"""
+
+import argparse
+import contextlib
+import io
+import math
+import os
+import tempfile
+import time
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.synthetic import generate_build
+from jenkins_log_parser.treewalker import TreeWalker
+
+PHASES = ["collect_nodes", "create_tree", "collect_logs", "walk", "process"]
+
+
+def measure(path, target, options) -> dict:
+    """
+    Measures the phases of processing one build
+
+    :param path: the build directory or archive
+    :param target: the target directory for the log files
+    :param options: the parsed arguments
+    :returns: a dictionary of the phase names mapped to seconds
+    """
+    seconds = dict()
+    start = time.perf_counter()
+    build_log = BuildLog(path, lazy=options.lazy, extractor=options.extractor)
+    nodes = build_log.collect_nodes()
+    seconds.update({"collect_nodes": time.perf_counter() - start})
+    start = time.perf_counter()
+    tree = build_log.create_tree()
+    seconds.update({"create_tree": time.perf_counter() - start})
+    start = time.perf_counter()
+    build_log.collect_nodes_logs()
+    seconds.update({"collect_logs": time.perf_counter() - start})
+    start = time.perf_counter()
+    walker = TreeWalker(nodes, tree, build_log.ancestry)
+    while walker.next() is not None:
+        pass
+    seconds.update({"walk": time.perf_counter() - start})
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        LogProcessor(
+            target,
+            single_pass=options.single_pass,
+            jobs=options.jobs,
+            copy_method=options.copy_method,
+            max_open_files=options.max_open_files,
+            codec=options.codec,
+            level=options.level
+        ).process(nodes, tree, build_log.ancestry)
+    seconds.update({"process": time.perf_counter() - start})
+    build_log.close()
+    return seconds
+
+
+def main():
+    """
+    Runs the benchmark for the requested sizes
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "sizes",
+        type=int,
+        nargs="*",
+        default=[1000, 10000, 100000]
+    )
+    parser.add_argument("-d", "--depth", type=int, default=2)
+    parser.add_argument("-f", "--fanout", type=int, default=3)
+    parser.add_argument("-l", "--log-lines", type=int, default=2)
+    parser.add_argument("--zip", action="store_true")
+    parser.add_argument("--lazy", action="store_true")
+    parser.add_argument("--extractor", default="etree")
+    parser.add_argument("--single-pass", action="store_true")
+    parser.add_argument("-j", "--jobs", type=int, default=1)
+    parser.add_argument("--copy-method", default="mmap")
+    parser.add_argument("--max-open-files", type=int, default=256)
+    parser.add_argument("--codec", default="none")
+    parser.add_argument("--level", type=int, default=None)
+    args = parser.parse_args()
+    print("{:>8} {:>14} {:>10} {:>12} {:>9}".format(
+        "nodes", "phase", "seconds", "nodes/s", "scaling"
+    ))
+    previous = (None, dict())
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as path:
+            build = os.path.join(path, "build.zip" if args.zip else "build")
+            generate_build(
+                build,
+                nodes=size,
+                depth=args.depth,
+                fanout=args.fanout,
+                log_lines=args.log_lines
+            )
+            target = os.path.join(path, "target")
+            os.makedirs(target)
+            seconds = measure(build, target, args)
+        seconds.update({"total": sum(seconds.values())})
+        for name in PHASES + ["total"]:
+            scaling = "-"
+            if previous[0] is not None and previous[1].get(name) > 0:
+                scaling = "{:.2f}".format(
+                    math.log(seconds.get(name) / previous[1].get(name)) /
+                    math.log(size / previous[0])
+                )
+            print("{:>8} {:>14} {:>10.3f} {:>12.0f} {:>9}".format(
+                size,
+                name,
+                seconds.get(name),
+                size / seconds.get(name) if seconds.get(name) > 0 else 0,
+                scaling
+            ))
+        previous = (size, seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#! /usr/bin/env python3
+
+"""
+Benchmark for the traversal of the TreeWalker
+
+Creates synthetic trees shaped like Jenkins pipelines (long chains of steps
+with parallel fan-outs) and measures a full walk over them.
+"""
+
+import argparse
+import random
+import time
+from jenkins_log_parser.treewalker import TreeWalker
+
+
+class SyntheticNode:
+    """
+    Minimal stand-in for a LogNode, only providing the attributes the
+    TreeWalker uses
+    """
+    def __init__(self, node_no, parent_id):
+        """
+        Constructor
+
+        :param node_no: node number
+        :param parent_id: the parent node number
+        """
+        self.node_no = node_no
+        self.parent_id = parent_id
+
+
+def create_tree(count, fanout=8, seed=1):
+    """
+    Creates the nodes and the tree like BuildLog would provide them
+
+    :param count: the number of nodes
+    :param fanout: the maximum number of parallel branches of a fan-out
+    :param seed: the seed of the random generator
+    :returns: a tuple of the nodes dictionary and the tree
+    """
+    rnd = random.Random(seed)
+    nodes = {2: SyntheticNode(2, None)}
+    heads = [2]
+    nodeid = 3
+    while nodeid < count + 2:
+        if rnd.random() < 0.01:
+            # fan out into parallel branches from one of the heads
+            parent = rnd.choice(heads)
+            heads = list()
+            for _ in range(rnd.randint(2, fanout)):
+                nodes[nodeid] = SyntheticNode(nodeid, parent)
+                heads.append(nodeid)
+                nodeid += 1
+        else:
+            # continue one of the branches with another step
+            index = rnd.randrange(len(heads))
+            nodes[nodeid] = SyntheticNode(nodeid, heads[index])
+            heads[index] = nodeid
+            nodeid += 1
+    tree = {}
+    for node_no in sorted(nodes.keys()):
+        parent_id = nodes[node_no].parent_id
+        if parent_id not in tree:
+            tree.update({parent_id: [node_no]})
+        else:
+            tree.get(parent_id).append(node_no)
+        tree.update({node_no: []})
+    return nodes, tree
+
+
+def measure(count) -> tuple:
+    """
+    Measures a full walk over a synthetic tree
+
+    :param count: the number of nodes
+    :returns: a tuple of the seconds for the first walk and for a second walk
+        after a reset
+    """
+    nodes, tree = create_tree(count)
+    walker = TreeWalker(nodes, tree)
+    start = time.perf_counter()
+    current = walker.next()
+    while current is not None:
+        current = walker.next()
+    first = time.perf_counter() - start
+    walker.reset()
+    start = time.perf_counter()
+    current = walker.next()
+    while current is not None:
+        current = walker.next()
+    return first, time.perf_counter() - start
+
+
+def main():
+    """
+    Runs the benchmark for the requested node counts
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "counts",
+        type=int,
+        nargs="*",
+        default=[12500, 25000, 50000]
+    )
+    args = parser.parse_args()
+    print("{:>8} {:>10} {:>10} {:>12}".format(
+        "nodes", "walk [s]", "rewalk [s]", "us/node"))
+    for count in args.counts:
+        first, second = measure(count)
+        print("{:>8} {:>10.3f} {:>10.3f} {:>12.2f}".format(
+            count, first, second, first / count * 1e6
+        ))
+
+
+if __name__ == "__main__":
+    main()
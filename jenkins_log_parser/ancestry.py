@@ -0,0 +1,176 @@
+"""
+The ancestry module providing precomputed ancestor information of the
+workflow nodes
+"""
+from jenkins_log_parser.noderecord import LABEL_PATH, BRANCH_PATH
+
+
+class AncestorIndex:
+    """
+    The AncestorIndex class stores per node its depth, the enclosing stage
+    and parallel branch and the entry and exit numbers of an euler tour
+    through the tree, so ancestor checks become interval comparisons.
+
+    Nodes of a growing build can be added afterwards, they get no euler tour
+    numbers and ancestor checks walk up their parent chain until an indexed
+    node is reached.
+    """
+    def __init__(self, nodes):
+        """
+        Constructor, computing the index in one traversal
+
+        :param nodes: The nodes how the class BuildLog is providing them
+        """
+        self.nodes = nodes
+        self.depths = dict()
+        self.stages = dict()
+        self.branches = dict()
+        self.entries = dict()
+        self.exits = dict()
+        self.orphans = set()
+        self._build()
+
+    def _build(self):
+        """
+        Internal method traversing the nodes along their parent ids with an
+        explicit stack and filling the index
+        """
+        children = dict()
+        roots = list()
+        for node_no in sorted(self.nodes.keys()):
+            parent_id = self.nodes.get(node_no).parent_id
+            if parent_id is None or parent_id not in self.nodes:
+                roots.append(node_no)
+                if parent_id is not None:
+                    self.orphans.add(parent_id)
+            else:
+                children.setdefault(parent_id, list()).append(node_no)
+        counter = 0
+        for root in roots:
+            self.depths.update({root: 1})
+            self.stages.update({root: None})
+            self.branches.update({root: None})
+            stack = [(root, False)]
+            while len(stack) > 0:
+                node_no, finished = stack.pop()
+                counter += 1
+                if finished:
+                    self.exits.update({node_no: counter})
+                    continue
+                self.entries.update({node_no: counter})
+                stack.append((node_no, True))
+                node_children = children.get(node_no)
+                if node_children is None:
+                    continue
+                depth = self.depths.get(node_no) + 1
+                stage, branch = self._inherited(node_no)
+                for child in reversed(node_children):
+                    self.depths.update({child: depth})
+                    self.stages.update({child: stage})
+                    self.branches.update({child: branch})
+                    stack.append((child, False))
+
+    def _inherited(self, node_no) -> tuple:
+        """
+        Internal method determining the stage and branch the children of a
+        node are enclosed by
+
+        :param node_no: the node number of the parent
+        :returns: a tuple of stage name and branch name
+        """
+        node = self.nodes.get(node_no)
+        stage = self.stages.get(node_no)
+        branch = self.branches.get(node_no)
+        step = node.get_step()
+        if step == "StageStep":
+            label = node.get_path_text(LABEL_PATH)
+            if label is not None:
+                stage = label
+        elif step == "ParallelStep":
+            branch_name = node.get_path_text(BRANCH_PATH)
+            if branch_name is not None:
+                branch = branch_name
+        return stage, branch
+
+    def add(self, node_no) -> bool:
+        """
+        Adds a node of a growing build whose parent is already part of the
+        index
+
+        :param node_no: the node number, the node has to be in the nodes
+            dictionary already
+        :returns: True if the node was added, False if its parent is unknown
+            and the index has to be rebuilt
+        """
+        parent_id = self.nodes.get(node_no).parent_id
+        if parent_id is None:
+            self.depths.update({node_no: 1})
+            self.stages.update({node_no: None})
+            self.branches.update({node_no: None})
+            return True
+        if parent_id not in self:
+            return False
+        stage, branch = self._inherited(parent_id)
+        self.depths.update({node_no: self.depths.get(parent_id) + 1})
+        self.stages.update({node_no: stage})
+        self.branches.update({node_no: branch})
+        return True
+
+    def __contains__(self, node_no) -> bool:
+        """
+        Checks if a node is part of the index
+
+        :param node_no: the node number
+        :returns: True or False
+        """
+        return node_no in self.depths
+
+    def is_ancestor(self, probable_parent, node_no) -> bool:
+        """
+        Boolean method to check if a node is a parent of another node
+
+        :param probable_parent: the node number of the probable parent
+        :param node_no: the node number to check
+        :returns: True or False
+        """
+        current = node_no
+        while current not in self.entries:
+            # an added node, walk up to the nodes with euler tour numbers
+            current = self.nodes.get(current).parent_id
+            if current == probable_parent:
+                return True
+            if current is None:
+                return False
+        if probable_parent not in self.entries:
+            return False
+        return (
+            self.entries.get(probable_parent) < self.entries.get(current) and
+            self.exits.get(current) < self.exits.get(probable_parent)
+        )
+
+    def get_depth(self, node_no) -> int:
+        """
+        The depth of a node, with 1 being the depth of a root node
+
+        :param node_no: the node number
+        :returns: the depth in integer
+        """
+        return self.depths.get(node_no)
+
+    def get_stage(self, node_no) -> str:
+        """
+        The name of the nearest enclosing stage of a node
+
+        :param node_no: the node number
+        :returns: the name of the stage or None
+        """
+        return self.stages.get(node_no)
+
+    def get_branch(self, node_no) -> str:
+        """
+        The name of the nearest enclosing parallel branch of a node
+
+        :param node_no: the node number
+        :returns: the name of the parallel branch or None
+        """
+        return self.branches.get(node_no)
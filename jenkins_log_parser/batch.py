@@ -0,0 +1,300 @@
+"""
+The batch module processing one or many Jenkins build logs, optionally
+concurrently on a pool of worker processes
+"""
+import asyncio
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.cache import BuildCache
+from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.profiling import (
+    is_enabled, profiled, replay, run_captured
+)
+from jenkins_log_parser.rangecopy import MAX_OPEN_FILES
+from jenkins_log_parser.sidecar import SIDECAR_NAME, write_sidecar
+
+
+def is_build_dir(path) -> bool:
+    """
+    Checks if a directory is a build log directory itself and not a
+    directory containing build logs
+
+    :param path: the directory
+    :returns: True or False
+    """
+    return (
+        os.path.exists(os.path.join(path, "log-index")) or
+        os.path.isdir(os.path.join(path, "workflow"))
+    )
+
+
+def expand_locations(locations) -> list:
+    """
+    Expands the given log locations to a list of single builds. A location
+    can be a build directory, a zip archive, a directory containing zip
+    archives or build directories, or a glob pattern.
+
+    :param locations: the list of log locations
+    :returns: the list of build locations
+    """
+    builds = list()
+    for location in locations:
+        if glob.has_magic(location):
+            builds.extend(sorted(glob.glob(location)))
+        elif os.path.isdir(location) and not is_build_dir(location):
+            contained = list()
+            for entry in sorted(os.listdir(location)):
+                path = os.path.join(location, entry)
+                if (
+                    (os.path.isfile(path) and entry.endswith(".zip")) or
+                    (os.path.isdir(path) and is_build_dir(path))
+                ):
+                    contained.append(path)
+            # a directory without builds in it is a build with a deeper
+            # nested layout, e.g. an extracted archive
+            builds.extend(contained if len(contained) > 0 else [location])
+        else:
+            builds.append(location)
+    return builds
+
+
+def build_targets(builds, target_dir) -> list:
+    """
+    Creates a unique target subdirectory for every build named after the
+    build directory or archive
+
+    :param builds: the list of build locations
+    :param target_dir: the common target directory
+    :returns: the list of target directories in the order of the builds
+    """
+    targets = list()
+    used = set()
+    for build in builds:
+        name = os.path.basename(os.path.normpath(build))
+        if name.endswith(".zip"):
+            name = name[:-len(".zip")]
+        unique = name
+        i = 1
+        while unique in used:
+            i += 1
+            unique = "{}_{}".format(name, i)
+        used.add(unique)
+        targets.append(os.path.join(target_dir, unique))
+    return targets
+
+
+def collect_nodes(build_log, options) -> dict:
+    """
+    Collects the nodes of a build with the loader the options ask for
+
+    :param build_log: the BuildLog
+    :param options: a dictionary with the io_concurrency and parse_workers
+        options
+    :returns: the nodes dictionary of the BuildLog
+    """
+    if options.get("parse_workers", 0) > 0:
+        return build_log.collect_nodes_parallel(options.get("parse_workers"))
+    if options.get("io_concurrency", 0) > 0:
+        return asyncio.run(build_log.collect_nodes_async(
+            options.get("io_concurrency")
+        ))
+    return build_log.collect_nodes()
+
+
+def load_build(log_location, options) -> BuildLog:
+    """
+    Creates the BuildLog of a build and reads its nodes, tree and log-index
+    like the options ask for
+
+    :param log_location: The directory or zip archive of the log data
+    :param options: a dictionary with the lazy, cache_dir, cache_size,
+        io_concurrency, parse_workers and extractor options
+    :returns: the BuildLog, which needs to be closed by the caller
+    """
+    cache = None
+    if options.get("cache_dir") is not None:
+        cache = BuildCache(
+            options.get("cache_dir"), options.get("cache_size")
+        )
+    build_log = BuildLog(
+        log_location,
+        lazy=options.get("lazy", False),
+        cache=cache,
+        extractor=options.get("extractor", "etree")
+    )
+    try:
+        collect_nodes(build_log, options)
+        build_log.create_tree()
+        build_log.collect_nodes_logs()
+        build_log.update_cache()
+    except BaseException:
+        build_log.close()
+        raise
+    return build_log
+
+
+def query_build(
+    log_location,
+    stream,
+    stage: str = None,
+    branch: str = None,
+    options=None
+) -> int:
+    """
+    Writes the log of a single stage or parallel branch of a build to a
+    stream without producing the other log files
+
+    :param log_location: The directory or zip archive of the log data
+    :param stream: the binary output stream
+    :param stage: the name of the stage (optional)
+    :param branch: the name of the parallel branch (optional)
+    :param options: a dictionary with the options of process_build
+        (optional)
+    :returns: the number of written nodes
+    """
+    options = options or dict()
+    build_log = load_build(log_location, options)
+    try:
+        return LogProcessor(None).query(
+            build_log.nodes,
+            build_log.tree,
+            stream,
+            stage=stage,
+            branch=branch,
+            ancestry=build_log.create_graph() if options.get("graph")
+            else build_log.ancestry
+        )
+    finally:
+        build_log.close()
+
+
+@profiled("build")
+def process_build(log_location, target_dir, options=None) -> dict:
+    """
+    Processes a single build log into the target directory
+
+    :param log_location: The directory or zip archive of the log data
+    :param target_dir: the target directory for the produced log files
+    :param options: a dictionary with the lazy, single_pass, jobs,
+        copy_method, max_open_files, codec, level, cache_dir, cache_size,
+        io_concurrency, parse_workers, extractor, graph and index options
+        (optional)
+    :returns: a dictionary with the location, target, seconds, node count
+        and the error message, if the processing failed
+    """
+    options = options or dict()
+    result = {
+        "location": log_location,
+        "target": target_dir,
+        "seconds": 0.0,
+        "nodes": 0,
+        "error": None
+    }
+    start = time.perf_counter()
+    build_log = None
+    try:
+        if not os.path.exists(target_dir):
+            os.makedirs(target_dir)
+        build_log = load_build(log_location, options)
+        nodes = build_log.nodes
+        tree = build_log.tree
+        log_proc = LogProcessor(
+            target_dir,
+            single_pass=options.get("single_pass", False),
+            jobs=options.get("jobs", 1),
+            copy_method=options.get("copy_method", "mmap"),
+            max_open_files=options.get("max_open_files", MAX_OPEN_FILES),
+            codec=options.get("codec", "none"),
+            level=options.get("level")
+        )
+        log_proc.process(
+            nodes,
+            tree,
+            build_log.create_graph() if options.get("graph")
+            else build_log.ancestry
+        )
+        if options.get("index"):
+            write_sidecar(
+                os.path.join(target_dir, SIDECAR_NAME), build_log, log_proc
+            )
+        result.update({"nodes": len(nodes)})
+    except Exception as e:  # pylint: disable=broad-except
+        result.update({"error": "{}: {}".format(type(e).__name__, e)})
+    finally:
+        if build_log is not None:
+            build_log.close()
+    result.update({"seconds": time.perf_counter() - start})
+    return result
+
+
+def run_batch(builds, targets, processes=1, options=None) -> list:
+    """
+    Processes many builds, each into its own target directory, on a pool
+    of worker processes
+
+    :param builds: the list of build locations
+    :param targets: the list of target directories
+    :param processes: the number of worker processes (optional)
+    :param options: a dictionary with the options of each build (optional)
+    :returns: the list of results of process_build in the order of the
+        builds
+    """
+    if processes <= 1:
+        return [
+            process_build(build, target, options)
+            for build, target in zip(builds, targets)
+        ]
+    results = list()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                run_captured, is_enabled(), process_build, build, target,
+                options
+            )
+            for build, target in zip(builds, targets)
+        ]
+        for build, target, future in zip(builds, targets, futures):
+            try:
+                result, records = future.result()
+                replay(records)
+                results.append(result)
+            except Exception as e:  # pylint: disable=broad-except
+                results.append({
+                    "location": build,
+                    "target": target,
+                    "seconds": 0.0,
+                    "nodes": 0,
+                    "error": "{}: {}".format(type(e).__name__, e)
+                })
+    return results
+
+
+def format_summary(results, seconds: float) -> str:
+    """
+    Creates a human readable summary of a batch run
+
+    :param results: the list of results of process_build
+    :param seconds: the wall time of the whole batch
+    :returns: the summary as string
+    """
+    lines = list()
+    failed = 0
+    for result in results:
+        if result.get("error") is not None:
+            failed += 1
+            status = "FAILED {}".format(result.get("error"))
+        else:
+            status = "ok, {} nodes".format(result.get("nodes"))
+        lines.append("{:>9.2f}s {} -> {}: {}".format(
+            result.get("seconds"),
+            result.get("location"),
+            result.get("target"),
+            status
+        ))
+    lines.append("{} builds processed in {:.2f}s, {} failed".format(
+        len(results), seconds, failed
+    ))
+    return "\n".join(lines)
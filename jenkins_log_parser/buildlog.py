@@ -1,11 +1,57 @@
 """
 Module for handling a Jenkins build log directory or zip file
 """
+import asyncio
+import bisect
+import functools
 import os
-import glob
-import tempfile
-import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from jenkins_log_parser.ancestry import AncestorIndex
+from jenkins_log_parser.flowgraph import FlowGraph
+from jenkins_log_parser.logindex import LogIndex
 from jenkins_log_parser.lognode import LogNode
+from jenkins_log_parser.noderecord import NodeRecord
+from jenkins_log_parser.profiling import (
+    bind, count, is_enabled, merge_records, phase, profiled, replay,
+    run_captured
+)
+from jenkins_log_parser.scanner import EXTRACTORS
+from jenkins_log_parser.storage import open_storage, DirectoryStorage
+
+_WORKER = dict()
+
+
+def _init_worker(log_location, extractor):
+    """
+    Opens the storage of the build once in every worker process of
+    BuildLog.collect_nodes_parallel
+
+    :param log_location: The directory or zip archive of the log data
+    :param extractor: the name of the extractor for the NodeRecords
+    """
+    _WORKER.update({
+        "storage": open_storage(log_location),
+        "extractor": EXTRACTORS.get(extractor)
+    })
+
+
+@profiled("parse_chunk")
+def _parse_chunk(chunk) -> list:
+    """
+    Extracts the NodeRecords of a chunk of node files in a worker process
+
+    :param chunk: a list of tuples of node number and node file
+    :returns: a list of tuples of node number, node file and the fields of
+        the NodeRecord
+    """
+    storage = _WORKER.get("storage")
+    extractor = _WORKER.get("extractor")
+    rows = list()
+    for nodeid, node_file in chunk:
+        with storage.open(node_file) as stream:
+            rows.append((nodeid, node_file, extractor(stream).as_tuple()))
+    return rows
 
 
 class BuildLog():
@@ -13,34 +59,82 @@ class BuildLog():
     The BuildLog class is the entrypoint for collecting all necessary
     data of a jenkins build log directory.
     """
-    def __init__(self, log_location):
+    def __init__(
+        self,
+        log_location,
+        lazy: bool = False,
+        cache=None,
+        extractor: str = "etree"
+    ):
         """
         Constructor.
 
         :param log_location: The directory or zip archive of the log data
+        :param lazy: create the LogNode objects in lazy mode, only keeping
+            the needed fields of the xml files in memory (optional)
+        :param cache: a BuildCache the parsed data is loaded from and stored
+            to (optional)
+        :param extractor: the name of the function extracting the fields of
+            the xml files in lazy mode, "etree" or "scan", any other than
+            "etree" implies the lazy mode (optional)
         """
+        if extractor not in EXTRACTORS:
+            raise ValueError("Unknown extractor '%s'" % extractor)
+        self.lazy = lazy or extractor != "etree"
+        self.extractor_name = extractor
+        self.extractor = EXTRACTORS.get(extractor)
+        self.cache = cache
+        self.cache_key = None
+        self.cached = None
         self.log_dir = None
-        self.tempdir = None
-        if os.path.isdir(log_location):
-            self.log_dir = log_location
-        else:
-            if log_location.endswith(".zip"):
-                self.tempdir = tempfile.TemporaryDirectory()
-                self.log_dir = self.tempdir.name
-                archive = zipfile.ZipFile(log_location)
-                archive.extractall(self.log_dir)
-
-        self.log_file = None
-        self.log_index = None
-        os.chdir(self.log_dir)
-        self.log_index = glob.glob("**/log-index", recursive=True)[0]
-        self.log_file = glob.glob("**/log", recursive=True)[0]
+        self.storage = None
+        with phase("open"):
+            self.storage = open_storage(log_location)
+        if isinstance(self.storage, DirectoryStorage):
+            self.log_dir = self.storage.location
+        self.log_file = self.storage.log_file
+        self.log_index = self.storage.log_index
+        self.workflow_dirs = self.storage.workflow_dirs
         self.nodes = dict()
+        self.index = None
+        self.tree = None
+        self.ancestry = None
+        self.graph = None
+        self.known_files = set()
+        self.index_offset = 0
 
     def __del__(self):
-        if self.tempdir is not None:
-            self.tempdir.cleanup()
+        self.close()
 
+    def close(self):
+        """
+        Releases the memory mapped log file and all other resources of the
+        storage.
+        """
+        if self.storage is not None:
+            self.storage.close()
+
+    def map_log(self) -> memoryview:
+        """
+        Memory maps the raw log file once, so the LogNode objects can slice
+        their snippets out of it without opening the file again.
+
+        :returns: A memoryview over the whole log file or None if the log
+            file is empty
+        """
+        return self.storage.map_log()
+
+    def scan_node_files(self) -> dict:
+        """
+        Scans the workflow directories in a single pass for the xml node
+        files.
+
+        :returns: A dictionary of the node file name without extension mapped
+            to the name of the file in the storage
+        """
+        return self.storage.scan_node_files()
+
+    @profiled("collect_nodes")
     def collect_nodes(self):
         """
         Collects all workflow nodes and saves them in an internal dict
@@ -48,77 +142,399 @@ class BuildLog():
 
         :returns: A dictionary of the log id mapped to an LogNode object
         """
-        files = glob.glob("**/workflow/*.xml", recursive=True)
-        for f in files:
-            fname = f.split(os.path.sep)[-1]
-            nodeid = fname.split(".")[0]
+        if self._load_cached_nodes():
+            return self.nodes
+        for nodeid, node_file in self._node_files():
+            self.nodes.update({
+                nodeid: LogNode(
+                    nodeid,
+                    node_file=node_file,
+                    lazy=self.lazy,
+                    extractor=self.extractor,
+                    storage=self.storage
+                )
+            })
+        count("nodes", len(self.nodes))
+        return self.nodes
+
+    @profiled("collect_nodes")
+    async def collect_nodes_async(
+        self,
+        concurrency: int = 32,
+        executor=None
+    ):
+        """
+        Collects all workflow nodes like collect_nodes, but reads the node
+        files concurrently. At most concurrency files are read at the same
+        time, which hides the latency of network file systems. The reads and
+        the parsing run on the executor, which has to be a thread pool as the
+        nodes share the storage of the build. For parsing on processes use
+        collect_nodes_parallel.
+
+        :param concurrency: the maximum number of concurrent reads (optional)
+        :param executor: the ThreadPoolExecutor used for reading and parsing
+            (optional, by default a thread pool of concurrency threads)
+        :returns: A dictionary of the log id mapped to an LogNode object
+        """
+        if executor is not None and not isinstance(
+            executor, ThreadPoolExecutor
+        ):
+            raise ValueError(
+                "collect_nodes_async needs a ThreadPoolExecutor, for worker "
+                "processes use collect_nodes_parallel")
+        if self._load_cached_nodes():
+            return self.nodes
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(concurrency)
+        own_executor = executor is None
+        if own_executor:
+            executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        async def load(nodeid, node_file):
+            async with semaphore:
+                content = await loop.run_in_executor(
+                    executor, bind(self._read_file), node_file
+                )
+            return await loop.run_in_executor(executor, bind(lambda: LogNode(
+                nodeid,
+                node_file=node_file,
+                lazy=self.lazy,
+                storage=self.storage,
+                content=content,
+                extractor=self.extractor
+            )))
+
+        try:
+            nodes = await asyncio.gather(*[
+                load(nodeid, node_file)
+                for nodeid, node_file in self._node_files()
+            ])
+        finally:
+            if own_executor:
+                executor.shutdown()
+        for node in nodes:
+            self.nodes.update({node.node_no: node})
+        count("nodes", len(self.nodes))
+        return self.nodes
+
+    @profiled("collect_nodes")
+    def collect_nodes_parallel(
+        self,
+        processes: int = None,
+        chunk_size: int = 256
+    ):
+        """
+        Collects all workflow nodes like collect_nodes, but parses the node
+        files on a pool of worker processes. The workers open the storage on
+        their own and return only the extracted fields of chunks of nodes, so
+        the nodes behave like in lazy mode.
+
+        :param processes: the number of worker processes (optional, by
+            default the number of CPUs)
+        :param chunk_size: the number of node files per chunk (optional)
+        :returns: A dictionary of the log id mapped to an LogNode object
+        """
+        if self._load_cached_nodes():
+            return self.nodes
+        node_files = self._node_files()
+        chunks = [
+            node_files[i:i + chunk_size]
+            for i in range(0, len(node_files), chunk_size)
+        ]
+        records = list()
+        with ProcessPoolExecutor(
+            max_workers=processes or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(self.storage.location, self.extractor_name)
+        ) as executor:
+            for rows, chunk_records in executor.map(
+                functools.partial(run_captured, is_enabled(), _parse_chunk),
+                chunks
+            ):
+                records.extend(chunk_records)
+                for nodeid, node_file, fields in rows:
+                    self.nodes.update({
+                        nodeid: LogNode(
+                            nodeid,
+                            node_file=node_file,
+                            storage=self.storage,
+                            record=NodeRecord.from_tuple(fields)
+                        )
+                    })
+        replay(merge_records(records))
+        count("nodes", len(self.nodes))
+        return self.nodes
+
+    def _load_cached_nodes(self) -> bool:
+        """
+        Internal method creating the LogNode objects out of the cache, if a
+        cache is used and contains the build
+
+        :returns: True if the nodes were loaded from the cache
+        """
+        if self.cache is not None:
+            self.cache_key = self.cache.key_for(self.storage)
+            self.cached = self.cache.load(self.cache_key)
+        if self.cached is None:
+            return False
+        for nodeid, node_file, record in self.cached.get("nodes"):
+            self.nodes.update({
+                nodeid: LogNode(
+                    nodeid,
+                    node_file=node_file,
+                    storage=self.storage,
+                    record=record
+                )
+            })
+        count("nodes", len(self.nodes))
+        count("cached_nodes", len(self.nodes))
+        return True
+
+    def _node_files(self) -> list:
+        """
+        Internal method listing the node files with their node numbers
+
+        :returns: a list of tuples of node number and node file
+        """
+        node_files = list()
+        with phase("scan_node_files"):
+            scanned = self.scan_node_files()
+            count("files", len(scanned))
+        for nodeid, node_file in scanned.items():
             if nodeid.isdecimal():
-                # nodeid content which is not decimal is skipped!
-                self.nodes.update({
-                    int(nodeid): LogNode(int(nodeid))
-                })
+                node_files.append((int(nodeid), node_file))
             else:
                 raise ValueError(
                     "All nodes have to be in decimal, here a node with the\
  name '%s' exists." % nodeid)
-        return self.nodes
+        return node_files
+
+    def _read_file(self, name) -> bytes:
+        """
+        Internal method reading a whole file of the storage
+
+        :param name: the name of the file
+        :returns: the content of the file
+        """
+        with self.storage.open(name) as stream:
+            return stream.read()
 
+    @profiled("collect_nodes_logs")
     def collect_nodes_logs(self):
         """
         Parses the provided log-index and matches the found log byte positions
-        to the LogNode objects in the internal dictionary.
+        to the LogNode objects in the internal dictionary. The ranges are
+        kept in the LogIndex provided as attribute index, the trailing entry
+        of the log-index lasts until the end of the log.
 
         This call is required for being able to produce the output.
         """
         if self.nodes is None:
             self.collect_nodes()
-        index_data = []
-        with open(self.log_index, "r") as stream:
-            index_data = stream.readlines()
-        i = 0
-        step = 2
-        while i < len(index_data):
-            try:
-                log_start = index_data[i].split()
-                log_end = list()
-                if i+1 < len(index_data):
-                    log_end = index_data[i+1].split()
-                else:
-                    break
-                if len(log_end) > 1:
-                    step = 1
-                else:
-                    step = 2
-                self.nodes.get(
-                    int(log_start[1])
-                ).add_index(
-                    int(log_start[0]),
-                    int(log_end[0])
-                )
-                self.nodes.get(
-                    int(log_start[1])
-                ).set_log_file(self.log_file)
-            except Exception as e:
-                print("%s: %s" % (i, index_data[i]))
-                raise e
-
-            i = i+step
+        log_view = self.map_log()
+        if self.cached is not None:
+            self.index = self.cached.get("index")
+        else:
+            self.index = LogIndex()
+            with self.storage.open(self.log_index) as stream:
+                self.index.parse(stream)
+            self.index.finish(len(log_view) if log_view is not None else 0)
+        count("ranges", len(self.index))
+        count("log_bytes", len(log_view) if log_view is not None else 0)
+        for node_id in self.index.get_node_ids():
+            node = self.nodes.get(node_id)
+            if node is None:
+                raise ValueError(
+                    "The log-index references the node %d, which has no xml\
+ file." % node_id)
+            node.set_indices(self.index.get_ranges(node_id))
+            node.set_log_file(self.log_file, log_view)
 
+    @profiled("create_tree")
     def create_tree(self):
         """
         Creates a tree like structure where the parent-child relationships of
         the LogNodes are stored. This tree structure can then be traversed
-        with the TreeWalker class.
+        with the TreeWalker class. Afterwards the AncestorIndex of the nodes
+        is computed and provided as attribute ancestry.
 
         :returns: A dictionary containing a tree like structure for the use
             with TreeWalker
         """
+        if self.cached is not None:
+            self.tree = self.cached.get("tree")
+            self.ancestry = AncestorIndex(self.nodes)
+            return self.tree
         tree = {}
         for nodeid in sorted(self.nodes.keys()):
-            parent_id = self.nodes[nodeid].parent_id
-            if parent_id not in tree:
-                tree.update({parent_id: [nodeid]})
-            else:
-                tree.get(parent_id).append(nodeid)
-            tree.update({nodeid: []})
+            self._add_to_tree(tree, nodeid)
+        self.tree = tree
+        self.ancestry = AncestorIndex(self.nodes)
         return tree
+
+    @profiled("create_graph")
+    def create_graph(self) -> FlowGraph:
+        """
+        Creates the FlowGraph of the nodes with all parents of the join
+        nodes and provides it as attribute graph. Handed to the LogProcessor
+        instead of the ancestry, the nodes are attributed to the stages and
+        parallel branches along the blocks of the flow instead of along the
+        first parent ids. Needs to be called after collect_nodes.
+
+        :returns: the FlowGraph
+        """
+        self.graph = FlowGraph(self.nodes)
+        return self.graph
+
+    def _add_to_tree(self, tree, nodeid):
+        """
+        Internal method adding a node to the children of its parent in the
+        tree, keeping the children sorted
+
+        :param tree: the tree dictionary
+        :param nodeid: the node number
+        """
+        parent_id = self.nodes[nodeid].parent_id
+        if parent_id not in tree:
+            tree.update({parent_id: [nodeid]})
+        else:
+            bisect.insort(tree.get(parent_id), nodeid)
+        tree.update({nodeid: []})
+
+    @profiled("refresh")
+    def refresh(self) -> dict:
+        """
+        Reads what a still running build has added since the last call, the
+        new xml node files and the new lines of the log-index, and updates
+        the nodes, the tree, the ancestry and the index in place. For a
+        growing build this replaces collect_nodes, create_tree and
+        collect_nodes_logs, the first call reads everything written so far.
+
+        Lines of the log-index are consumed once they are complete, point
+        into the already written log and reference a known node. The range of
+        the node which is written at the moment is split at the current end
+        of the log and continued by the next call.
+
+        :returns: A dictionary with the new node numbers in increasing order
+            and the new log ranges as tuples of node number, start and end
+            byte in the order of the log
+        """
+        if not isinstance(self.storage, DirectoryStorage):
+            raise ValueError(
+                "Only build directories can grow, '%s' is an archive"
+                % self.storage.location)
+        new_nodes = self._refresh_nodes()
+        log_view = self.storage.remap_log()
+        log_size = len(log_view) if log_view is not None else 0
+        if self.index is None:
+            self.index = LogIndex()
+        first = len(self.index)
+        limit = self._refresh_index(log_size)
+        if limit is not None:
+            self.index.advance(limit)
+        ranges = [
+            (
+                self.index.node_ids[i],
+                self.index.starts[i],
+                self.index.ends[i]
+            )
+            for i in range(first, len(self.index))
+            if self.index.starts[i] < self.index.ends[i]
+        ]
+        # only the nodes with new ranges are touched, the others keep their
+        # ranges and the view of the mapping they were given before
+        for node_id, start, end in ranges:
+            node = self.nodes.get(node_id)
+            node.add_index(start, end)
+            node.set_log_file(self.log_file, log_view)
+        return {
+            "nodes": new_nodes,
+            "ranges": ranges
+        }
+
+    def _refresh_nodes(self) -> list:
+        """
+        Internal method creating the LogNode objects of the new xml node
+        files and adding them to the tree and the ancestry
+
+        :returns: the list of the new node numbers in increasing order
+        """
+        new_nodes = list()
+        for nodeid, node_file in self.scan_node_files().items():
+            if nodeid in self.known_files:
+                continue
+            if not nodeid.isdecimal():
+                raise ValueError(
+                    "All nodes have to be in decimal, here a node with the\
+ name '%s' exists." % nodeid)
+            try:
+                node = LogNode(
+                    int(nodeid),
+                    node_file=node_file,
+                    lazy=self.lazy,
+                    extractor=self.extractor,
+                    storage=self.storage
+                )
+            except ET.ParseError:
+                # the node file is still being written, it is read again by
+                # the next call
+                continue
+            self.known_files.add(nodeid)
+            self.nodes.update({node.node_no: node})
+            new_nodes.append(node.node_no)
+        new_nodes.sort()
+        if self.tree is None:
+            self.tree = dict()
+        for nodeid in new_nodes:
+            self._add_to_tree(self.tree, nodeid)
+        if self.ancestry is None or any(
+            nodeid in self.ancestry.orphans for nodeid in new_nodes
+        ):
+            self.ancestry = AncestorIndex(self.nodes)
+        else:
+            for nodeid in new_nodes:
+                if not self.ancestry.add(nodeid):
+                    self.ancestry = AncestorIndex(self.nodes)
+                    break
+        return new_nodes
+
+    def _refresh_index(self, log_size: int) -> int:
+        """
+        Internal method adding the new lines of the log-index to the index
+
+        :param log_size: the size of the log which is already mapped
+        :returns: the byte up to which the log belongs to the pending range,
+            or None if this is unknown because of an incomplete line
+        """
+        with self.storage.open(self.log_index) as stream:
+            stream.seek(self.index_offset)
+            data = stream.read()
+        complete = data.rfind(b"\n") + 1
+        for line in data[:complete].split(b"\n")[:-1]:
+            fields = line.split()
+            if len(fields) > 0 and (
+                int(fields[0]) > log_size or
+                (len(fields) > 1 and int(fields[1]) not in self.nodes)
+            ):
+                # the log or the node file is not written yet
+                return min(int(fields[0]), log_size)
+            self.index.add_line(line)
+            self.index_offset += len(line) + 1
+        if complete < len(data):
+            return None
+        return log_size
+
+    def update_cache(self):
+        """
+        Stores the parsed nodes, tree and log index in the cache, if a cache
+        is used and the data wasn't loaded from it. Needs to be called after
+        collect_nodes, create_tree and collect_nodes_logs.
+        """
+        if (
+            self.cache is None or
+            self.cached is not None or
+            self.tree is None or
+            self.index is None
+        ):
+            return
+        self.cache.store(self.cache_key, self.nodes, self.tree, self.index)
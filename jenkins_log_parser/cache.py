@@ -0,0 +1,362 @@
+"""
+The cache module persisting the parsed data of a build, so a repeated run on
+the same build skips parsing the xml files and the log-index
+
+An entry is stored without pickle, so a cache directory shared with others
+can't smuggle in code: the array columns are written as raw bytes behind a
+JSON header, which holds the other columns, the tree and the sizes of the
+arrays.
+"""
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from jenkins_log_parser.logindex import LogIndex
+from jenkins_log_parser.noderecord import NodeRecord
+
+CACHE_VERSION = 4
+CACHE_SUFFIX = ".cache"
+CACHE_MAGIC = b"JLPC"
+# the magic bytes and the length of the JSON header
+_HEADER = struct.Struct("<4sL")
+# the array columns in the order of their bytes behind the header
+_ARRAY_COLUMNS = [
+    ("nodes", "node_no"),
+    ("nodes", "parent_id"),
+    ("nodes", "start_id"),
+    ("nodes", "start_time"),
+    ("index", "starts"),
+    ("index", "ends"),
+    ("index", "node_ids"),
+]
+# the errors of a truncated, foreign or edited cache file
+_DECODE_ERRORS = (
+    zlib.error,
+    struct.error,
+    ValueError,
+    TypeError,
+    KeyError,
+    IndexError,
+    AttributeError,
+)
+
+
+class BuildCache:
+    """
+    The BuildCache class stores the node table, the tree and the log index of
+    builds in a directory, one file per build keyed by the fingerprint of its
+    storage. The least recently used files are evicted when the cache grows
+    beyond its size limit.
+    """
+    def __init__(self, cache_dir, max_size: int = 1024 * 1024 * 1024):
+        """
+        Constructor
+
+        :param cache_dir: the directory of the cache files
+        :param max_size: the maximum size of all cache files in bytes
+            (optional)
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def _path(self, key) -> str:
+        """
+        Internal method providing the file path of a cache entry
+
+        :param key: the key of the entry
+        :returns: the path of the cache file
+        """
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    @staticmethod
+    def key_for(storage) -> str:
+        """
+        Provides the key of a build
+
+        :param storage: the Storage object of the build
+        :returns: the key as string
+        """
+        return "{}-{}".format(CACHE_VERSION, storage.fingerprint())
+
+    def load(self, key) -> dict:
+        """
+        Loads a cache entry and marks it as recently used
+
+        :param key: the key of the entry
+        :returns: a dictionary with the nodes as list of tuples of node
+            number, node file and NodeRecord, the tree and the LogIndex, or
+            None if there is no usable entry
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as stream:
+                data = stream.read()
+        except OSError:
+            return None
+        try:
+            entry = self._decode(zlib.decompress(data))
+        except _DECODE_ERRORS:
+            # an unreadable entry is a miss and is dropped for good
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        os.utime(path)
+        return entry
+
+    def store(self, key, nodes, tree, index):
+        """
+        Stores a cache entry and evicts the least recently used entries if
+        the size limit is exceeded
+
+        :param key: the key of the entry
+        :param nodes: the nodes dictionary of the BuildLog
+        :param tree: the tree of the BuildLog
+        :param index: the LogIndex of the BuildLog
+        """
+        data = zlib.compress(self._encode({
+            "nodes": self._pack_nodes(nodes),
+            "tree": tree,
+            "index": self._pack_index(index)
+        }))
+        handle, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(handle, "wb") as stream:
+            stream.write(data)
+        os.replace(temp_path, self._path(key))
+        self.evict()
+
+    @staticmethod
+    def _encode(data) -> bytes:
+        """
+        Internal method serializing the columns of an entry into the JSON
+        header and the bytes of the array columns
+
+        :param data: a dictionary with the packed nodes, the tree and the
+            packed index
+        :returns: the serialized entry
+        """
+        header = {
+            "version": CACHE_VERSION,
+            "byteorder": sys.byteorder,
+            "sizes": list(),
+            "tree": [
+                [parent_id, children]
+                for parent_id, children in data.get("tree").items()
+            ],
+            "lines": data.get("index").get("lines")
+        }
+        body = list()
+        for group, name in _ARRAY_COLUMNS:
+            column = data.get(group).get(name)
+            header.get("sizes").append(len(column))
+            body.append(column.tobytes())
+        nodes = data.get("nodes")
+        for name in [
+            "node_file", "node_class", "descriptor_id", "label",
+            "branch_name"
+        ]:
+            header.update({name: nodes.get(name)})
+        header.update({"extra_parent_ids": [
+            [node_no, list(parent_ids)]
+            for node_no, parent_ids in nodes.get("extra_parent_ids").items()
+        ]})
+        text = json.dumps(header).encode()
+        return b"".join(
+            [_HEADER.pack(CACHE_MAGIC, len(text)), text] + body
+        )
+
+    def _decode(self, data) -> dict:
+        """
+        Internal method reading an entry written by _encode
+
+        :param data: the serialized entry
+        :returns: a dictionary with the nodes, the tree and the LogIndex
+        """
+        magic, length = _HEADER.unpack_from(data)
+        if magic != CACHE_MAGIC:
+            raise ValueError("Not a cache file")
+        header = json.loads(data[_HEADER.size:_HEADER.size + length])
+        if header.get("version") != CACHE_VERSION:
+            raise ValueError(
+                "Unsupported cache version %s" % header.get("version"))
+        columns = {
+            "nodes": {
+                "extra_parent_ids": {
+                    int(node_no): tuple(int(i) for i in parent_ids)
+                    for node_no, parent_ids in header.get("extra_parent_ids")
+                }
+            },
+            "index": {"lines": int(header.get("lines"))}
+        }
+        position = _HEADER.size + length
+        sizes = header.get("sizes")
+        if len(sizes) != len(_ARRAY_COLUMNS):
+            raise ValueError("Wrong number of array columns")
+        for (group, name), size in zip(_ARRAY_COLUMNS, sizes):
+            column = array("q")
+            end = position + size * column.itemsize
+            if end > len(data):
+                raise ValueError("Truncated cache file")
+            column.frombytes(data[position:end])
+            if header.get("byteorder") != sys.byteorder:
+                column.byteswap()
+            columns.get(group).update({name: column})
+            position = end
+        nodes = columns.get("nodes")
+        for name in [
+            "node_file", "node_class", "descriptor_id", "label",
+            "branch_name"
+        ]:
+            nodes.update({name: header.get(name)})
+        if any(
+            len(column) != len(nodes.get("node_no"))
+            for column in nodes.values() if not isinstance(column, dict)
+        ) or any(
+            len(columns.get("index").get(name)) != len(
+                columns.get("index").get("starts"))
+            for name in ["ends", "node_ids"]
+        ):
+            raise ValueError("The columns differ in length")
+        return {
+            "nodes": self._unpack_nodes(nodes),
+            "tree": {
+                # the root of the tree is the key None
+                None if parent_id is None else int(parent_id): [
+                    int(child) for child in children
+                ]
+                for parent_id, children in header.get("tree")
+            },
+            "index": self._unpack_index(columns.get("index"))
+        }
+
+    def evict(self):
+        """
+        Removes the least recently used cache files until all of them fit
+        into the size limit
+        """
+        entries = list()
+        total = 0
+        with os.scandir(self.cache_dir) as scan:
+            for entry in scan:
+                if entry.name.endswith(CACHE_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append(
+                        (stat.st_mtime_ns, entry.path, stat.st_size)
+                    )
+                    total += stat.st_size
+        for _, path, size in sorted(entries):
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+
+    @staticmethod
+    def _pack_nodes(nodes) -> dict:
+        """
+        Internal method converting the nodes into columns
+
+        :param nodes: the nodes dictionary of the BuildLog
+        :returns: a dictionary of columns
+        """
+        columns = {
+            "node_no": array("q"),
+            "parent_id": array("q"),
+            "extra_parent_ids": dict(),
+            "start_id": array("q"),
+            "start_time": array("q"),
+            "node_file": list(),
+            "node_class": list(),
+            "descriptor_id": list(),
+            "label": list(),
+            "branch_name": list()
+        }
+        for node_no in sorted(nodes.keys()):
+            node = nodes.get(node_no)
+            record = node.get_record()
+            columns.get("node_no").append(node_no)
+            columns.get("parent_id").append(
+                record.parent_id if record.parent_id is not None else -1
+            )
+            if record.extra_parent_ids is not None:
+                columns.get("extra_parent_ids").update({
+                    node_no: record.extra_parent_ids
+                })
+            columns.get("start_id").append(
+                record.start_id if record.start_id is not None else -1
+            )
+            columns.get("start_time").append(
+                record.start_time if record.start_time is not None else -1
+            )
+            columns.get("node_file").append(node.node_file)
+            columns.get("node_class").append(record.node_class)
+            columns.get("descriptor_id").append(record.descriptor_id)
+            columns.get("label").append(record.label)
+            columns.get("branch_name").append(record.branch_name)
+        return columns
+
+    @staticmethod
+    def _unpack_nodes(columns) -> list:
+        """
+        Internal method converting the columns back into node data
+
+        :param columns: the dictionary of columns
+        :returns: a list of tuples of node number, node file and NodeRecord
+        """
+        nodes = list()
+        for i, node_no in enumerate(columns.get("node_no")):
+            parent_id = columns.get("parent_id")[i]
+            start_id = columns.get("start_id")[i]
+            start_time = columns.get("start_time")[i]
+            nodes.append((
+                node_no,
+                columns.get("node_file")[i],
+                NodeRecord(
+                    node_class=columns.get("node_class")[i],
+                    descriptor_id=columns.get("descriptor_id")[i],
+                    parent_id=parent_id if parent_id >= 0 else None,
+                    label=columns.get("label")[i],
+                    branch_name=columns.get("branch_name")[i],
+                    extra_parent_ids=columns.get("extra_parent_ids").get(
+                        node_no
+                    ),
+                    start_id=start_id if start_id >= 0 else None,
+                    start_time=start_time if start_time >= 0 else None
+                )
+            ))
+        return nodes
+
+    @staticmethod
+    def _pack_index(index) -> dict:
+        """
+        Internal method converting the LogIndex into columns
+
+        :param index: the LogIndex
+        :returns: a dictionary of columns
+        """
+        return {
+            "starts": index.starts,
+            "ends": index.ends,
+            "node_ids": index.node_ids,
+            "lines": index.lines
+        }
+
+    @staticmethod
+    def _unpack_index(columns) -> LogIndex:
+        """
+        Internal method converting the columns back into a LogIndex
+
+        :param columns: the dictionary of columns
+        :returns: the LogIndex
+        """
+        index = LogIndex()
+        index.starts = columns.get("starts")
+        index.ends = columns.get("ends")
+        index.node_ids = columns.get("node_ids")
+        index.lines = columns.get("lines")
+        return index
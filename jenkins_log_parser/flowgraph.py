@@ -0,0 +1,273 @@
+"""
+The flowgraph module holding all edges of the workflow nodes, the ones of
+join nodes with several parents included, and attributing the nodes to
+stages and parallel branches along the block structure of the flow
+"""
+from array import array
+from collections import deque
+from jenkins_log_parser.noderecord import LABEL_PATH, BRANCH_PATH
+
+START_NODE_SUFFIX = "StepStartNode"
+
+
+class FlowGraph:
+    """
+    The FlowGraph class stores the parent and child edges of the nodes as
+    compressed sparse rows over dense node indices: the edges of the node
+    with index i are targets[offsets[i]:offsets[i + 1]]. A topological order
+    is computed once, afterwards the enclosing block, stage and parallel
+    branch of every node are set in one pass over this order.
+
+    A node opening a block (a StepStartNode) encloses its children, a node
+    closing a block (with a startId) is outside of it again and has the
+    scope of its start node. A join node without startId keeps the stage or
+    branch only if all of its parents agree on it.
+
+    The class provides the same queries as the AncestorIndex, so it can be
+    handed to the TreeWalker and the LogProcessor instead of it. Ancestor
+    checks follow the chain of enclosing blocks instead of the parent ids.
+    """
+    def __init__(self, nodes):
+        """
+        Constructor, building the adjacency and the block structure
+
+        :param nodes: The nodes how the class BuildLog is providing them
+        """
+        self.nodes = nodes
+        self.ids = array("q", sorted(nodes.keys()))
+        self.positions = {node_no: i for i, node_no in enumerate(self.ids)}
+        self.parent_offsets = array("q")
+        self.parent_targets = array("q")
+        self.child_offsets = array("q")
+        self.child_targets = array("q")
+        self.order = array("q")
+        self.blocks = array("q")
+        self.depths = array("q")
+        self.stages = list()
+        self.branches = list()
+        self.orphans = set()
+        self._build_edges()
+        self._build_order()
+        self._build_blocks()
+
+    def _build_edges(self):
+        """
+        Internal method filling the parent and the child rows, parent ids
+        without a node are collected as orphans
+        """
+        counts = array("q", bytes(8 * (len(self.ids) + 1)))
+        self.parent_offsets.append(0)
+        for node_no in self.ids:
+            for parent_id in self.nodes.get(node_no).get_parent_ids():
+                parent = self.positions.get(parent_id)
+                if parent is None:
+                    self.orphans.add(parent_id)
+                    continue
+                self.parent_targets.append(parent)
+                counts[parent + 1] += 1
+            self.parent_offsets.append(len(self.parent_targets))
+        for i in range(len(self.ids)):
+            counts[i + 1] += counts[i]
+        self.child_offsets = array("q", counts)
+        self.child_targets = array("q", bytes(8 * len(self.parent_targets)))
+        for i in range(len(self.ids)):
+            for j in range(self.parent_offsets[i], self.parent_offsets[i + 1]):
+                parent = self.parent_targets[j]
+                self.child_targets[counts[parent]] = i
+                counts[parent] += 1
+
+    def _build_order(self):
+        """
+        Internal method computing the topological order with Kahn's
+        algorithm, nodes which are ready at the same time keep the order of
+        their numbers
+        """
+        pending = array("q", (
+            self.parent_offsets[i + 1] - self.parent_offsets[i]
+            for i in range(len(self.ids))
+        ))
+        ready = deque(i for i in range(len(self.ids)) if pending[i] == 0)
+        while len(ready) > 0:
+            i = ready.popleft()
+            self.order.append(i)
+            for j in range(self.child_offsets[i], self.child_offsets[i + 1]):
+                child = self.child_targets[j]
+                pending[child] -= 1
+                if pending[child] == 0:
+                    ready.append(child)
+        if len(self.order) < len(self.ids):
+            raise ValueError(
+                "The parent ids of the nodes contain a cycle, %d nodes are\
+ part of it or depend on it." % (len(self.ids) - len(self.order)))
+
+    def _build_blocks(self):
+        """
+        Internal method setting the enclosing block, the depth, the stage and
+        the branch of every node in one pass over the topological order
+        """
+        count = len(self.ids)
+        self.blocks = array("q", [-1]) * count
+        self.depths = array("q", [1]) * count
+        self.stages = [None] * count
+        self.branches = [None] * count
+        for i in self.order:
+            node = self.nodes.get(self.ids[i])
+            start = self.positions.get(node.get_start_id())
+            first = self.parent_offsets[i]
+            last = self.parent_offsets[i + 1]
+            if start is not None:
+                # the node closes the block, the scope is the one outside
+                self.blocks[i] = self.blocks[start]
+                self.depths[i] = self.depths[start]
+                self.stages[i] = self.stages[start]
+                self.branches[i] = self.branches[start]
+                continue
+            if first == last:
+                continue
+            parent = self.parent_targets[first]
+            block, depth, stage, branch = self._inherited(parent)
+            for j in range(first + 1, last):
+                # a join node without start node
+                other = self._inherited(self.parent_targets[j])
+                if other[2] != stage:
+                    stage = None
+                if other[3] != branch:
+                    branch = None
+            self.blocks[i] = block
+            self.depths[i] = depth
+            self.stages[i] = stage
+            self.branches[i] = branch
+
+    def _inherited(self, parent) -> tuple:
+        """
+        Internal method determining the scope a node gets from one of its
+        parents
+
+        :param parent: the index of the parent
+        :returns: a tuple of the index of the enclosing block, the depth, the
+            stage name and the branch name
+        """
+        node = self.nodes.get(self.ids[parent])
+        stage = self.stages[parent]
+        branch = self.branches[parent]
+        if not node.get_node_class().endswith(START_NODE_SUFFIX):
+            return self.blocks[parent], self.depths[parent], stage, branch
+        step = node.get_step()
+        if step == "StageStep":
+            label = node.get_path_text(LABEL_PATH)
+            if label is not None:
+                stage = label
+        elif step == "ParallelStep":
+            branch_name = node.get_path_text(BRANCH_PATH)
+            if branch_name is not None:
+                branch = branch_name
+        return parent, self.depths[parent] + 1, stage, branch
+
+    def __contains__(self, node_no) -> bool:
+        """
+        Checks if a node is part of the graph
+
+        :param node_no: the node number
+        :returns: True or False
+        """
+        return node_no in self.positions
+
+    def __len__(self) -> int:
+        """
+        The number of nodes
+
+        :returns: the number of nodes
+        """
+        return len(self.ids)
+
+    def get_parents(self, node_no) -> list:
+        """
+        The parents of a node which are part of the graph
+
+        :param node_no: the node number
+        :returns: a list of node numbers
+        """
+        i = self.positions.get(node_no)
+        return [
+            self.ids[j] for j in self.parent_targets[
+                self.parent_offsets[i]:self.parent_offsets[i + 1]
+            ]
+        ]
+
+    def get_children(self, node_no) -> list:
+        """
+        The children of a node in increasing order
+
+        :param node_no: the node number
+        :returns: a list of node numbers
+        """
+        i = self.positions.get(node_no)
+        return [
+            self.ids[j] for j in self.child_targets[
+                self.child_offsets[i]:self.child_offsets[i + 1]
+            ]
+        ]
+
+    def topological_order(self) -> list:
+        """
+        The node numbers in an order where every node follows its parents
+
+        :returns: a list of node numbers
+        """
+        return [self.ids[i] for i in self.order]
+
+    def get_block(self, node_no) -> int:
+        """
+        The start node of the innermost block enclosing a node
+
+        :param node_no: the node number
+        :returns: the node number of the start node or None
+        """
+        block = self.blocks[self.positions.get(node_no)]
+        return self.ids[block] if block >= 0 else None
+
+    def is_ancestor(self, probable_parent, node_no) -> bool:
+        """
+        Boolean method to check if a node opens one of the blocks enclosing
+        another node
+
+        :param probable_parent: the node number of the probable parent
+        :param node_no: the node number to check
+        :returns: True or False
+        """
+        parent = self.positions.get(probable_parent)
+        if parent is None:
+            return False
+        block = self.blocks[self.positions.get(node_no)]
+        while block >= 0:
+            if block == parent:
+                return True
+            block = self.blocks[block]
+        return False
+
+    def get_depth(self, node_no) -> int:
+        """
+        The number of blocks enclosing a node plus one
+
+        :param node_no: the node number
+        :returns: the depth in integer
+        """
+        return self.depths[self.positions.get(node_no)]
+
+    def get_stage(self, node_no) -> str:
+        """
+        The name of the nearest enclosing stage of a node
+
+        :param node_no: the node number
+        :returns: the name of the stage or None
+        """
+        return self.stages[self.positions.get(node_no)]
+
+    def get_branch(self, node_no) -> str:
+        """
+        The name of the nearest enclosing parallel branch of a node
+
+        :param node_no: the node number
+        :returns: the name of the parallel branch or None
+        """
+        return self.branches[self.positions.get(node_no)]
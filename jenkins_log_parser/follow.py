@@ -0,0 +1,55 @@
+"""
+The follow module writing the logs of a Jenkins build while the build is
+still running
+"""
+import time
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+
+END_NODE_CLASS = "cps.n.FlowEndNode"
+
+
+def follow_build(
+    log_location,
+    target_dir,
+    interval: float = 1.0,
+    lazy: bool = False,
+    sleep=time.sleep,
+    extractor: str = "etree"
+) -> int:
+    """
+    Follows a growing build directory and appends its output to the log
+    files in the target directory. The directory is polled every interval
+    seconds and only the new node files and log-index lines are processed.
+    After the FlowEndNode showed up, the directory is polled a last time.
+
+    :param log_location: the build directory
+    :param target_dir: the target directory for the produced log files
+    :param interval: the seconds between two polls (optional)
+    :param lazy: create the LogNode objects in lazy mode (optional)
+    :param sleep: the function waiting between two polls (optional)
+    :param extractor: the name of the extractor of the xml files (optional)
+    :returns: the number of polls
+    """
+    build_log = BuildLog(log_location, lazy=lazy, extractor=extractor)
+    log_proc = LogProcessor(target_dir)
+    polls = 0
+    finished = False
+    try:
+        while True:
+            start = time.monotonic()
+            changes = build_log.refresh()
+            polls += 1
+            log_proc.append(
+                build_log.nodes, build_log.tree, changes, build_log.ancestry
+            )
+            if finished:
+                return polls
+            finished = any(
+                build_log.nodes.get(node_no).get_node_class() ==
+                END_NODE_CLASS
+                for node_no in changes.get("nodes")
+            )
+            sleep(max(0.0, interval - (time.monotonic() - start)))
+    finally:
+        build_log.close()
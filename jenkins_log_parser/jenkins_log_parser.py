@@ -5,36 +5,88 @@ jenkins_log_processor Main module
 """
 
 import argparse
+import atexit
 import os
-from jenkins_log_parser.buildlog import BuildLog
+import sys
+import time
+from jenkins_log_parser.batch import (
+    expand_locations, build_targets, run_batch, format_summary,
+    load_build, query_build
+)
+from jenkins_log_parser.follow import follow_build
 from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.outputcodec import CODECS, create_compressor
+from jenkins_log_parser.profiling import Profiler, add_hook
+from jenkins_log_parser.rangecopy import COPY_METHODS, MAX_OPEN_FILES
+from jenkins_log_parser.scanner import EXTRACTORS, cross_check
+from jenkins_log_parser.sidecar import (
+    SIDECAR_NAME, SidecarIndex, write_sidecar
+)
+from jenkins_log_parser.storage import open_storage
 
 
-def main():
+def print_profile(profiler, report_format):
     """
-    Main function, parsing arguments and calling the stuff.
+    Prints the report of the measured phases to stderr
+
+    :param profiler: the Profiler registered as hook
+    :param report_format: "text" or "json"
     """
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "log_location",
-        type=str
-    )
-    parser.add_argument(
-        "-t", "--target",
-        type=str,
-        action="store",
-        default=os.getcwd()
-    )
-    args = parser.parse_args()
+    if report_format == "json":
+        print(profiler.format_json(), file=sys.stderr)
+    else:
+        print(profiler.format_text(), file=sys.stderr)
 
-    target_dir = os.path.realpath(args.target)
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
 
-    build_log = BuildLog(args.log_location)
-    nodes = build_log.collect_nodes()
-    tree = build_log.create_tree()
-    build_log.collect_nodes_logs()
+def query_index(location, args) -> int:
+    """
+    Answers a query out of the sidecar index of a processed build
+
+    :param location: the sidecar file or the target directory containing it
+    :param args: the parsed arguments with the node, stage, branch and step
+        options
+    :returns: the exit code
+    """
+    if os.path.isdir(location):
+        location = os.path.join(location, SIDECAR_NAME)
+    sidecar = SidecarIndex(location)
+    try:
+        if args.node is not None:
+            if not sidecar.write_node(args.node, sys.stdout.buffer):
+                print("Unknown node %d" % args.node, file=sys.stderr)
+                return 1
+        elif args.step is not None:
+            for node in sidecar.find_nodes(args.stage, args.branch, args.step):
+                print("{} {} {} {} {} {}".format(
+                    node.get("node_id"),
+                    node.get("step"),
+                    node.get("stage"),
+                    node.get("branch"),
+                    node.get("start_time"),
+                    node.get("size")
+                ))
+        elif args.stage is not None or args.branch is not None:
+            sidecar.write_entry(sys.stdout.buffer, args.stage, args.branch)
+        else:
+            for entry in sidecar.list_entries():
+                print("{} {}".format(entry.get("path"), entry.get("nodes")))
+        sys.stdout.flush()
+        sys.stdout.buffer.flush()
+    finally:
+        sidecar.close()
+    return 0
+
+
+def process_single(build_log, target_dir, args):
+    """
+    Processes the loaded log of a single build into the target directory
+
+    :param build_log: the BuildLog with the nodes, tree and log-index read
+    :param target_dir: the target directory for the produced log files
+    :param args: the parsed command line arguments
+    """
+    nodes = build_log.nodes
+    tree = build_log.tree
     # walker = TreeWalker(nodes, tree)
     # current = walker.next()
     # while current is not None:
@@ -61,9 +113,332 @@ def main():
     #     ))
     #     current = walker.next()
 
-    log_proc = LogProcessor(target_dir)
+    log_proc = LogProcessor(
+        target_dir,
+        single_pass=args.single_pass,
+        jobs=args.jobs,
+        copy_method=args.copy_method,
+        max_open_files=args.max_open_files,
+        codec=args.codec,
+        level=args.level
+    )
+
+    log_proc.process(
+        nodes,
+        tree,
+        build_log.create_graph() if args.graph else build_log.ancestry
+    )
+    if args.index:
+        write_sidecar(
+            os.path.join(target_dir, SIDECAR_NAME), build_log, log_proc
+        )
+
+
+def main():
+    """
+    Main function, parsing arguments and calling the stuff.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "log_location",
+        type=str,
+        nargs="+",
+        help="build directories, zip archives, directories containing them "
+             "or glob patterns"
+    )
+    parser.add_argument(
+        "-t", "--target",
+        type=str,
+        action="store",
+        default=os.getcwd()
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="only keep the needed fields of the workflow node xml files in "
+             "memory"
+    )
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="write all log files in a single traversal of the tree"
+    )
+    parser.add_argument(
+        "--max-open-files",
+        type=int,
+        action="store",
+        default=MAX_OPEN_FILES,
+        help="maximum number of log files kept open at the same time with "
+             "--single-pass, the others are opened again when needed"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        action="store",
+        default=1,
+        help="number of worker threads writing the log files"
+    )
+    parser.add_argument(
+        "--copy-method",
+        choices=COPY_METHODS,
+        default="mmap",
+        help="write the log ranges out of the memory mapped log or let the "
+             "kernel copy them with os.copy_file_range or os.sendfile, "
+             "which pays off on file systems like XFS, Btrfs or NFS 4.2"
+    )
+    parser.add_argument(
+        "--codec",
+        choices=list(CODECS.keys()),
+        default="none",
+        help="compress the log files while they are written, zstd needs "
+             "the zstandard package, with --jobs the files are compressed "
+             "on the worker threads"
+    )
+    parser.add_argument(
+        "--level",
+        type=int,
+        action="store",
+        default=None,
+        help="compression level of the codec"
+    )
+    parser.add_argument(
+        "-p", "--processes",
+        type=int,
+        action="store",
+        default=1,
+        help="number of worker processes handling multiple builds"
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        action="store",
+        default=None,
+        help="directory of a cache for the parsed builds"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        action="store",
+        default=1024,
+        help="maximum size of the cache in MiB"
+    )
+    parser.add_argument(
+        "--io-concurrency",
+        type=int,
+        action="store",
+        default=0,
+        help="read up to this number of workflow node files concurrently, "
+             "e.g. on network file systems"
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        action="store",
+        default=0,
+        help="parse the workflow node files on this number of worker "
+             "processes"
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=sorted(EXTRACTORS.keys()),
+        default="etree",
+        help="extract the needed fields of the workflow node xml files with "
+             "ElementTree or with a fast byte scan, which implies --lazy"
+    )
+    parser.add_argument(
+        "--check-extractor",
+        action="store_true",
+        help="only compare the byte scan with ElementTree on all workflow "
+             "node xml files of the builds"
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="follow a running build directory and append to the log files "
+             "until the build has finished"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        action="store",
+        default=1.0,
+        help="seconds between two polls of the build directory in follow "
+             "mode"
+    )
+    parser.add_argument(
+        "--graph",
+        action="store_true",
+        help="attribute the nodes to stages and parallel branches along the "
+             "blocks of the flow graph, join nodes included, instead of "
+             "along their first parent"
+    )
+    parser.add_argument(
+        "--stage",
+        type=str,
+        action="store",
+        default=None,
+        help="only write the log of this stage to stdout"
+    )
+    parser.add_argument(
+        "--branch",
+        type=str,
+        action="store",
+        default=None,
+        help="only write the log of this parallel branch to stdout"
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="write a sidecar index %s into the target directory" %
+             SIDECAR_NAME
+    )
+    parser.add_argument(
+        "--from-index",
+        action="store_true",
+        help="answer the query out of the sidecar index given as location, "
+             "the file or the target directory containing it"
+    )
+    parser.add_argument(
+        "--node",
+        type=int,
+        action="store",
+        default=None,
+        help="with --from-index write the log of this node to stdout"
+    )
+    parser.add_argument(
+        "--step",
+        type=str,
+        action="store",
+        default=None,
+        help="with --from-index list the nodes of this step type, e.g. "
+             "ShellStep, within --stage and --branch"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["text", "json"],
+        default=None,
+        help="print the wall and CPU time, counts and peak memory of every "
+             "processing phase to stderr"
+    )
+    args = parser.parse_args()
+    try:
+        create_compressor(args.codec, args.level)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.profile is not None:
+        profiler = Profiler()
+        add_hook(profiler)
+        atexit.register(print_profile, profiler, args.profile)
+
+    target_dir = os.path.realpath(args.target)
+    if not os.path.exists(target_dir):
+        os.makedirs(target_dir)
+
+    if args.check_extractor:
+        mismatches = 0
+        for build in expand_locations(args.log_location):
+            storage = open_storage(build)
+            try:
+                result = cross_check(storage)
+            finally:
+                storage.close()
+            for node_file, expected, scanned in result.get("mismatches"):
+                print("MISMATCH {}: {} != {}".format(
+                    node_file, expected, scanned
+                ))
+            print("{}: {} files, {} fallbacks, {} mismatches".format(
+                build,
+                result.get("checked"),
+                len(result.get("fallbacks")),
+                len(result.get("mismatches"))
+            ))
+            mismatches += len(result.get("mismatches"))
+        if mismatches > 0:
+            sys.exit(1)
+        return
+
+    if args.from_index:
+        if len(args.log_location) != 1:
+            parser.error("--from-index needs exactly one sidecar index")
+        try:
+            sys.exit(query_index(args.log_location[0], args))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+
+    if args.follow:
+        if len(args.log_location) != 1 or not os.path.isdir(
+            args.log_location[0]
+        ):
+            parser.error("--follow needs exactly one build directory")
+        if args.graph:
+            parser.error("--graph is not supported with --follow")
+        if args.codec != "none":
+            parser.error("--codec is not supported with --follow")
+        try:
+            follow_build(
+                args.log_location[0],
+                target_dir,
+                interval=args.interval,
+                lazy=args.lazy,
+                extractor=args.extractor
+            )
+        except KeyboardInterrupt:
+            pass
+        return
+
+    options = {
+        "lazy": args.lazy,
+        "single_pass": args.single_pass,
+        "jobs": args.jobs,
+        "copy_method": args.copy_method,
+        "max_open_files": args.max_open_files,
+        "codec": args.codec,
+        "level": args.level,
+        "cache_dir": args.cache,
+        "cache_size": args.cache_size * 1024 * 1024,
+        "io_concurrency": args.io_concurrency,
+        "parse_workers": args.parse_workers,
+        "extractor": args.extractor,
+        "graph": args.graph,
+        "index": args.index
+    }
+    builds = expand_locations(args.log_location)
+    if args.stage is not None or args.branch is not None:
+        if len(builds) != 1:
+            parser.error("--stage and --branch need exactly one build")
+        try:
+            query_build(
+                builds[0],
+                sys.stdout.buffer,
+                stage=args.stage,
+                branch=args.branch,
+                options=options
+            )
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+        sys.stdout.buffer.flush()
+        return
+    if builds != args.log_location or len(builds) > 1:
+        # batch mode, every build gets its own target subdirectory
+        start = time.perf_counter()
+        results = run_batch(
+            builds,
+            build_targets(builds, target_dir),
+            args.processes,
+            options
+        )
+        print(format_summary(results, time.perf_counter() - start))
+        if any(result.get("error") is not None for result in results):
+            sys.exit(1)
+        return
 
-    log_proc.process(nodes, tree)
+    build_log = load_build(builds[0], options)
+    try:
+        process_single(build_log, target_dir, args)
+    finally:
+        build_log.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,207 @@
+"""
+The logindex module parsing the log-index of a Jenkins build into compact
+array columns
+"""
+from array import array
+
+
+class LogIndex:
+    """
+    The LogIndex class holds all log ranges of a build in three array
+    columns (start, end, node id) and provides a view per node.
+
+    Each line of the log-index is either "<offset> <node id>", starting a
+    range of the node, or a bare "<offset>", starting output that belongs to
+    no node. Every line ends the range started by the line before.
+    """
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.starts = array("q")
+        self.ends = array("q")
+        self.node_ids = array("q")
+        self.pending = None
+        self.lines = 0
+        self.offsets = None
+        self.order = None
+
+    def __len__(self) -> int:
+        """
+        The number of ranges in the index
+
+        :returns: the number of ranges
+        """
+        return len(self.starts)
+
+    def parse(self, stream):
+        """
+        Parses a log-index line by line without loading it completely
+
+        :param stream: a binary or text file object of the log-index
+        """
+        for line in stream:
+            self.add_line(line)
+
+    def add_line(self, line):
+        """
+        Adds one line of the log-index
+
+        :param line: the line as bytes or string
+        """
+        fields = line.split()
+        if len(fields) == 0:
+            return
+        self.lines += 1
+        offset = int(fields[0])
+        if self.pending is not None:
+            self._append(self.pending[0], offset, self.pending[1])
+        if len(fields) > 1:
+            self.pending = (offset, int(fields[1]))
+        else:
+            self.pending = None
+
+    def finish(self, log_size: int):
+        """
+        Closes the trailing range of the index, which lasts until the end of
+        the log
+
+        :param log_size: the size of the raw log in bytes
+        """
+        if self.pending is not None and self.pending[0] < log_size:
+            self._append(self.pending[0], log_size, self.pending[1])
+        self.pending = None
+
+    def advance(self, log_size: int):
+        """
+        Closes the pending range at the current end of a log which is still
+        growing. The range of the node is continued there by a new pending
+        range, which is closed by the next line or advance call.
+
+        :param log_size: the current size of the raw log in bytes
+        """
+        if self.pending is not None and self.pending[0] < log_size:
+            self._append(self.pending[0], log_size, self.pending[1])
+            self.pending = (log_size, self.pending[1])
+
+    def _append(self, start: int, end: int, node_id: int):
+        """
+        Internal method appending a range to the columns
+
+        :param start: the start byte number
+        :param end: the end byte number
+        :param node_id: the node number the range belongs to
+        """
+        self.starts.append(start)
+        self.ends.append(end)
+        self.node_ids.append(node_id)
+        self.offsets = None
+        self.order = None
+
+    def _group(self):
+        """
+        Internal method grouping the ranges by node with a counting sort, so
+        the ranges of a node keep their order of the log-index
+        """
+        size = max(self.node_ids) + 2 if len(self.node_ids) > 0 else 1
+        offsets = array("q", bytes(8 * size))
+        for node_id in self.node_ids:
+            offsets[node_id + 1] += 1
+        for i in range(1, size):
+            offsets[i] += offsets[i - 1]
+        positions = array("q", offsets)
+        order = array("q", bytes(8 * len(self.node_ids)))
+        for i, node_id in enumerate(self.node_ids):
+            order[positions[node_id]] = i
+            positions[node_id] += 1
+        self.offsets = offsets
+        self.order = order
+
+    def get_node_ids(self) -> list:
+        """
+        The node numbers which have at least one range
+
+        :returns: a sorted list of node numbers
+        """
+        return sorted(set(self.node_ids))
+
+    def get_ranges(self, node_id: int):
+        """
+        The ranges of a node
+
+        :param node_id: the node number
+        :returns: an IndexView over the ranges of the node
+        """
+        if self.order is None:
+            self._group()
+        if node_id + 1 >= len(self.offsets):
+            return IndexView(self, 0, 0)
+        return IndexView(
+            self, self.offsets[node_id], self.offsets[node_id + 1]
+        )
+
+
+class IndexView:
+    """
+    The IndexView class is a read-only view on the ranges of a single node
+    in the LogIndex. Items are provided as dictionaries with start and end
+    like the LogNode indices.
+    """
+    __slots__ = ("index", "first", "last")
+
+    def __init__(self, index, first: int, last: int):
+        """
+        Constructor
+
+        :param index: the LogIndex
+        :param first: the first position in the grouped order of the index
+        :param last: the position after the last one in the grouped order
+        """
+        self.index = index
+        self.first = first
+        self.last = last
+
+    def __len__(self) -> int:
+        """
+        The number of ranges of the node
+
+        :returns: the number of ranges
+        """
+        return self.last - self.first
+
+    def __getitem__(self, i: int) -> dict:
+        """
+        Provides one range of the node
+
+        :param i: the number of the range
+        :returns: a dictionary with start and end of the range
+        """
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("index view out of range")
+        position = self.index.order[self.first + i]
+        return {
+            "start": self.index.starts[position],
+            "end": self.index.ends[position]
+        }
+
+    def __iter__(self):
+        """
+        Iterates over the ranges of the node as dictionaries
+        """
+        for i in range(len(self)):
+            yield self[i]
+
+    def ranges(self) -> list:
+        """
+        The ranges of the node as tuples
+
+        :returns: a list of (start, end) tuples
+        """
+        starts = self.index.starts
+        ends = self.index.ends
+        return [
+            (starts[position], ends[position])
+            for position in self.index.order[self.first:self.last]
+        ]
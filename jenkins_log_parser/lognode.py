@@ -3,6 +3,12 @@ The LogNode module representing a node in the workflow process of jenkins
 """
 import xml.etree.ElementTree as ET
 import glob
+import io
+from jenkins_log_parser.logindex import IndexView
+from jenkins_log_parser.readplan import merge_adjacent
+from jenkins_log_parser.noderecord import (
+    parse_record, record_from_root, TIMING_PATH
+)
 
 
 class LogNode:
@@ -10,23 +16,64 @@ class LogNode:
     The LogNode class provides information directly out of the xml
     structure
     """
-    def __init__(self, node_no: int, start: int = None, end: int = None):
+    def __init__(
+        self,
+        node_no: int,
+        start: int = None,
+        end: int = None,
+        node_file: str = None,
+        lazy: bool = False,
+        storage=None,
+        record=None,
+        content: bytes = None,
+        extractor=None
+    ):
         """
         Constructor
 
         :param node_no: node number
         :param start: the start byte of this node number in the log (optional)
         :param end: the end byte of this node number in the log (optional)
+        :param node_file: the already resolved path of the xml node file
+            (optional, searched in the current directory if not given)
+        :param lazy: only extract the needed fields into a NodeRecord instead
+            of keeping the whole xml tree, other xml paths are parsed on
+            demand (optional)
+        :param storage: the Storage object the node file and the log file are
+            read from (optional, by default they are plain files)
+        :param record: an already extracted NodeRecord of the node, the node
+            file is then not parsed and the node behaves like in lazy mode
+            (optional)
+        :param content: the already read content of the node file, which is
+            then parsed instead of opening the file (optional)
+        :param extractor: the function extracting the NodeRecord out of a
+            binary file object in lazy mode (optional, by default
+            parse_record)
         """
         self.node_no = node_no
-        files = glob.glob(
-            "**/{}.xml".format(self.node_no),
-            recursive=True
-        )
-        self.node_file = files[0]
-        self.root = ET.parse(self.node_file).getroot()
+        if node_file is None:
+            files = glob.glob(
+                "**/{}.xml".format(self.node_no),
+                recursive=True
+            )
+            node_file = files[0]
+        self.node_file = node_file
+        self.storage = storage
+        self.root = None
+        self.record = record
+        self.path_cache = None
+        if self.record is None:
+            with (
+                io.BytesIO(content) if content is not None
+                else self._open(self.node_file)
+            ) as stream:
+                if lazy:
+                    self.record = (extractor or parse_record)(stream)
+                else:
+                    self.root = ET.parse(stream).getroot()
         self.parent_id = self.get_parent_id()
         self.log_file = None
+        self.log_view = None
         self.indices = list()
         if start is not None and end is not None:
             self.indices.append({
@@ -34,6 +81,17 @@ class LogNode:
                 "end": end
             })
 
+    def _open(self, name):
+        """
+        Internal method opening a file either out of the storage or directly
+
+        :param name: the name of the file
+        :returns: a binary file object
+        """
+        if self.storage is not None:
+            return self.storage.open(name)
+        return open(name, "rb")
+
     def __repr__(self) -> str:
         """
         Some string representation
@@ -42,14 +100,41 @@ class LogNode:
         """
         return "{}".format(self.node_no)
 
-    def set_log_file(self, log_file):
+    def set_log_file(self, log_file, log_view: memoryview = None):
         """
         Method to set the log file needed for extracting the log snipped this
         workflow node represents
 
         :param log_file: the log file
+        :param log_view: a memoryview over the whole memory mapped log file,
+            which is used instead of opening the log file (optional)
         """
         self.log_file = log_file
+        self.log_view = log_view
+
+    def get_log_views(self) -> list:
+        """
+        Extracts the defined log snippets as bytes without decoding them. With
+        a memory mapped log file the snippets are memoryview slices without
+        copying the data. Snippets directly following each other in the log
+        are extracted at once.
+
+        :returns: A list of bytes like objects, one per run of adjacent
+            start and end bytes
+        """
+        if self.log_view is not None:
+            return [
+                self.log_view[start:end]
+                for start, end in merge_adjacent(self.get_ranges())
+            ]
+        views = list()
+        if len(self.indices) == 0:
+            return views
+        with self._open(self.log_file) as stream:
+            for start, end in merge_adjacent(self.get_ranges()):
+                stream.seek(start)
+                views.append(stream.read(end - start))
+        return views
 
     def get_log(self) -> str:
         """
@@ -60,14 +145,9 @@ class LogNode:
         """
         if len(self.indices) == 0:
             return None
-        log = ""
-        with open(self.log_file, "rb") as stream:
-            for index in self.indices:
-                stream.seek(index.get("start"))
-                log += stream.read(
-                    index.get("end") - index.get("start")
-                ).decode()
-        return log
+        return "".join(
+            str(view, "utf-8") for view in self.get_log_views()
+        )
 
     def get_log_part(self, start: int, end: int):
         """
@@ -77,12 +157,36 @@ class LogNode:
         :param end: the end byte number
         :returns: the log snippet as string
         """
+        if self.log_view is not None:
+            return str(self.log_view[start:end], "utf-8")
         log = None
-        with open(self.log_file, "rb") as stream:
+        with self._open(self.log_file) as stream:
             stream.seek(start)
             log = stream.read(end-start).decode()
         return log
 
+    def get_ranges(self) -> list:
+        """
+        The start and end byte positions of the node's log snippets
+
+        :returns: a list of (start, end) tuples
+        """
+        if isinstance(self.indices, IndexView):
+            return self.indices.ranges()
+        return [
+            (index.get("start"), index.get("end")) for index in self.indices
+        ]
+
+    def set_indices(self, indices):
+        """
+        Replaces the start and end byte positions, e.g. with the view of the
+        node on the LogIndex
+
+        :param indices: a list of dictionaries with start and end or an
+            IndexView
+        """
+        self.indices = indices
+
     def add_index(self, start: int, end: int):
         """
         Set the internal start and end byte position
@@ -90,17 +194,32 @@ class LogNode:
         :param start: the start byte number
         :param end: the end byte number
         """
+        if isinstance(self.indices, IndexView):
+            self.indices = list(self.indices)
         self.indices.append({
             "start": start,
             "end": end
         })
 
+    def get_record(self):
+        """
+        Provides the extracted fields of the node as NodeRecord, also when the
+        node keeps the whole xml tree
+
+        :returns: the NodeRecord of the node
+        """
+        if self.record is not None:
+            return self.record
+        return record_from_root(self.root)
+
     def get_node_class(self) -> str:
         """
         Retrieves the node's class attribute
 
         :returns: the node's class attribute as string
         """
+        if self.record is not None:
+            return self.record.node_class
         node = self.root.find("node")
         return node.get("class")
 
@@ -110,6 +229,8 @@ class LogNode:
 
         :returns: the descriptorId as string
         """
+        if self.record is not None:
+            return self.record.descriptor_id
         node = self.root.find("node")
         if node is not None:
             desc = node.find("descriptorId")
@@ -135,17 +256,42 @@ class LogNode:
         :param path: the path to the xml element
         :returns: the content of the xml element as string
         """
+        if self.record is not None:
+            return self._get_lazy_path_text(path)
         target = self.root.find(path)
         if target is not None:
             return target.text
         return None
 
+    def _get_lazy_path_text(self, path) -> str:
+        """
+        Returns the content of a xml path element out of the record or parses
+        the xml file again for paths the record doesn't cover
+
+        :param path: the path to the xml element
+        :returns: the content of the xml element as string
+        """
+        covered, text = self.record.get_path_text(path)
+        if covered:
+            return text
+        if self.path_cache is None:
+            self.path_cache = dict()
+        if path not in self.path_cache:
+            with self._open(self.node_file) as stream:
+                target = ET.parse(stream).getroot().find(path)
+            self.path_cache.update({
+                path: target.text if target is not None else None
+            })
+        return self.path_cache.get(path)
+
     def get_parent_id(self) -> int:
         """
         Method to read out the parent id of a node
 
         :returns: The parent id as integer
         """
+        if self.record is not None:
+            return self.record.parent_id
         node = self.root.find("node")
         if node is not None:
             parentIds = node.find("parentIds")
@@ -154,3 +300,49 @@ class LogNode:
                 if parentId is not None:
                     return int(parentId.text)
         return None
+
+    def get_parent_ids(self) -> list:
+        """
+        Method to read out all parent ids of a node, join nodes like the end
+        of a parallel step have more than one
+
+        :returns: The parent ids as list of integers
+        """
+        if self.record is not None:
+            return self.record.get_parent_ids()
+        node = self.root.find("node")
+        if node is None:
+            return list()
+        return [
+            int(parent_id.text)
+            for parent_id in node.findall("parentIds/string")
+        ]
+
+    def get_start_id(self) -> int:
+        """
+        Method to read out the id of the start node of the block a node
+        closes
+
+        :returns: The start id as integer or None if the node closes no block
+        """
+        if self.record is not None:
+            return self.record.start_id
+        node = self.root.find("node")
+        if node is not None:
+            start_id = node.find("startId")
+            if start_id is not None:
+                return int(start_id.text)
+        return None
+
+    def get_start_time(self) -> int:
+        """
+        Method to read out the start time of the TimingAction of a node
+
+        :returns: The milliseconds since the epoch or None
+        """
+        if self.record is not None:
+            return self.record.start_time
+        start_time = self.get_path_text(TIMING_PATH)
+        if start_time is not None:
+            return int(start_time)
+        return None
@@ -3,8 +3,28 @@ The LogProcessor module where the strings come together to produce
 a human readable log collection.
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
+from jenkins_log_parser.noderecord import LABEL_PATH, BRANCH_PATH
+from jenkins_log_parser.outputcodec import codec_suffix, create_compressor
+from jenkins_log_parser.profiling import bind, count, profiled
+from jenkins_log_parser.rangecopy import (
+    BUFFER_SIZE, MAX_OPEN_FILES, RangeWriter, WriterPool
+)
+from jenkins_log_parser.readplan import ReadPlan
 from jenkins_log_parser.treewalker import TreeWalker
 
+TRANSLATION = {
+    '(': None,
+    ')': None,
+    "'": None,
+    "\"": None,
+    ' ': '_',
+    "/": "-",
+    ",": None,
+    "&": "_and_"
+}
+HEADER = ">>> NodeID: {}, Step: {}\n"
+
 
 class LogProcessor:
     """
@@ -12,15 +32,58 @@ class LogProcessor:
     produce the human readable collection of log files from an jenkins
     log directory.
     """
-    def __init__(self, target_path):
+    def __init__(
+        self,
+        target_path,
+        single_pass: bool = False,
+        jobs: int = 1,
+        copy_method: str = "mmap",
+        max_open_files: int = MAX_OPEN_FILES,
+        codec: str = "none",
+        level: int = None
+    ):
         """
         Constructor
 
         :param target_path: the target path for the produced log files
+        :param single_pass: write all log files in a single traversal of the
+            tree, keeping all of them open at the same time (optional)
+        :param jobs: the number of worker threads writing the log files, more
+            than one implies a single traversal of the tree (optional)
+        :param copy_method: how the log ranges are written into the log
+            files, "mmap" writes them out of the memory mapped log,
+            "copy_file_range" and "sendfile" let the kernel copy them where
+            the platform supports it and "buffered" copies them with
+            os.pread (optional)
+        :param max_open_files: the maximum number of log files kept open at
+            the same time by the single traversal, the others are closed and
+            opened again when they are written next (optional)
+        :param codec: the codec compressing the log files while they are
+            written, one of outputcodec.CODECS, the files get its suffix. A
+            single traversal then writes the files one after another
+            instead of all at the same time (optional)
+        :param level: the compression level of the codec (optional)
         """
+        # fails early on an unknown codec, level or a missing package
+        create_compressor(codec, level)
         self.target_path = target_path
+        self.single_pass = single_pass
+        self.jobs = jobs
+        self.copy_method = copy_method
+        self.max_open_files = max_open_files
+        self.codec = codec
+        self.level = level
+        self.extension = ".log" + codec_suffix(codec)
+        self.storage = None
+        self.source = None
         self.nodes = None
         self.tree = None
+        self.ancestry = None
+        self.shadow_tree = None
+        self.targets = None
+        self.entry_targets = dict()
+        self.tables = None
+        self.last_nodes = dict()
 
     def get_parent_stage(self, current, walker) -> str:
         """
@@ -30,14 +93,12 @@ class LogProcessor:
         :param walker: the TreeWalker object used
         :returns: The name of the parent stage or None
         """
+        if walker.ancestry is not None and current.node_no in walker.ancestry:
+            return walker.ancestry.get_stage(current.node_no)
         for p in walker.list_parents(current.node_no):
             if p is not None and p.get_step() == "StageStep":
-                if p.get_path_text(
-                    "./actions/wf.a.LabelAction/displayName"
-                ) is not None:
-                    p_stage = p.get_path_text(
-                        "./actions/wf.a.LabelAction/displayName"
-                    )
+                if p.get_path_text(LABEL_PATH) is not None:
+                    p_stage = p.get_path_text(LABEL_PATH)
                     return p_stage
         return None
 
@@ -49,141 +110,568 @@ class LogProcessor:
         :param walker: the TreeWalker object used
         :returns: The name of the parent parallel step or None
         """
+        if walker.ancestry is not None and current.node_no in walker.ancestry:
+            return walker.ancestry.get_branch(current.node_no)
         for p in walker.list_parents(current.node_no):
             if p is not None and p.get_step() == "ParallelStep":
-                if p.get_path_text(
-                    "./actions/\
-org.jenkinsci.plugins.workflow.cps\
-.steps.ParallelStepExecution_-ParallelLabelAction\
-/branchName"
-                ) is not None:
-                    p_stage = p.get_path_text(
-                        "./actions/\
-org.jenkinsci.plugins.workflow.cps\
-.steps.ParallelStepExecution_-ParallelLabelAction\
-/branchName"
-                    )
+                if p.get_path_text(BRANCH_PATH) is not None:
+                    p_stage = p.get_path_text(BRANCH_PATH)
                     return p_stage
         return None
 
-    def process(self, nodes, tree):
+    @profiled("process")
+    def process(self, nodes, tree, ancestry=None):
         """
         Processes the build log of a Jenkins build
 
         :param nodes: The nodes dictionary how it is provided by the BuildLog
             class
         :param tree: The tree of nodes also from the BuildLog class
+        :param ancestry: The AncestorIndex of the nodes also from the BuildLog
+            class, speeding up the stage and branch lookups (optional)
         """
         self.nodes = nodes
         self.tree = tree
+        self.ancestry = ancestry
         shadow_tree = dict()
         self._split_up(shadow_tree)
-        translation = {
-            '(': None,
-            ')': None,
-            "'": None,
-            "\"": None,
-            ' ': '_',
-            "/": "-",
-            ",": None,
-            "&": "_and_"
-        }
-        # process tree to find stages and parallel executions
-        # stages are a own file, except stages have parallel executions, then
-        # the parallel executions are each a own file in a directory named
-        # after the stage
+        walker = TreeWalker(nodes, tree, ancestry)
+        targets = self._create_targets(shadow_tree)
+        self.targets = targets
+        self.storage = self._log_storage()
+        if self.copy_method != "mmap" and self.storage is not None:
+            self.source = self.storage.open_log_source()
+        if self.jobs > 1 or (self.single_pass and self.codec != "none"):
+            # a compressor keeps up to some hundred MiB of state, so the
+            # compressed files are written one after another per thread
+            self._process_parallel(targets, walker)
+            return
+        if self.single_pass:
+            self._process_single_pass(targets, walker)
+            return
+        for target in targets:
+            selected = list()
+            walker.reset()
+            current = walker.next()
+            while current is not None:
+                if self._matches(
+                    target,
+                    current,
+                    walker,
+                    self.get_parent_stage(current, walker),
+                    self.get_parent_parallel(current, walker)
+                ):
+                    selected.append(current)
+                current = walker.next()
+            self._write_file(target.get("path"), selected)
+
+    @profiled("query")
+    def query(
+        self,
+        nodes,
+        tree,
+        stream,
+        stage: str = None,
+        branch: str = None,
+        ancestry=None
+    ) -> int:
+        """
+        Writes the log of a single stage or parallel branch to a stream, with
+        the content process writes into the file of the stage or branch.
+        Only the log ranges of the selected nodes are read, the other nodes
+        are just looked up in the tree.
+
+        :param nodes: The nodes dictionary how it is provided by the BuildLog
+            class
+        :param tree: The tree of nodes also from the BuildLog class
+        :param stream: the binary output stream
+        :param stage: the name of the stage, without branch the nodes of the
+            stage outside of its parallel branches are written (optional)
+        :param branch: the name of the parallel branch, a stage is only
+            needed if several stages have a branch of this name (optional)
+        :param ancestry: The AncestorIndex of the nodes also from the BuildLog
+            class (optional)
+        :returns: the number of written nodes
+        """
+        if stage is None and branch is None:
+            raise ValueError("A stage or a branch is needed for a query")
+        self.nodes = nodes
+        self.tree = tree
+        self.ancestry = ancestry
+        shadow_tree = dict()
+        self._split_up(shadow_tree)
+        target = self._query_target(shadow_tree, stage, branch)
+        walker = TreeWalker(nodes, tree, ancestry)
+        written = 0
+        current = walker.next()
+        while current is not None:
+            if self._matches(
+                target,
+                current,
+                walker,
+                self.get_parent_stage(current, walker),
+                self.get_parent_parallel(current, walker)
+            ):
+                self._write_node(stream, current)
+                written += 1
+            current = walker.next()
+        return written
+
+    @staticmethod
+    def _query_target(shadow_tree, stage, branch) -> dict:
+        """
+        Internal method creating the output target of a query like
+        _entry_targets does, without a path
+
+        :param shadow_tree: The shadow_tree dictionary used
+        :param stage: the name of the stage or None
+        :param branch: the name of the parallel branch or None
+        :returns: the target dictionary
+        """
+        if stage is not None and stage not in shadow_tree:
+            raise ValueError("Unknown stage '%s', the stages are: %s" % (
+                stage, ", ".join(shadow_tree.keys())
+            ))
+        if branch is None:
+            value = shadow_tree.get(stage)
+            return {
+                "path": None,
+                "node_no": value.get("lognode").node_no,
+                "stage": stage,
+                "branch": None,
+                "unbranched": value.get("parallel") is not None
+            }
+        found = list()
         for key, value in shadow_tree.items():
-            if value.get("parallel", None) is None:
-                print("Got shadow entry %s" % key.translate(
-                    str.maketrans(translation)
-                ))
-                with open(
-                    os.path.join(
-                        self.target_path,
-                        key.translate(str.maketrans(translation))
-                    ) + ".log", "w"
-                ) as stream:
-                    walker = TreeWalker(nodes, tree)
-                    current = walker.next()
-                    while current is not None:
-                        # find first parent stage
-                        p_stage = self.get_parent_stage(current, walker)
-                        if walker.is_parent_node_of(
-                            value.get("lognode").node_no,
-                            current.node_no
-                        ) and p_stage == key:
-                            info = ">>> NodeID: {}, Step: {}\n".format(
-                                current.node_no,
-                                current.get_step()
-                            )
-                            stream.write(
-                                info
-                            )
-                            if len(current.indices) > 0:
-                                stream.write(current.get_log())
-                        current = walker.next()
+            branches = value.get("parallel") or dict()
+            if (stage is None or key == stage) and branch in branches:
+                found.append((key, branches.get(branch)))
+        if len(found) == 0:
+            raise ValueError("Unknown branch '%s'" % branch)
+        if len(found) > 1:
+            raise ValueError(
+                "The branch '%s' exists in the stages %s, a stage is needed"
+                % (branch, ", ".join(key for key, _ in found)))
+        return {
+            "path": None,
+            "node_no": found[0][1].node_no,
+            "stage": None,
+            "branch": branch,
+            "unbranched": False
+        }
+
+    def list_entries(self) -> list:
+        """
+        Lists the output files of the last process call with the nodes
+        written into them
+
+        :returns: a list of tuples of the target dictionary and the list of
+            node numbers in the order they were written
+        """
+        members = dict()
+        for path in self._unique_paths(self.targets):
+            members.update({path: list()})
+        walker = TreeWalker(self.nodes, self.tree, self.ancestry)
+        for path, current in self._route(self.targets, walker):
+            members.get(path).append(current.node_no)
+        return [
+            (target, members.get(path))
+            for path, target in self._unique_paths(self.targets).items()
+        ]
+
+    @profiled("append")
+    def append(self, nodes, tree, changes, ancestry=None):
+        """
+        Appends what a still running build has produced since the last call
+        to the log files. In contrast to process the log ranges are written
+        in the order of the log, every run of ranges of the same node is
+        preceded by the header of the node.
+
+        :param nodes: The nodes dictionary how it is provided by the BuildLog
+            class
+        :param tree: The tree of nodes also from the BuildLog class
+        :param changes: The dictionary of new nodes and new log ranges
+            returned by BuildLog.refresh
+        :param ancestry: The AncestorIndex of the nodes also from the BuildLog
+            class (optional)
+        """
+        if self.codec != "none":
+            raise ValueError("Compressed log files can't be appended to")
+        self.nodes = nodes
+        self.tree = tree
+        self.ancestry = ancestry
+        if self.shadow_tree is None:
+            self.shadow_tree = dict()
+        walker = TreeWalker(nodes, tree, ancestry)
+        changed = list()
+        for node_no in changes.get("nodes"):
+            key = self._add_shadow_entry(
+                self.shadow_tree, nodes.get(node_no), walker
+            )
+            if key is not None and key not in changed:
+                changed.append(key)
+        for key in changed:
+            self._update_entry_targets(key)
+        if len(changed) > 0:
+            self.tables = self._lookup_tables([
+                target
+                for key in self.shadow_tree
+                for target in self.entry_targets.get(key)
+            ])
+        if self.tables is None:
+            return
+        plan = dict()
+        for node_no, start, end in changes.get("ranges"):
+            current = nodes.get(node_no)
+            for path in self._paths_of(self.tables, current, walker):
+                plan.setdefault(path, list()).append((current, start, end))
+        for path, chunks in plan.items():
+            with open(path, "ab") as stream:
+                for current, start, end in chunks:
+                    if self.last_nodes.get(path) != current.node_no:
+                        self._write_header(stream, current)
+                        self.last_nodes.update({path: current.node_no})
+                    stream.write(current.log_view[start:end])
+            count("files_opened")
+            count("bytes_written", sum(
+                end - start for _, start, end in chunks
+            ))
+
+    def _update_entry_targets(self, key):
+        """
+        Internal method renewing the output files of a changed shadow tree
+        entry. The file of a stage, which got its first parallel branch, is
+        moved into the directory of the stage.
+
+        :param key: the name of the stage
+        """
+        former = self.entry_targets.get(key, [])
+        targets = self._entry_targets(key, self.shadow_tree.get(key))
+        self.entry_targets.update({key: targets})
+        if len(former) == 0:
+            return
+        old_path = former[0].get("path")
+        new_path = targets[0].get("path")
+        if old_path != new_path and os.path.exists(old_path):
+            os.replace(old_path, new_path)
+            last_node = self.last_nodes.pop(old_path, None)
+            if last_node is not None:
+                self.last_nodes.update({new_path: last_node})
+
+    def _process_single_pass(self, targets, walker):
+        """
+        Internal method writing all output files in one traversal of the
+        tree, where each node is routed to the files it belongs to. A
+        WriterPool keeps at most max_open_files of them open, the writes to
+        the others are buffered until they get a handle again.
+
+        :param targets: The output targets of the shadow tree
+        :param walker: the TreeWalker object used
+        """
+        paths = self._unique_paths(targets)
+        ReadPlan(self.nodes.values()).advise(self.storage)
+        pool = WriterPool(self.max_open_files)
+        buffer_size = pool.buffer_size(len(paths))
+        streams = dict()
+        try:
+            for path in paths:
+                streams.update({
+                    path: self._open_writer(path, pool, buffer_size)
+                })
+            for path, current in self._route(targets, walker):
+                self._write_node(streams.get(path), current)
+        finally:
+            for stream in streams.values():
+                self._count_file(stream)
+                stream.close()
+
+    def _process_parallel(self, targets, walker):
+        """
+        Internal method routing all nodes in one traversal of the tree and
+        writing the output files afterwards on a pool of worker threads. The
+        threads share the nodes and the memory mapped log, the content of
+        each file is fixed before any file is written. With a single job the
+        files are written one after another.
+
+        :param targets: The output targets of the shadow tree
+        :param walker: the TreeWalker object used
+        """
+        plan = dict()
+        for path in self._unique_paths(targets):
+            plan.update({path: list()})
+        for path, current in self._route(targets, walker):
+            plan.get(path).append(current)
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [
+                executor.submit(bind(self._write_file), path, nodes)
+                for path, nodes in plan.items()
+            ]
+            for future in futures:
+                future.result()
+
+    def _write_file(self, path, nodes):
+        """
+        Internal method writing a complete output file, after announcing the
+        log ranges of the nodes in the order of the log, so they are read
+        ahead in few large sequential reads
+
+        :param path: the path of the output file
+        :param nodes: the LogNode objects to write in their order
+        """
+        ReadPlan(nodes).advise(self.storage)
+        with self._open_writer(path) as stream:
+            for current in nodes:
+                self._write_node(stream, current)
+            self._count_file(stream)
+
+    def _log_storage(self):
+        """
+        Internal method providing the storage the nodes read the raw log
+        from
+
+        :returns: the Storage object or None if the nodes have no storage
+        """
+        for current in self.nodes.values():
+            if current.log_file is not None:
+                return current.storage
+        return None
+
+    def _open_writer(
+        self,
+        path,
+        pool=None,
+        buffer_size: int = BUFFER_SIZE
+    ) -> RangeWriter:
+        """
+        Internal method creating an output file
+
+        :param path: the path of the output file
+        :param pool: the WriterPool of the file (optional)
+        :param buffer_size: the size of the write buffer (optional)
+        :returns: the RangeWriter of the file
+        """
+        return RangeWriter(
+            path,
+            self.source,
+            self.copy_method,
+            pool=pool,
+            buffer_size=buffer_size,
+            compressor=create_compressor(self.codec, self.level)
+        )
+
+    @staticmethod
+    def _count_file(stream):
+        """
+        Internal method counting a written file and its bytes for the
+        profiling
+
+        :param stream: the binary output stream before it is closed
+        """
+        count("files_opened")
+        count("bytes_written", stream.tell())
+
+    @staticmethod
+    def _unique_paths(targets) -> dict:
+        """
+        Internal method removing targets whose path is used again by a later
+        target, like the file would have been overwritten
+
+        :param targets: The output targets of the shadow tree
+        :returns: a dictionary of the path mapped to the remaining target
+        """
+        by_path = dict()
+        for target in targets:
+            by_path.pop(target.get("path"), None)
+            by_path.update({target.get("path"): target})
+        return by_path
+
+    def _route(self, targets, walker):
+        """
+        Internal generator traversing the tree once and routing each node
+        to the output files it belongs to
+
+        :param targets: The output targets of the shadow tree
+        :param walker: the TreeWalker object used
+        :returns: a generator of tuples of the output file path and the
+            LogNode, in the order of the traversal
+        """
+        tables = self._lookup_tables(targets)
+        walker.reset()
+        current = walker.next()
+        while current is not None:
+            for path in self._paths_of(tables, current, walker):
+                yield path, current
+            current = walker.next()
+
+    def _lookup_tables(self, targets) -> tuple:
+        """
+        Internal method creating the lookup tables of the output files by
+        stage and by parallel branch
+
+        :param targets: The output targets of the shadow tree
+        :returns: a tuple of the dictionary of stage names mapped to their
+            target and the dictionary of branch names mapped to a list of
+            their targets
+        """
+        stage_targets = dict()
+        branch_targets = dict()
+        for target in self._unique_paths(targets).values():
+            if target.get("branch") is not None:
+                branch_targets.setdefault(
+                    target.get("branch"), list()
+                ).append(target)
             else:
-                print("Got shadow parallel entry %s" % key)
-                stage_dir = key.translate(translation)
-                if not os.path.exists(
-                    os.path.join(self.target_path, stage_dir)
-                ):
-                    os.makedirs(os.path.join(self.target_path, stage_dir))
-                with open(
-                    os.path.join(
-                        self.target_path,
-                        stage_dir,
-                        key.translate(translation)
-                    ) + ".log", "w"
-                ) as stream:
-                    walker = TreeWalker(nodes, tree)
-                    current = walker.next()
-                    while current is not None:
-                        # find first parent stage
-                        p_stage = self.get_parent_stage(current, walker)
-                        p_parallel = self.get_parent_parallel(current, walker)
-                        if walker.is_parent_node_of(
-                            value.get("lognode").node_no,
-                            current.node_no
-                        ) and p_stage == key and p_parallel is None:
-                            info = ">>> NodeID: {}, Step: {}\n".format(
-                                current.node_no,
-                                current.get_step()
-                            )
-                            stream.write(
-                                info
-                            )
-                            if len(current.indices) > 0:
-                                stream.write(current.get_log())
-                        current = walker.next()
-                for k, v in value.get("parallel").items():
-                    with open(
-                        os.path.join(
-                            self.target_path,
-                            stage_dir,
-                            k
-                        ) + ".log", "w"
-                    ) as stream:
-                        walker = TreeWalker(nodes, tree)
-                        current = walker.next()
-                        while current is not None:
-                            p_parallel = self.get_parent_parallel(
-                                current, walker
-                            )
-                            if walker.is_parent_node_of(
-                                v.node_no,
-                                current.node_no
-                            ) and p_parallel == k:
-                                stream.write(
-                                    ">>> NodeID: {}, Step: {}\n".format(
-                                        current.node_no,
-                                        current.get_step()
-                                    )
-                                )
-                                if len(current.indices) > 0:
-                                    stream.write(current.get_log())
-                            current = walker.next()
+                stage_targets.update({target.get("stage"): target})
+        return stage_targets, branch_targets
+
+    def _paths_of(self, tables, current, walker) -> list:
+        """
+        Internal method determining the output files a node belongs to
+
+        :param tables: the lookup tables created by _lookup_tables
+        :param current: the LogNode
+        :param walker: the TreeWalker object used
+        :returns: a list of output file paths
+        """
+        stage_targets, branch_targets = tables
+        p_stage = self.get_parent_stage(current, walker)
+        p_parallel = self.get_parent_parallel(current, walker)
+        routed = list()
+        target = stage_targets.get(p_stage)
+        if target is not None:
+            routed.append(target)
+        routed.extend(branch_targets.get(p_parallel, []))
+        return [
+            target.get("path") for target in routed
+            if self._matches(target, current, walker, p_stage, p_parallel)
+        ]
 
+    def _create_targets(self, shadow_tree) -> list:
+        """
+        Internal method creating the list of output files out of the shadow
+        tree. Stages are a own file, except stages have parallel executions,
+        then the parallel executions are each a own file in a directory named
+        after the stage.
+
+        :param shadow_tree: The shadow_tree dictionary used
+        :returns: a list of dictionaries describing each output file with its
+            path and the stage or branch the nodes belong to
+        """
+        targets = list()
+        for key, value in shadow_tree.items():
+            targets.extend(self._entry_targets(key, value))
+        return targets
+
+    def _entry_targets(self, key, value) -> list:
+        """
+        Internal method creating the output files of one entry of the shadow
+        tree
+
+        :param key: the name of the stage
+        :param value: the shadow tree entry of the stage
+        :returns: a list of dictionaries describing each output file with its
+            path and the stage or branch the nodes belong to
+        """
+        if value.get("parallel", None) is None:
+            print("Got shadow entry %s" % key.translate(
+                str.maketrans(TRANSLATION)
+            ))
+            return [{
+                "path": os.path.join(
+                    self.target_path,
+                    key.translate(str.maketrans(TRANSLATION))
+                ) + self.extension,
+                "node_no": value.get("lognode").node_no,
+                "entry": key,
+                "stage": key,
+                "branch": None,
+                "unbranched": False
+            }]
+        print("Got shadow parallel entry %s" % key)
+        stage_dir = key.translate(TRANSLATION)
+        if not os.path.exists(os.path.join(self.target_path, stage_dir)):
+            os.makedirs(os.path.join(self.target_path, stage_dir))
+        targets = [{
+            "path": os.path.join(
+                self.target_path,
+                stage_dir,
+                key.translate(TRANSLATION)
+            ) + self.extension,
+            "node_no": value.get("lognode").node_no,
+            "entry": key,
+            "stage": key,
+            "branch": None,
+            "unbranched": True
+        }]
+        for k, v in value.get("parallel").items():
+            targets.append({
+                "path": os.path.join(
+                    self.target_path,
+                    stage_dir,
+                    k
+                ) + self.extension,
+                "node_no": v.node_no,
+                "entry": key,
+                "stage": None,
+                "branch": k,
+                "unbranched": False
+            })
+        return targets
+
+    @staticmethod
+    def _matches(target, current, walker, p_stage, p_parallel) -> bool:
+        """
+        Internal method checking if a LogNode belongs to an output file
+
+        :param target: the output target as created by _create_targets
+        :param current: the current LogNode
+        :param walker: the TreeWalker object used
+        :param p_stage: the parent stage of the node
+        :param p_parallel: the parent parallel branch of the node
+        :returns: True or False
+        """
+        if target.get("branch") is not None:
+            if p_parallel != target.get("branch"):
+                return False
+        elif p_stage != target.get("stage") or (
+            target.get("unbranched") and p_parallel is not None
+        ):
+            return False
+        return walker.is_parent_node_of(
+            target.get("node_no"),
+            current.node_no
+        )
+
+    @staticmethod
+    def _write_node(stream, current):
+        """
+        Internal method writing the header and the log of a LogNode, the log
+        snippets are written as they are without decoding them
+
+        :param stream: the binary output stream or a RangeWriter
+        :param current: the LogNode to write
+        """
+        LogProcessor._write_header(stream, current)
+        if isinstance(stream, RangeWriter):
+            stream.write_log(current)
+            return
+        for view in current.get_log_views():
+            stream.write(view)
+
+    @staticmethod
+    def _write_header(stream, current):
+        """
+        Internal method writing the header of a LogNode
+
+        :param stream: the binary output stream
+        :param current: the LogNode
+        """
+        stream.write(HEADER.format(
+            current.node_no,
+            current.get_step()
+        ).encode())
+
+    @profiled("split_up")
     def _split_up(self, shadow_tree):
         """
         Internal method to split up the tree to a shadow tree containing the
@@ -191,40 +679,46 @@ org.jenkinsci.plugins.workflow.cps\
 
         :param shadow_tree: The shadow_tree dictionary used
         """
-        walker = TreeWalker(self.nodes, self.tree)
+        walker = TreeWalker(self.nodes, self.tree, self.ancestry)
         current = walker.next()
         while current is not None:
-            node = current
-            step = node.get_step()
-            if (
-                step == "StageStep" and
-                node.get_path_text("./actions/wf.a.LabelAction/displayName")
-                    is not None
-            ):
-                display_name = node.get_path_text(
-                    "./actions/wf.a.LabelAction/displayName"
-                )
-                new = {
-                    "lognode": node
-                }
-                shadow_tree.update({
-                    display_name: new
-                })
-            if (
-                step == "ParallelStep" and
-                node.get_path_text(
-                    "./actions/org.jenkinsci.plugins.workflow.cps.steps.ParallelStepExecution_-ParallelLabelAction/branchName") is not None  # noqa
-            ):
-                p_stage = self.get_parent_stage(current, walker)
-                if shadow_tree.get(p_stage).get("parallel", None) is None:
-                    shadow_tree.get(p_stage).update({"parallel": dict()})
-                branch_name = node.get_path_text(
-                    "./actions/\
-org.jenkinsci.plugins.workflow.cps\
-.steps.ParallelStepExecution_-ParallelLabelAction\
-/branchName"
-                )
-                shadow_tree.get(p_stage).get("parallel").update({
-                    branch_name: node
-                })
+            self._add_shadow_entry(shadow_tree, current, walker)
             current = walker.next()
+        count("stages", len(shadow_tree))
+
+    def _add_shadow_entry(self, shadow_tree, node, walker) -> str:
+        """
+        Internal method adding a stage or a parallel branch to the shadow
+        tree, if the node starts one
+
+        :param shadow_tree: The shadow_tree dictionary used
+        :param node: the LogNode
+        :param walker: the TreeWalker object used
+        :returns: the name of the changed stage or None
+        """
+        step = node.get_step()
+        if (
+            step == "StageStep" and
+            node.get_path_text(LABEL_PATH) is not None
+        ):
+            display_name = node.get_path_text(LABEL_PATH)
+            new = {
+                "lognode": node
+            }
+            shadow_tree.update({
+                display_name: new
+            })
+            return display_name
+        if (
+            step == "ParallelStep" and
+            node.get_path_text(BRANCH_PATH) is not None
+        ):
+            p_stage = self.get_parent_stage(node, walker)
+            if shadow_tree.get(p_stage).get("parallel", None) is None:
+                shadow_tree.get(p_stage).update({"parallel": dict()})
+            branch_name = node.get_path_text(BRANCH_PATH)
+            shadow_tree.get(p_stage).get("parallel").update({
+                branch_name: node
+            })
+            return p_stage
+        return None
@@ -0,0 +1,257 @@
+"""
+The noderecord module extracting the few fields of a workflow node xml file
+which are needed for processing the log, without keeping the xml tree
+"""
+import sys
+import xml.etree.ElementTree as ET
+
+LABEL_PATH = "./actions/wf.a.LabelAction/displayName"
+BRANCH_PATH = "./actions/\
+org.jenkinsci.plugins.workflow.cps\
+.steps.ParallelStepExecution_-ParallelLabelAction\
+/branchName"
+TIMING_PATH = "./actions/wf.a.TimingAction/startTime"
+
+_LABEL_TAGS = ("actions", "wf.a.LabelAction", "displayName")
+_BRANCH_TAGS = (
+    "actions",
+    "org.jenkinsci.plugins.workflow.cps"
+    ".steps.ParallelStepExecution_-ParallelLabelAction",
+    "branchName"
+)
+_TIMING_TAGS = ("actions", "wf.a.TimingAction", "startTime")
+
+
+class NodeRecord:
+    """
+    The NodeRecord class is a compact container for the extracted fields of
+    a workflow node
+    """
+    __slots__ = (
+        "node_class",
+        "descriptor_id",
+        "parent_id",
+        "label",
+        "branch_name",
+        "extra_parent_ids",
+        "start_id",
+        "start_time"
+    )
+
+    def __init__(
+        self,
+        node_class: str = None,
+        descriptor_id: str = None,
+        parent_id: int = None,
+        label: str = None,
+        branch_name: str = None,
+        extra_parent_ids: tuple = None,
+        start_id: int = None,
+        start_time: int = None
+    ):
+        """
+        Constructor
+
+        :param node_class: the class attribute of the node element
+        :param descriptor_id: the descriptorId of the node
+        :param parent_id: the first parent id of the node
+        :param label: the display name of the LabelAction
+        :param branch_name: the branch name of the ParallelLabelAction
+        :param extra_parent_ids: the parent ids following the first one as
+            tuple, None for nodes with at most one parent
+        :param start_id: the startId of a node closing a block
+        :param start_time: the startTime of the TimingAction in milliseconds
+            since the epoch
+        """
+        self.node_class = node_class
+        self.descriptor_id = descriptor_id
+        self.parent_id = parent_id
+        self.label = label
+        self.branch_name = branch_name
+        self.extra_parent_ids = extra_parent_ids
+        self.start_id = start_id
+        self.start_time = start_time
+
+    def __repr__(self) -> str:
+        """
+        Some string representation
+
+        :returns: The fields of the record as string
+        """
+        return "NodeRecord({})".format(", ".join(
+            "{}={!r}".format(slot, getattr(self, slot))
+            for slot in self.__slots__
+        ))
+
+    def __eq__(self, other) -> bool:
+        """
+        Compares all fields of two records
+
+        :param other: the other record
+        :returns: True if all fields are equal
+        """
+        if not isinstance(other, NodeRecord):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot)
+            for slot in self.__slots__
+        )
+
+    def as_tuple(self) -> tuple:
+        """
+        The fields of the record in the order of the constructor parameters,
+        a compact form for transferring records between processes
+
+        :returns: a tuple of the fields
+        """
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    @staticmethod
+    def from_tuple(fields):
+        """
+        Creates a record out of the tuple provided by as_tuple
+
+        :param fields: the tuple of the fields
+        :returns: the NodeRecord
+        """
+        record = NodeRecord(*fields)
+        record.node_class = _intern(record.node_class)
+        record.descriptor_id = _intern(record.descriptor_id)
+        return record
+
+    def get_path_text(self, path) -> tuple:
+        """
+        Looks up the content of a xml path element if the record holds it
+
+        :param path: the path to the xml element
+        :returns: a tuple of a boolean stating if the path is covered by the
+            record and the content of the xml element
+        """
+        if path == LABEL_PATH:
+            return True, self.label
+        if path == BRANCH_PATH:
+            return True, self.branch_name
+        if path == TIMING_PATH:
+            if self.start_time is None:
+                return True, None
+            return True, str(self.start_time)
+        return False, None
+
+    def get_parent_ids(self) -> list:
+        """
+        All parent ids of the node, the first one is parent_id
+
+        :returns: a list of the parent ids
+        """
+        if self.parent_id is None:
+            return list()
+        if self.extra_parent_ids is None:
+            return [self.parent_id]
+        return [self.parent_id] + list(self.extra_parent_ids)
+
+    def add_parent_id(self, parent_id: int):
+        """
+        Adds the next parent id out of the parentIds element
+
+        :param parent_id: the parent id
+        """
+        if self.parent_id is None:
+            self.parent_id = parent_id
+        elif self.extra_parent_ids is None:
+            self.extra_parent_ids = (parent_id,)
+        else:
+            self.extra_parent_ids += (parent_id,)
+
+
+def _intern(text: str) -> str:
+    """
+    Interns the often repeated class and descriptor strings
+
+    :param text: the string to intern or None
+    :returns: the interned string or None
+    """
+    if text is None:
+        return None
+    return sys.intern(text)
+
+
+def parse_record(source) -> NodeRecord:
+    """
+    Streams through a workflow node xml file and extracts the fields of a
+    NodeRecord. Parsing stops after the actions of the node are read.
+
+    :param source: file name or binary file object of the xml node file
+    :returns: the NodeRecord of the node
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as stream:
+            return parse_record(stream)
+    record = NodeRecord()
+    path = list()
+    node_seen = False
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            path.append(elem.tag)
+            if len(path) == 2 and elem.tag == "node" and not node_seen:
+                record.node_class = _intern(elem.get("class"))
+            continue
+        tags = tuple(path[1:])
+        path.pop()
+        if tags == ("node",):
+            node_seen = True
+        elif tags == ("node", "descriptorId"):
+            if record.descriptor_id is None:
+                record.descriptor_id = _intern(elem.text)
+        elif tags == ("node", "parentIds", "string"):
+            if not node_seen:
+                record.add_parent_id(int(elem.text))
+        elif tags == ("node", "startId"):
+            if record.start_id is None:
+                record.start_id = int(elem.text)
+        elif tags == _LABEL_TAGS:
+            if record.label is None:
+                record.label = elem.text
+        elif tags == _BRANCH_TAGS:
+            if record.branch_name is None:
+                record.branch_name = elem.text
+        elif tags == _TIMING_TAGS:
+            if record.start_time is None and elem.text is not None:
+                record.start_time = int(elem.text)
+        elif tags == ("actions",) and node_seen:
+            break
+        if len(tags) > 1:
+            elem.clear()
+    return record
+
+
+def record_from_root(root) -> NodeRecord:
+    """
+    Extracts the fields of a NodeRecord out of an already parsed xml tree
+
+    :param root: the root element of the xml node file
+    :returns: the NodeRecord of the node
+    """
+    record = NodeRecord()
+    node = root.find("node")
+    if node is not None:
+        record.node_class = _intern(node.get("class"))
+        desc = node.find("descriptorId")
+        if desc is not None:
+            record.descriptor_id = _intern(desc.text)
+        parent_ids = node.find("parentIds")
+        if parent_ids is not None:
+            for parent_id in parent_ids.findall("string"):
+                record.add_parent_id(int(parent_id.text))
+        start_id = node.find("startId")
+        if start_id is not None:
+            record.start_id = int(start_id.text)
+    label = root.find(LABEL_PATH)
+    if label is not None:
+        record.label = label.text
+    branch_name = root.find(BRANCH_PATH)
+    if branch_name is not None:
+        record.branch_name = branch_name.text
+    start_time = root.find(TIMING_PATH)
+    if start_time is not None and start_time.text is not None:
+        record.start_time = int(start_time.text)
+    return record
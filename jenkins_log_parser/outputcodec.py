@@ -0,0 +1,78 @@
+"""
+The outputcodec module compressing the produced log files while they are
+written, with gzip, bz2 and xz out of the standard library and with zstd if
+the zstandard package is installed
+"""
+import bz2
+import lzma
+import zlib
+try:
+    import zstandard
+except ImportError:  # pragma: no cover, optional dependency
+    zstandard = None
+
+# the file name suffix, the default level and the range of the levels
+CODECS = {
+    "none": {"suffix": "", "level": None, "levels": None},
+    "gzip": {"suffix": ".gz", "level": 6, "levels": (0, 9)},
+    "bz2": {"suffix": ".bz2", "level": 9, "levels": (1, 9)},
+    "xz": {"suffix": ".xz", "level": 6, "levels": (0, 9)},
+    "zstd": {"suffix": ".zst", "level": 3, "levels": (1, 22)},
+}
+
+
+def available_codecs() -> list:
+    """
+    Lists the codecs usable with the installed packages
+
+    :returns: the list of codec names
+    """
+    return [
+        codec for codec in CODECS
+        if codec != "zstd" or zstandard is not None
+    ]
+
+
+def codec_suffix(codec) -> str:
+    """
+    The suffix a codec appends to the file names
+
+    :param codec: the codec name
+    :returns: the suffix, e.g. ".gz", or an empty string
+    """
+    return CODECS.get(codec).get("suffix")
+
+
+def create_compressor(codec, level: int = None):
+    """
+    Creates the compressor of one output file
+
+    :param codec: one of the names in CODECS
+    :param level: the compression level, by default the usual one of the
+        codec (optional)
+    :returns: an object with compress(data) and flush() methods, which
+        return the compressed bytes, or None for the codec "none"
+    """
+    if codec not in CODECS:
+        raise ValueError("Unknown codec '%s', the codecs are: %s" % (
+            codec, ", ".join(CODECS.keys())
+        ))
+    if codec == "none":
+        return None
+    if level is None:
+        level = CODECS.get(codec).get("level")
+    lowest, highest = CODECS.get(codec).get("levels")
+    if not lowest <= level <= highest:
+        raise ValueError(
+            "The level of the codec '%s' has to be between %d and %d"
+            % (codec, lowest, highest))
+    if codec == "gzip":
+        # a window size of 16 + 15 bits writes the gzip format
+        return zlib.compressobj(level, zlib.DEFLATED, 31)
+    if codec == "bz2":
+        return bz2.BZ2Compressor(level)
+    if codec == "xz":
+        return lzma.LZMACompressor(preset=level)
+    if zstandard is None:
+        raise ValueError("The codec 'zstd' needs the zstandard package")
+    return zstandard.ZstdCompressor(level=level).compressobj()
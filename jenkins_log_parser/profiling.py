@@ -0,0 +1,343 @@
+"""
+The profiling module measuring the phases of processing a build, like
+collecting the nodes or writing the log files, and handing the measurements
+to registered hooks, e.g. a metrics collector
+
+Every thread has its own stack of running phases. Work handed to a thread
+pool is wrapped with bind to count into the phases of the submitting thread,
+work handed to a worker process runs with run_captured and its records are
+handed to the hooks of the parent with replay.
+"""
+import functools
+import inspect
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:  # pragma: no cover, not available on Windows
+    resource = None
+
+_HOOKS = list()
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+
+
+def add_hook(hook):
+    """
+    Registers a function which is called with the record of every finished
+    phase. A record is a dictionary with the name of the phase, its depth in
+    the nested phases, the wall and CPU time in seconds, the counts like
+    nodes or written bytes and the peak RSS of the process in bytes.
+
+    :param hook: the function taking the record
+    """
+    _HOOKS.append(hook)
+
+
+def remove_hook(hook):
+    """
+    Removes a registered hook
+
+    :param hook: the function registered with add_hook
+    """
+    if hook in _HOOKS:
+        _HOOKS.remove(hook)
+
+
+def is_enabled() -> bool:
+    """
+    Tells if phases are measured, which is the case while hooks are
+    registered
+
+    :returns: True or False
+    """
+    return len(_HOOKS) > 0
+
+
+def _active() -> list:
+    """
+    Internal function providing the stack of the running phases of the
+    calling thread, every phase is represented by the dictionary of its
+    counts
+
+    :returns: the list of count dictionaries, the innermost phase last
+    """
+    if not hasattr(_LOCAL, "active"):
+        _LOCAL.active = list()
+    return _LOCAL.active
+
+
+def peak_rss() -> int:
+    """
+    The peak resident set size of the process
+
+    :returns: the size in bytes or None where it is unknown
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+@contextmanager
+def phase(name):
+    """
+    Context manager measuring a phase, without registered hooks nothing is
+    measured
+
+    :param name: the name of the phase
+    """
+    if len(_HOOKS) == 0:
+        yield
+        return
+    active = _active()
+    counts = dict()
+    active.append(counts)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        for i in range(len(active) - 1, -1, -1):
+            if active[i] is counts:
+                del active[i]
+                break
+        record = {
+            "phase": name,
+            "depth": len(active),
+            "wall": time.perf_counter() - wall,
+            "cpu": time.process_time() - cpu,
+            "counts": counts,
+            "peak_rss": peak_rss()
+        }
+        for hook in list(_HOOKS):
+            hook(record)
+
+
+def profiled(name):
+    """
+    Decorator measuring every call of a function or coroutine function as a
+    phase
+
+    :param name: the name of the phase
+    :returns: the decorator
+    """
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def coroutine_wrapper(*args, **kwargs):
+                with phase(name):
+                    return await function(*args, **kwargs)
+            return coroutine_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value: int = 1):
+    """
+    Adds to a count of the innermost running phase, without a running phase
+    nothing is counted
+
+    :param name: the name of the count
+    :param value: the value to add (optional)
+    """
+    active = _active()
+    if len(active) == 0:
+        return
+    with _LOCK:
+        counts = active[-1]
+        counts.update({name: counts.get(name, 0) + value})
+
+
+def bind(function):
+    """
+    Wraps a function which is run on another thread, so its phases and
+    counts are nested in the phases running in the calling thread at the
+    time of the bind call
+
+    :param function: the function
+    :returns: the wrapped function or the function itself if no phase is
+        running
+    """
+    parents = list(_active())
+    if len(parents) == 0:
+        return function
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        active = _active()
+        saved = list(active)
+        active[:] = parents
+        try:
+            return function(*args, **kwargs)
+        finally:
+            active[:] = saved
+    return wrapper
+
+
+def run_captured(measure: bool, function, *args):
+    """
+    Runs a function in a worker process, with measure its phases are
+    collected instead of being handed to the hooks of the worker
+
+    :param measure: True if the parent process measures, see is_enabled
+    :param function: a module level function
+    :param args: the arguments of the function
+    :returns: a tuple of the result of the function and the list of records
+        for replay
+    """
+    if not measure:
+        return function(*args), list()
+    records = list()
+    saved = list(_HOOKS)
+    # a forked worker inherits the phases running in the parent
+    active = _active()
+    parents = list(active)
+    _HOOKS[:] = [records.append]
+    active[:] = list()
+    try:
+        return function(*args), records
+    finally:
+        _HOOKS[:] = saved
+        active[:] = parents
+
+
+def replay(records):
+    """
+    Hands the records measured by run_captured in a worker process to the
+    hooks, nested in the phases running in the calling thread
+
+    :param records: the list of records
+    """
+    depth = len(_active())
+    for record in records:
+        record = dict(record)
+        record.update({"depth": record.get("depth") + depth})
+        for hook in list(_HOOKS):
+            hook(record)
+
+
+def merge_records(records) -> list:
+    """
+    Merges the records of the same phase at the same depth, e.g. of many
+    chunks processed by worker processes, into one record summing their
+    times and counts, with the number of merged records as count "merged"
+
+    :param records: the list of records
+    :returns: the list of merged records in the order of their first record
+    """
+    merged = dict()
+    for record in records:
+        key = (record.get("phase"), record.get("depth"))
+        if key not in merged:
+            merged.update({key: {
+                "phase": record.get("phase"),
+                "depth": record.get("depth"),
+                "wall": 0.0,
+                "cpu": 0.0,
+                "counts": {"merged": 0},
+                "peak_rss": None
+            }})
+        target = merged.get(key)
+        counts = target.get("counts")
+        for name, value in list(record.get("counts").items()) + [
+            ("merged", 1)
+        ]:
+            counts.update({name: counts.get(name, 0) + value})
+        rss = [
+            value for value in (target.get("peak_rss"), record.get("peak_rss"))
+            if value is not None
+        ]
+        target.update({
+            "wall": target.get("wall") + record.get("wall"),
+            "cpu": target.get("cpu") + record.get("cpu"),
+            "peak_rss": max(rss) if len(rss) > 0 else None
+        })
+    return list(merged.values())
+
+
+class Profiler:
+    """
+    The Profiler class is a hook collecting the records of all phases and
+    formatting them as report
+    """
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.records = list()
+
+    def __call__(self, record):
+        """
+        Collects the record of a finished phase
+
+        :param record: the record dictionary
+        """
+        self.records.append(record)
+
+    def format_text(self) -> str:
+        """
+        Formats the records as human readable table, nested phases are
+        indented below the phase containing them
+
+        :returns: the report as string
+        """
+        lines = ["{:<28} {:>9} {:>9} {:>10}  {}".format(
+            "phase", "wall [s]", "cpu [s]", "rss [MiB]", "counts"
+        )]
+        for record in self._nested_order():
+            rss = record.get("peak_rss")
+            lines.append("{:<28} {:>9.3f} {:>9.3f} {:>10}  {}".format(
+                "  " * record.get("depth") + record.get("phase"),
+                record.get("wall"),
+                record.get("cpu"),
+                "{:.1f}".format(rss / 1024 / 1024) if rss is not None
+                else "-",
+                " ".join(
+                    "{}={}".format(key, value)
+                    for key, value in sorted(record.get("counts").items())
+                )
+            ))
+        return "\n".join(lines)
+
+    def format_json(self) -> str:
+        """
+        Formats the records as JSON list in the order the phases finished
+
+        :returns: the report as string
+        """
+        return json.dumps(self.records, indent=2, sort_keys=True)
+
+    def _nested_order(self) -> list:
+        """
+        Internal method ordering the records like the phases started, the
+        records arrive when the phases finish, so nested phases come first
+
+        :returns: the list of records
+        """
+        ordered = list()
+        pending = list()
+        for record in self.records:
+            depth = record.get("depth")
+            children = [child for child in pending if child[0] > depth]
+            pending = [child for child in pending if child[0] <= depth]
+            group = [record]
+            for _, records in children:
+                group.extend(records)
+            if depth == 0:
+                ordered.extend(group)
+            else:
+                pending.append((depth, group))
+        for _, records in pending:
+            ordered.extend(records)
+        return ordered
@@ -0,0 +1,351 @@
+"""
+The rangecopy module writing output files out of byte ranges of the raw log,
+either out of the memory mapped log or copied by the kernel from file to
+file with os.copy_file_range or os.sendfile, without passing the bytes
+through Python. The kernel copy pays off on file systems which share the
+data blocks or copy on the server, like XFS, Btrfs or NFS 4.2, on others
+writing out of the memory mapped log is faster.
+"""
+import errno
+import os
+from collections import OrderedDict
+from jenkins_log_parser.profiling import count
+from jenkins_log_parser.readplan import merge_adjacent
+
+COPY_METHODS = ["mmap", "copy_file_range", "sendfile", "buffered"]
+BUFFER_SIZE = 64 * 1024
+COPY_CHUNK = 1024 * 1024
+MAX_OPEN_FILES = 256
+# the memory all buffers of a WriterPool may take, spread over its writers
+POOL_BUFFER_MEMORY = 64 * 1024 * 1024
+MIN_BUFFER_SIZE = 4096
+MIN_KERNEL_COPY = 64 * 1024
+# errors telling the method is not supported for this pair of files, e.g.
+# copy_file_range between different file systems on older kernels
+_UNSUPPORTED = {
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EXDEV,
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    errno.EBADF,
+}
+
+
+def _available(method) -> list:
+    """
+    Internal function listing the copy methods to try in their order
+
+    :param method: one of COPY_METHODS except "mmap"
+    :returns: the list of method names, always ending with "buffered"
+    """
+    if method not in COPY_METHODS:
+        raise ValueError("Unknown copy method '%s', the methods are: %s" % (
+            method, ", ".join(COPY_METHODS)
+        ))
+    methods = list()
+    if method == "copy_file_range" and hasattr(os, "copy_file_range"):
+        methods.append("copy_file_range")
+    if method in ("copy_file_range", "sendfile") and hasattr(os, "sendfile"):
+        methods.append("sendfile")
+    methods.append("buffered")
+    return methods
+
+
+class RangeWriter:
+    """
+    The RangeWriter class writes an output file out of small writes, like
+    the node headers, and byte ranges of the raw log. Small writes and small
+    ranges are collected in a buffer, with a copy method other than "mmap"
+    large ranges are copied by the kernel straight from the log into the
+    file. A method the kernel refuses is dropped in favour of the next one,
+    down to a buffered copy with os.pread. Copying only uses positioned
+    reads of the log, so several writers can share one log source across
+    threads.
+
+    With a WriterPool the file is only open while the pool grants it a
+    handle, in between the writes are collected in the buffer and the file
+    is opened again to continue at its end. With a compressor every write
+    passes it on the way from the buffer into the file.
+    """
+    def __init__(
+        self,
+        path,
+        source: tuple = None,
+        method: str = "mmap",
+        min_copy: int = MIN_KERNEL_COPY,
+        pool=None,
+        buffer_size: int = BUFFER_SIZE,
+        compressor=None
+    ):
+        """
+        Constructor, creating the output file, with a pool on the first
+        write or on closing
+
+        :param path: the path of the output file
+        :param source: the tuple of the file descriptor and the offset of the
+            raw log as returned by Storage.open_log_source, without a source
+            the log snippets are written out of the LogNodes (optional)
+        :param method: one of COPY_METHODS, with "mmap" the source is not
+            used (optional)
+        :param min_copy: ranges of fewer bytes are written through the
+            buffer if the log is memory mapped (optional)
+        :param pool: the WriterPool limiting the open files (optional)
+        :param buffer_size: the size of the write buffer (optional)
+        :param compressor: the compressor of the file as created by
+            outputcodec.create_compressor, the source is then not used
+            (optional)
+        """
+        self.methods = _available(method)
+        self.path = path
+        self.compressor = compressor
+        self.source = (
+            source if method != "mmap" and compressor is None else None
+        )
+        self.min_copy = min_copy
+        self.pool = pool
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+        self.size = 0
+        self.stored = 0
+        self.stream = None
+        self.created = False
+        self.closed = False
+        if self.pool is None:
+            self._file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, data):
+        """
+        Writes bytes through the buffer, larger ones than the buffer
+        directly
+
+        :param data: a bytes like object
+        """
+        if len(self.buffer) + len(data) > self.buffer_size:
+            self.flush()
+        if len(data) >= self.buffer_size:
+            self._emit(data)
+            self.size += len(data)
+        else:
+            self.buffer += data
+
+    def write_log(self, current):
+        """
+        Writes the log snippets of a LogNode, adjacent ones at once
+
+        :param current: the LogNode
+        """
+        if self.source is None:
+            for view in current.get_log_views():
+                self.write(view)
+            return
+        for start, end in merge_adjacent(current.get_ranges()):
+            if end - start < self.min_copy and current.log_view is not None:
+                self.write(current.log_view[start:end])
+            elif end > start:
+                self.copy(start, end)
+
+    def copy(self, start: int, end: int):
+        """
+        Copies a byte range of the raw log into the file
+
+        :param start: the start byte in the log
+        :param end: the end byte in the log
+        """
+        self.flush()
+        fd_in, offset = self.source
+        position = offset + start
+        remaining = end - start
+        while remaining > 0:
+            try:
+                copied = self._copy_chunk(fd_in, position, remaining)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED or len(self.methods) == 1:
+                    raise
+                self.methods.pop(0)
+                continue
+            if copied == 0:
+                raise EOFError(
+                    "The log ends before byte %d" % (position - offset))
+            position += copied
+            remaining -= copied
+            self.size += copied
+        count("bytes_copied", end - start)
+
+    def _copy_chunk(self, fd_in, position: int, size: int) -> int:
+        """
+        Internal method copying a part of a range with the current method
+
+        :param fd_in: the file descriptor of the log
+        :param position: the position in the file of the log
+        :param size: the number of bytes left
+        :returns: the number of copied bytes
+        """
+        fd_out = self._file().fileno()
+        method = self.methods[0]
+        if method == "copy_file_range":
+            return os.copy_file_range(fd_in, fd_out, size, position)
+        if method == "sendfile":
+            return os.sendfile(fd_out, fd_in, position, size)
+        data = os.pread(fd_in, min(size, COPY_CHUNK), position)
+        self._write_all(data)
+        return len(data)
+
+    def _emit(self, data):
+        """
+        Internal method writing bytes into the file, through the compressor
+        if there is one
+
+        :param data: a bytes like object
+        """
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+            if len(data) == 0:
+                return
+        self._write_all(data)
+
+    def _write_all(self, data):
+        """
+        Internal method writing bytes completely into the unbuffered file,
+        which may take several writes
+
+        :param data: a bytes like object
+        """
+        stream = self._file()
+        with memoryview(data) as view:
+            written = 0
+            while written < len(view):
+                written += stream.write(view[written:])
+        self.stored += len(data)
+
+    def _file(self):
+        """
+        Internal method providing the open file, which is created on the
+        first call and opened again at its end after the pool has closed it
+
+        :returns: the unbuffered binary file object
+        """
+        if self.stream is not None:
+            if self.pool is not None:
+                self.pool.touch(self)
+            return self.stream
+        if self.pool is not None:
+            self.pool.acquire(self)
+        if self.created:
+            self.stream = open(self.path, "r+b", buffering=0)
+            self.stream.seek(0, os.SEEK_END)
+        else:
+            self.stream = open(self.path, "wb", buffering=0)
+            self.created = True
+        return self.stream
+
+    def release(self):
+        """
+        Closes the file without flushing the buffer, the writer stays
+        usable and opens the file again when it needs it
+        """
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def flush(self):
+        """
+        Writes the buffer into the file
+        """
+        if len(self.buffer) > 0:
+            self._emit(self.buffer)
+            self.size += len(self.buffer)
+            self.buffer.clear()
+
+    def tell(self) -> int:
+        """
+        The size of the written content, before any compression
+
+        :returns: the number of bytes
+        """
+        return self.size + len(self.buffer)
+
+    def close(self):
+        """
+        Flushes the buffer, finishes the compression and closes the file
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.flush()
+            if self.compressor is not None:
+                self._write_all(self.compressor.flush())
+                count("bytes_compressed", self.stored)
+            if not self.created:
+                self._file()
+        finally:
+            self.release()
+            if self.pool is not None:
+                self.pool.discard(self)
+
+
+class WriterPool:
+    """
+    The WriterPool class keeps at most a fixed number of the files of its
+    RangeWriters open at the same time, the least recently used one is
+    closed when another writer needs its file. The pool is meant for writers
+    used by a single thread.
+    """
+    def __init__(self, max_open: int = MAX_OPEN_FILES):
+        """
+        Constructor
+
+        :param max_open: the maximum number of open files (optional)
+        """
+        self.max_open = max(max_open, 1)
+        self.writers = OrderedDict()
+
+    def acquire(self, writer):
+        """
+        Registers a writer which is about to open its file, closing the files
+        of the least recently used writers as needed
+
+        :param writer: the RangeWriter
+        """
+        while len(self.writers) >= self.max_open:
+            evicted = self.writers.popitem(last=False)[0]
+            evicted.release()
+            count("files_evicted")
+        self.writers.update({writer: None})
+
+    def touch(self, writer):
+        """
+        Marks the file of a writer as used
+
+        :param writer: the RangeWriter
+        """
+        self.writers.move_to_end(writer)
+
+    @staticmethod
+    def buffer_size(writers: int) -> int:
+        """
+        The size of the buffer of each writer, so the buffers of all of them
+        fit into POOL_BUFFER_MEMORY
+
+        :param writers: the number of writers
+        :returns: the buffer size in bytes
+        """
+        return max(
+            MIN_BUFFER_SIZE,
+            min(BUFFER_SIZE, POOL_BUFFER_MEMORY // max(writers, 1))
+        )
+
+    def discard(self, writer):
+        """
+        Removes a writer which has closed its file
+
+        :param writer: the RangeWriter
+        """
+        self.writers.pop(writer, None)
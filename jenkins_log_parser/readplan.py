@@ -0,0 +1,110 @@
+"""
+The readplan module planning the reads of the raw log. The log ranges of an
+output file are written in the order of the tree, which is not the order of
+the log. A ReadPlan sorts them by offset and merges neighbouring ones into
+few large spans, which are announced to the kernel before the file is
+written, so the log is read ahead sequentially instead of seeking for every
+small range.
+"""
+from jenkins_log_parser.profiling import count
+
+MERGE_GAP = 64 * 1024
+ADVISE_LIMIT = 256 * 1024 * 1024
+
+
+def coalesce(ranges, gap: int = 0) -> list:
+    """
+    Sorts byte ranges by offset and merges overlapping and adjacent ones
+
+    :param ranges: an iterable of (start, end) tuples
+    :param gap: ranges with at most this number of bytes between them are
+        merged as well (optional)
+    :returns: the sorted list of merged (start, end) tuples
+    """
+    spans = list()
+    for start, end in sorted(ranges):
+        if end <= start:
+            continue
+        if len(spans) > 0 and start <= spans[-1][1] + gap:
+            if end > spans[-1][1]:
+                spans[-1][1] = end
+        else:
+            spans.append([start, end])
+    return [(start, end) for start, end in spans]
+
+
+def merge_adjacent(ranges) -> list:
+    """
+    Merges byte ranges which directly continue the range before them,
+    keeping the order of the ranges
+
+    :param ranges: an iterable of (start, end) tuples
+    :returns: the list of merged (start, end) tuples
+    """
+    merged = list()
+    for start, end in ranges:
+        if len(merged) > 0 and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class ReadPlan:
+    """
+    The ReadPlan class holds the spans of the raw log read for writing a
+    set of LogNodes
+    """
+    def __init__(self, nodes, gap: int = MERGE_GAP):
+        """
+        Constructor
+
+        :param nodes: an iterable of the LogNode objects
+        :param gap: ranges with at most this number of bytes between them
+            are read as one span (optional)
+        """
+        self.spans = coalesce(
+            (span for node in nodes for span in node.get_ranges()), gap
+        )
+
+    def __len__(self) -> int:
+        """
+        The number of spans
+
+        :returns: the number of spans
+        """
+        return len(self.spans)
+
+    def size(self) -> int:
+        """
+        The number of bytes of all spans
+
+        :returns: the number of bytes
+        """
+        return sum(end - start for start, end in self.spans)
+
+    def advise(self, storage, limit: int = ADVISE_LIMIT) -> int:
+        """
+        Announces the spans in the order of the log to the storage, which
+        lets the kernel read them ahead
+
+        :param storage: the Storage object of the log, may be None
+        :param limit: the spans are only announced up to this number of
+            bytes, so a huge plan doesn't push the written files out of the
+            page cache (optional)
+        :returns: the number of announced bytes
+        """
+        if storage is None:
+            return 0
+        spans = list()
+        advised = 0
+        for start, end in self.spans:
+            if advised >= limit:
+                break
+            end = min(end, start + limit - advised)
+            spans.append((start, end))
+            advised += end - start
+        storage.advise_log(spans)
+        count("read_spans", len(spans))
+        count("advised_bytes", advised)
+        return advised
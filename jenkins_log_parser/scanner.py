@@ -0,0 +1,326 @@
+"""
+The scanner module extracting the fields of a NodeRecord with a plain byte
+scan over the workflow node xml file, falling back to ElementTree whenever
+the file doesn't look like the ones Jenkins writes
+"""
+import io
+import re
+import xml.etree.ElementTree as ET
+from jenkins_log_parser.noderecord import (
+    NodeRecord, parse_record, record_from_root, _intern
+)
+
+_CLASS = re.compile(rb"\sclass\s*=\s*([\"'])(.*?)\1", re.DOTALL)
+_ROOT = re.compile(rb"<([^\s/>?!]+)")
+_ENCODING = re.compile(rb"encoding\s*=\s*([\"'])(.*?)\1")
+_LABEL_TAG = b"wf.a.LabelAction"
+_TIMING_TAG = b"wf.a.TimingAction"
+_BRANCH_TAG = (
+    b"org.jenkinsci.plugins.workflow.cps"
+    b".steps.ParallelStepExecution_-ParallelLabelAction"
+)
+
+
+def _check_complete(data: bytes):
+    """
+    Internal function making sure the file ends with the end tag of its root
+    element, which a file still being written by Jenkins doesn't
+
+    :param data: the content of the xml node file
+    """
+    start = data.find(b"?>") + 2 if data.startswith(b"<?xml") else 0
+    root = _ROOT.search(data, start)
+    if root is None or not data.rstrip().endswith(
+        b"</" + root.group(1) + b">"
+    ):
+        raise ValueError("the root element is not closed")
+
+
+def _start_tag(tag: bytes):
+    """
+    Internal function compiling the pattern of a start tag, the group is
+    the slash of an empty element tag
+
+    :param tag: the name of the element
+    :returns: the compiled pattern
+    """
+    return re.compile(b"<" + re.escape(tag) + rb"(?:\s[^>]*?)?(/?)>")
+
+
+def _text_element(tag: bytes):
+    """
+    Internal function compiling the pattern of an element containing only
+    text, the group is the text
+
+    :param tag: the name of the element
+    :returns: the compiled pattern
+    """
+    return re.compile(
+        b"<" + re.escape(tag) + rb"(?:\s[^>]*?)?(?:/>|>([^<]*)</" +
+        re.escape(tag) + b">)"
+    )
+
+
+# the layout Jenkins writes, matched in one go before the element by element
+# scan is tried
+_CANONICAL_NODE = re.compile(
+    rb"<node class=\"([^\"]*)\"[^>]*>\s*"
+    rb"<parentIds(?:/>|>((?:\s*<string>\d+</string>)*)\s*</parentIds>)\s*"
+    rb"<id>[^<]*</id>\s*"
+    rb"(?:<descriptorId>([^<]+)</descriptorId>\s*)?"
+    rb"(?:<startId>(\d+)</startId>\s*)?"
+    rb"(?:<descriptorId>([^<]+)</descriptorId>\s*)?"
+    rb"</node>"
+)
+_CANONICAL_PARENT = re.compile(rb"<string>(\d+)</string>")
+_CANONICAL_LABEL = re.compile(
+    rb"<wf\.a\.LabelAction[^>/]*>\s*<displayName>([^<]+)</displayName>"
+)
+_CANONICAL_TIMING = re.compile(
+    rb"<wf\.a\.TimingAction[^>/]*>\s*<startTime>(\d+)</startTime>"
+)
+_CANONICAL_BRANCH = re.compile(
+    b"<" + re.escape(_BRANCH_TAG) +
+    rb"[^>/]*>\s*<branchName>([^<]+)</branchName>"
+)
+
+_CONTAINERS = {
+    tag: _start_tag(tag)
+    for tag in (
+        b"node", b"parentIds", b"actions", _LABEL_TAG, _BRANCH_TAG,
+        _TIMING_TAG
+    )
+}
+_TEXTS = {
+    tag: _text_element(tag)
+    for tag in (
+        b"descriptorId", b"string", b"startId", b"displayName",
+        b"branchName", b"startTime"
+    )
+}
+
+
+def _container(data: bytes, tag: bytes, start: int, end: int) -> tuple:
+    """
+    Internal function locating the content of the first element with the
+    given name inside a part of the data
+
+    :param data: the xml content
+    :param tag: the name of the element
+    :param start: the start of the part
+    :param end: the end of the part
+    :returns: a tuple of the start and end of the content, None for a
+        missing or empty element
+    """
+    pos = data.find(b"<" + tag, start, end)
+    if pos < 0:
+        return None
+    match = _CONTAINERS.get(tag).match(data, pos, end)
+    if match is None:
+        raise ValueError("unexpected start tag <%s" % tag.decode())
+    if match.group(1):
+        return None
+    close = data.find(b"</" + tag + b">", match.end(), end)
+    if close < 0:
+        raise ValueError("element <%s> is not closed" % tag.decode())
+    return match.end(), close
+
+
+def _text(data: bytes, tag: bytes, part: tuple) -> str:
+    """
+    Internal function providing the text of the first element with the
+    given name inside a part of the data like ElementTree does
+
+    :param data: the xml content
+    :param tag: the name of the element
+    :param part: a tuple of start and end of the part or None
+    :returns: the text or None for a missing or empty element
+    """
+    if part is None:
+        return None
+    pos = data.find(b"<" + tag, part[0], part[1])
+    if pos < 0:
+        return None
+    match = _TEXTS.get(tag).match(data, pos, part[1])
+    if match is None:
+        raise ValueError("element <%s> is not plain text" % tag.decode())
+    if not match.group(1):
+        return None
+    return match.group(1).decode("utf-8")
+
+
+def _scan_canonical(data: bytes) -> NodeRecord:
+    """
+    Internal function extracting the fields out of a node file in exactly
+    the layout Jenkins writes
+
+    :param data: the content of the xml node file
+    :returns: the NodeRecord or None if the layout differs
+    """
+    node_start = data.find(b"<node ")
+    actions_start = data.find(b"<actions")
+    if node_start < 0 or actions_start < node_start:
+        return None
+    node = _CANONICAL_NODE.match(data, node_start)
+    if node is None or b"\t" in node.group(1) or b"\n" in node.group(1):
+        return None
+    descriptor_id = node.group(3) or node.group(5)
+    record = NodeRecord(
+        node_class=_intern(node.group(1).decode("utf-8")),
+        descriptor_id=_intern(
+            descriptor_id.decode("utf-8") if descriptor_id else None
+        ),
+        start_id=int(node.group(4)) if node.group(4) else None
+    )
+    if node.group(2):
+        for parent_id in _CANONICAL_PARENT.findall(node.group(2)):
+            record.add_parent_id(int(parent_id))
+    label = _CANONICAL_LABEL.search(data, node.end())
+    if label is not None:
+        record.label = label.group(1).decode("utf-8")
+    elif data.find(b"<wf.a.LabelAction", node.end()) >= 0:
+        return None
+    branch = _CANONICAL_BRANCH.search(data, node.end())
+    if branch is not None:
+        record.branch_name = branch.group(1).decode("utf-8")
+    elif data.find(b"ParallelLabelAction", node.end()) >= 0:
+        return None
+    timing = _CANONICAL_TIMING.search(data, node.end())
+    if timing is not None:
+        record.start_time = int(timing.group(1))
+    elif data.find(b"<wf.a.TimingAction", node.end()) >= 0:
+        return None
+    return record
+
+
+def scan_record(data: bytes) -> NodeRecord:
+    """
+    Extracts the fields of a NodeRecord out of the content of a workflow
+    node xml file with a byte scan. Anything the scanner doesn't expect, like
+    entities, comments, CDATA sections or other encodings, raises a
+    ValueError.
+
+    :param data: the content of the xml node file
+    :returns: the NodeRecord of the node
+    """
+    if b"&" in data or b"<!" in data or b"\r" in data:
+        raise ValueError("entities, comments or carriage returns")
+    if data.startswith(b"<?xml"):
+        encoding = _ENCODING.search(data, 0, data.find(b"?>"))
+        if encoding is not None and encoding.group(2).lower() not in (
+            b"utf-8", b"utf8"
+        ):
+            raise ValueError("unsupported encoding")
+    _check_complete(data)
+    record = _scan_canonical(data)
+    if record is not None:
+        return record
+    record = NodeRecord()
+    node_start = data.find(b"<node")
+    actions_start = data.find(b"<actions")
+    if node_start < 0 or 0 <= actions_start < node_start:
+        raise ValueError("no node element in front of the actions")
+    head = _CONTAINERS.get(b"node").match(data, node_start)
+    if head is None:
+        raise ValueError("unexpected start tag <node")
+    attribute = _CLASS.search(data, node_start, head.end())
+    if attribute is not None:
+        if b"\t" in attribute.group(2) or b"\n" in attribute.group(2):
+            raise ValueError("class attribute needs normalization")
+        record.node_class = _intern(attribute.group(2).decode("utf-8"))
+    node_end = head.end()
+    if not head.group(1):
+        node_end = data.find(b"</node>", head.end())
+        if node_end < 0:
+            raise ValueError("element <node> is not closed")
+        node = (head.end(), node_end)
+        record.descriptor_id = _intern(_text(data, b"descriptorId", node))
+        parent_ids = _container(data, b"parentIds", node[0], node[1])
+        while parent_ids is not None:
+            pos = data.find(b"<string", parent_ids[0], parent_ids[1])
+            if pos < 0:
+                break
+            match = _TEXTS.get(b"string").match(data, pos, parent_ids[1])
+            if match is None:
+                raise ValueError("element <string> is not plain text")
+            if match.group(1):
+                record.add_parent_id(int(match.group(1)))
+            parent_ids = (match.end(), parent_ids[1])
+        start_id = _text(data, b"startId", node)
+        if start_id is not None:
+            record.start_id = int(start_id)
+    actions = _container(data, b"actions", node_end, len(data))
+    if actions is not None:
+        record.label = _text(
+            data,
+            b"displayName",
+            _container(data, _LABEL_TAG, actions[0], actions[1])
+        )
+        record.branch_name = _text(
+            data,
+            b"branchName",
+            _container(data, _BRANCH_TAG, actions[0], actions[1])
+        )
+        start_time = _text(
+            data,
+            b"startTime",
+            _container(data, _TIMING_TAG, actions[0], actions[1])
+        )
+        if start_time is not None:
+            record.start_time = int(start_time)
+    return record
+
+
+def extract_record(source) -> NodeRecord:
+    """
+    Extracts the fields of a NodeRecord with the byte scanner and falls back
+    to ElementTree if the scanner fails
+
+    :param source: file name or binary file object of the xml node file
+    :returns: the NodeRecord of the node
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as stream:
+            return extract_record(stream)
+    data = source.read()
+    try:
+        return scan_record(data)
+    except ValueError:
+        return parse_record(io.BytesIO(data))
+
+
+EXTRACTORS = {
+    "etree": parse_record,
+    "scan": extract_record
+}
+
+
+def cross_check(storage) -> dict:
+    """
+    Extracts the records of all node files of a storage with the byte
+    scanner and with ElementTree and compares them
+
+    :param storage: the Storage object of a build
+    :returns: a dictionary with the number of checked files, the list of
+        tuples of node file and error message where the scanner falls back
+        and the list of tuples of node file, ElementTree record and scanner
+        record where the records differ
+    """
+    result = {
+        "checked": 0,
+        "fallbacks": list(),
+        "mismatches": list()
+    }
+    for node_file in sorted(storage.scan_node_files().values()):
+        with storage.open(node_file) as stream:
+            data = stream.read()
+        result.update({"checked": result.get("checked") + 1})
+        expected = record_from_root(ET.fromstring(data))
+        try:
+            scanned = scan_record(data)
+        except ValueError as e:
+            result.get("fallbacks").append((node_file, str(e)))
+            continue
+        if scanned != expected:
+            result.get("mismatches").append((node_file, expected, scanned))
+    return result
@@ -0,0 +1,318 @@
+"""
+The sidecar module writing a SQLite index of a processed build next to the
+produced log files, so the output of single steps, stages and branches can
+be looked up again later by seeking into the raw log, without parsing any
+xml file
+"""
+import os
+import sqlite3
+from jenkins_log_parser.logprocessor import HEADER
+from jenkins_log_parser.profiling import profiled
+from jenkins_log_parser.storage import open_storage
+from jenkins_log_parser.treewalker import TreeWalker
+
+SIDECAR_NAME = "build-index.sqlite"
+SIDECAR_VERSION = 1
+
+SCHEMA = [
+    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE nodes ("
+    "node_id INTEGER PRIMARY KEY, parent_id INTEGER, node_class TEXT, "
+    "step TEXT, label TEXT, branch_name TEXT, start_id INTEGER, "
+    "start_time INTEGER, stage TEXT, branch TEXT)",
+    "CREATE TABLE ranges ("
+    "node_id INTEGER, start_byte INTEGER, end_byte INTEGER)",
+    "CREATE TABLE entries ("
+    "entry_id INTEGER PRIMARY KEY, path TEXT, stage TEXT, branch TEXT, "
+    "node_id INTEGER, unbranched INTEGER)",
+    "CREATE TABLE members ("
+    "entry_id INTEGER, seq INTEGER, node_id INTEGER, "
+    "PRIMARY KEY (entry_id, seq))",
+    "CREATE INDEX ranges_node ON ranges (node_id)",
+    "CREATE INDEX nodes_scope ON nodes (stage, branch, step)",
+]
+
+
+@profiled("write_sidecar")
+def write_sidecar(path, build_log, processor):
+    """
+    Writes the sidecar index of a build, after the LogProcessor has
+    processed it. The file is replaced atomically.
+
+    :param path: the path of the sidecar file
+    :param build_log: the BuildLog of the build, with the nodes, tree and
+        log ranges collected
+    :param processor: the LogProcessor after its process call
+    """
+    walker = TreeWalker(processor.nodes, processor.tree, processor.ancestry)
+    nodes = list()
+    ranges = list()
+    for node_no in sorted(build_log.nodes.keys()):
+        node = build_log.nodes.get(node_no)
+        record = node.get_record()
+        nodes.append((
+            node_no,
+            record.parent_id,
+            record.node_class,
+            node.get_step(),
+            record.label,
+            record.branch_name,
+            record.start_id,
+            record.start_time,
+            processor.get_parent_stage(node, walker),
+            processor.get_parent_parallel(node, walker)
+        ))
+        ranges.extend(
+            (node_no, start, end) for start, end in node.get_ranges()
+        )
+    entries = list()
+    members = list()
+    for entry_id, (target, node_nos) in enumerate(processor.list_entries()):
+        entries.append((
+            entry_id,
+            os.path.relpath(target.get("path"), processor.target_path),
+            target.get("entry"),
+            target.get("branch"),
+            target.get("node_no"),
+            1 if target.get("unbranched") else 0
+        ))
+        members.extend(
+            (entry_id, seq, node_no) for seq, node_no in enumerate(node_nos)
+        )
+    log_view = build_log.storage.log_view
+    meta = {
+        "version": str(SIDECAR_VERSION),
+        "location": os.path.abspath(build_log.storage.location),
+        "log_file": build_log.log_file,
+        "log_size": str(len(log_view) if log_view is not None else 0)
+    }
+    temp_path = path + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    try:
+        for statement in SCHEMA:
+            connection.execute(statement)
+        connection.executemany(
+            "INSERT INTO meta VALUES (?, ?)", sorted(meta.items())
+        )
+        connection.executemany(
+            "INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", nodes
+        )
+        connection.executemany("INSERT INTO ranges VALUES (?, ?, ?)", ranges)
+        connection.executemany(
+            "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)", entries
+        )
+        connection.executemany(
+            "INSERT INTO members VALUES (?, ?, ?)", members
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temp_path, path)
+
+
+class SidecarIndex:
+    """
+    The SidecarIndex class answers queries out of a sidecar file and reads
+    the log snippets straight out of the raw log of the build
+    """
+    def __init__(self, path):
+        """
+        Constructor
+
+        :param path: the path of the sidecar file
+        """
+        if not os.path.isfile(path):
+            raise ValueError("There is no sidecar index at '%s'" % path)
+        self.storage = None
+        self.log_stream = None
+        self.connection = sqlite3.connect(path)
+        self.meta = dict(self.connection.execute("SELECT * FROM meta"))
+        if self.meta.get("version") != str(SIDECAR_VERSION):
+            self.close()
+            raise ValueError(
+                "The sidecar index '%s' has an unsupported version" % path)
+
+    def close(self):
+        """
+        Closes the sidecar file and the raw log
+        """
+        if self.log_stream is not None:
+            self.log_stream.close()
+            self.log_stream = None
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _log(self):
+        """
+        Internal method opening the raw log on first use and checking it
+        still has the size it had when the index was written
+
+        :returns: the binary file object of the log
+        """
+        if self.log_stream is None:
+            storage = open_storage(self.meta.get("location"))
+            log_stream = storage.open(self.meta.get("log_file"))
+            size = log_stream.seek(0, os.SEEK_END)
+            if size != int(self.meta.get("log_size")):
+                log_stream.close()
+                storage.close()
+                raise ValueError(
+                    "The log of '%s' changed after the index was written"
+                    % self.meta.get("location"))
+            self.storage = storage
+            self.log_stream = log_stream
+        return self.log_stream
+
+    def list_entries(self) -> list:
+        """
+        Lists the log files written for the build
+
+        :returns: a list of dictionaries with the path, the stage, the
+            branch and the number of nodes of every file
+        """
+        return [
+            {
+                "path": path,
+                "stage": stage,
+                "branch": branch,
+                "nodes": count
+            }
+            for path, stage, branch, count in self.connection.execute(
+                "SELECT path, stage, branch, "
+                "(SELECT COUNT(*) FROM members "
+                "WHERE members.entry_id = entries.entry_id) "
+                "FROM entries ORDER BY entry_id"
+            )
+        ]
+
+    def find_nodes(
+        self,
+        stage: str = None,
+        branch: str = None,
+        step: str = None
+    ) -> list:
+        """
+        Finds the nodes enclosed by a stage or branch or of a step type,
+        e.g. all ShellStep nodes of a stage
+
+        :param stage: the name of the enclosing stage (optional)
+        :param branch: the name of the enclosing parallel branch (optional)
+        :param step: the step type without package, like ShellStep
+            (optional)
+        :returns: a list of dictionaries with the node id, step, stage,
+            branch, start time and log size of every node in increasing
+            order of the node ids
+        """
+        conditions = list()
+        parameters = list()
+        for column, value in (
+            ("stage", stage), ("branch", branch), ("step", step)
+        ):
+            if value is not None:
+                conditions.append("{} = ?".format(column))
+                parameters.append(value)
+        query = (
+            "SELECT node_id, step, stage, branch, start_time, "
+            "(SELECT COALESCE(SUM(end_byte - start_byte), 0) FROM ranges "
+            "WHERE ranges.node_id = nodes.node_id) FROM nodes"
+        )
+        if len(conditions) > 0:
+            query += " WHERE " + " AND ".join(conditions)
+        return [
+            {
+                "node_id": node_id,
+                "step": node_step,
+                "stage": node_stage,
+                "branch": node_branch,
+                "start_time": start_time,
+                "size": size
+            }
+            for node_id, node_step, node_stage, node_branch, start_time,
+            size in self.connection.execute(
+                query + " ORDER BY node_id", parameters
+            )
+        ]
+
+    def write_node(self, node_id: int, stream) -> bool:
+        """
+        Writes the header and the log of a single node
+
+        :param node_id: the node id
+        :param stream: the binary output stream
+        :returns: False if the build has no such node
+        """
+        row = self.connection.execute(
+            "SELECT step FROM nodes WHERE node_id = ?", (node_id,)
+        ).fetchone()
+        if row is None:
+            return False
+        self._write_node(stream, node_id, row[0])
+        return True
+
+    def write_entry(self, stream, stage: str = None, branch: str = None):
+        """
+        Writes the log of a stage or a parallel branch, with the content of
+        its log file
+
+        :param stream: the binary output stream
+        :param stage: the name of the stage, without branch the nodes of the
+            stage outside of its parallel branches are written (optional)
+        :param branch: the name of the parallel branch, a stage is only
+            needed if several stages have a branch of this name (optional)
+        :returns: the number of written nodes
+        """
+        if branch is None:
+            rows = self.connection.execute(
+                "SELECT entry_id, stage, path FROM entries "
+                "WHERE stage = ? AND branch IS NULL", (stage,)
+            ).fetchall()
+        else:
+            rows = self.connection.execute(
+                "SELECT entry_id, stage, path FROM entries "
+                "WHERE branch = ? AND (? IS NULL OR stage = ?)",
+                (branch, stage, stage)
+            ).fetchall()
+        if len(rows) == 0:
+            raise ValueError("Unknown stage '%s' or branch '%s'" % (
+                stage, branch
+            ))
+        if len(rows) > 1 and branch is None:
+            raise ValueError(
+                "Several stages are named '%s', their log files are %s"
+                % (stage, ", ".join(row[2] for row in rows)))
+        if len(rows) > 1:
+            raise ValueError(
+                "The branch '%s' exists in the stages %s, a stage is needed"
+                % (branch, ", ".join(row[1] for row in rows)))
+        written = 0
+        for node_id, step in self.connection.execute(
+            "SELECT members.node_id, nodes.step FROM members "
+            "JOIN nodes ON nodes.node_id = members.node_id "
+            "WHERE entry_id = ? ORDER BY seq", (rows[0][0],)
+        ).fetchall():
+            self._write_node(stream, node_id, step)
+            written += 1
+        return written
+
+    def _write_node(self, stream, node_id, step):
+        """
+        Internal method writing the header and the log ranges of a node
+
+        :param stream: the binary output stream
+        :param node_id: the node id
+        :param step: the step type of the node
+        """
+        stream.write(HEADER.format(node_id, step).encode())
+        log = self._log()
+        for start, end in self.connection.execute(
+            "SELECT start_byte, end_byte FROM ranges WHERE node_id = ? "
+            "ORDER BY rowid", (node_id,)
+        ):
+            log.seek(start)
+            stream.write(log.read(end - start))
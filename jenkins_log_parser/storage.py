@@ -0,0 +1,452 @@
+"""
+The storage module providing uniform access to the files of a Jenkins build
+log, no matter if they are located in a directory or in a zip archive
+"""
+import abc
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import zipfile
+
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\003\004"
+
+
+def open_storage(log_location):
+    """
+    Creates the storage fitting to the log location
+
+    :param log_location: The directory or zip archive of the log data
+    :returns: A DirectoryStorage or ZipStorage object
+    """
+    if os.path.isdir(log_location):
+        return DirectoryStorage(log_location)
+    if log_location.endswith(".zip"):
+        return ZipStorage(log_location)
+    raise ValueError(
+        "The log location '%s' is neither a directory nor a zip archive"
+        % log_location)
+
+
+class Storage(abc.ABC):
+    """
+    The Storage class is the base of all storage backends. After
+    construction the names of the log-index, the raw log and the workflow
+    directories inside the storage are known. Backends implement the
+    abstract methods.
+    """
+    def __init__(self, location):
+        """
+        Constructor
+
+        :param location: the location of the storage
+        """
+        self.location = location
+        self.log_index = None
+        self.log_file = None
+        self.workflow_dirs = list()
+        self.log_map = None
+        self.log_view = None
+        self.log_offset = 0
+        self.log_source = None
+
+    def _check_layout(self):
+        """
+        Internal method making sure the needed files were found
+        """
+        if self.log_index is None or self.log_file is None:
+            raise FileNotFoundError(
+                "No log-index and log file found in '%s'" % self.location)
+
+    @abc.abstractmethod
+    def scan_node_files(self) -> dict:
+        """
+        Scans the workflow directories in a single pass for the xml node
+        files.
+
+        :returns: A dictionary of the node file name without extension mapped
+            to the name of the file inside the storage
+        """
+
+    @abc.abstractmethod
+    def open(self, name):
+        """
+        Opens a file of the storage for reading
+
+        :param name: the name of the file inside the storage
+        :returns: a binary file object
+        """
+
+    @abc.abstractmethod
+    def map_log(self) -> memoryview:
+        """
+        Memory maps the raw log once.
+
+        :returns: A memoryview over the whole log or None if the log is empty
+        """
+
+    @abc.abstractmethod
+    def fingerprint(self) -> str:
+        """
+        Creates a fingerprint which changes whenever the content of the
+        storage changes
+
+        :returns: the fingerprint as hex string
+        """
+
+    @abc.abstractmethod
+    def open_log_source(self) -> tuple:
+        """
+        Opens the raw log once for copying byte ranges out of it by file
+        descriptor, e.g. with os.copy_file_range
+
+        :returns: a tuple of the file descriptor and the offset of the log
+            inside the file or None if the log is empty
+        """
+
+    def advise_log(self, spans):
+        """
+        Announces byte ranges of the raw log which are read soon, for the
+        memory mapped log with madvise and for the log opened by file
+        descriptor with posix_fadvise, where the platform provides them
+
+        :param spans: a list of (start, end) tuples in the log
+        """
+        if self.log_map is not None and hasattr(self.log_map, "madvise"):
+            for start, end in spans:
+                start += self.log_offset
+                aligned = start - start % mmap.PAGESIZE
+                try:
+                    self.log_map.madvise(
+                        mmap.MADV_WILLNEED,
+                        aligned,
+                        end + self.log_offset - aligned
+                    )
+                except (OSError, ValueError):
+                    # the mapping has been released meanwhile, e.g. on a
+                    # remap of a growing log
+                    break
+        if self.log_source is not None and hasattr(os, "posix_fadvise"):
+            fd_in, offset = self.log_source
+            for start, end in spans:
+                os.posix_fadvise(
+                    fd_in, offset + start, end - start,
+                    os.POSIX_FADV_WILLNEED
+                )
+
+    def close(self):
+        """
+        Releases the memory mapped log and all other resources
+        """
+        if self.log_source is not None:
+            os.close(self.log_source[0])
+            self.log_source = None
+        if self.log_view is not None:
+            self.log_view.release()
+            self.log_view = None
+        if self.log_map is not None:
+            try:
+                self.log_map.close()
+            except BufferError:
+                # slices of the log are still in use somewhere, the mapping
+                # is released with the last of them
+                pass
+            self.log_map = None
+
+    def _map_stream(self, stream, offset: int, size: int) -> memoryview:
+        """
+        Internal method memory mapping a part of a file
+
+        :param stream: the binary file object to map
+        :param offset: the offset of the part in the file
+        :param size: the size of the part
+        :returns: a memoryview over the part or None if the part is empty
+        """
+        if size == 0:
+            return None
+        aligned = offset - offset % mmap.ALLOCATIONGRANULARITY
+        self.log_map = mmap.mmap(
+            stream.fileno(),
+            offset - aligned + size,
+            access=mmap.ACCESS_READ,
+            offset=aligned
+        )
+        self.log_offset = offset - aligned
+        self.log_view = memoryview(self.log_map)[
+            self.log_offset:self.log_offset + size
+        ]
+        return self.log_view
+
+
+class DirectoryStorage(Storage):
+    """
+    The DirectoryStorage class provides the files of a build log directory
+    """
+    def __init__(self, location):
+        """
+        Constructor, walking the directory once
+
+        :param location: the build log directory
+        """
+        super().__init__(os.path.realpath(location))
+        for dirpath, dirnames, filenames in os.walk(self.location):
+            dirnames.sort()
+            if self.log_index is None and "log-index" in filenames:
+                self.log_index = os.path.join(dirpath, "log-index")
+            if self.log_file is None and "log" in filenames:
+                self.log_file = os.path.join(dirpath, "log")
+            if os.path.basename(dirpath) == "workflow":
+                self.workflow_dirs.append(dirpath)
+        self._check_layout()
+
+    def scan_node_files(self) -> dict:
+        """
+        Scans the workflow directories in a single pass for the xml node
+        files.
+
+        :returns: A dictionary of the node file name without extension mapped
+            to the path of the file
+        """
+        node_files = dict()
+        for workflow_dir in self.workflow_dirs:
+            with os.scandir(workflow_dir) as entries:
+                for entry in entries:
+                    if (
+                        entry.name.endswith(".xml") and
+                        not entry.name.startswith(".") and
+                        entry.is_file()
+                    ):
+                        node_files.update({
+                            entry.name[:-len(".xml")]: entry.path
+                        })
+        return node_files
+
+    def fingerprint(self) -> str:
+        """
+        Creates a fingerprint out of the sizes and modification times of the
+        log-index, the log and all node files
+
+        :returns: the fingerprint as hex string
+        """
+        digest = hashlib.sha256(self.location.encode())
+        names = [self.log_index, self.log_file]
+        names.extend(sorted(self.scan_node_files().values()))
+        for name in names:
+            stat = os.stat(name)
+            digest.update("{}:{}:{}\n".format(
+                os.path.relpath(name, self.location),
+                stat.st_size,
+                stat.st_mtime_ns
+            ).encode())
+        return digest.hexdigest()
+
+    def open(self, name):
+        """
+        Opens a file of the directory for reading
+
+        :param name: the path of the file
+        :returns: a binary file object
+        """
+        return open(name, "rb")
+
+    def open_log_source(self) -> tuple:
+        """
+        Opens the raw log file once for copying byte ranges out of it by
+        file descriptor
+
+        :returns: a tuple of the file descriptor and the offset 0 or None if
+            the log file is empty
+        """
+        if self.log_source is None and os.path.getsize(self.log_file) > 0:
+            self.log_source = (os.open(self.log_file, os.O_RDONLY), 0)
+        return self.log_source
+
+    def map_log(self) -> memoryview:
+        """
+        Memory maps the raw log file once.
+
+        :returns: A memoryview over the whole log file or None if the log
+            file is empty
+        """
+        if self.log_view is None:
+            with open(self.log_file, "rb") as stream:
+                self._map_stream(
+                    stream, 0, os.fstat(stream.fileno()).st_size
+                )
+        return self.log_view
+
+    def remap_log(self) -> memoryview:
+        """
+        Memory maps the raw log file again if it has grown since the last
+        mapping, so the log is covered completely. The former mapping is not
+        released, it stays valid for the views still using it and is unmapped
+        with the last of them.
+
+        :returns: A memoryview over the whole log file or None if the log
+            file is empty
+        """
+        if (
+            self.log_view is not None and
+            len(self.log_view) >= os.path.getsize(self.log_file)
+        ):
+            return self.log_view
+        self.log_view = None
+        self.log_map = None
+        return self.map_log()
+
+
+class ZipStorage(Storage):
+    """
+    The ZipStorage class reads the files of a build log straight out of a zip
+    archive without extracting it.
+    """
+    def __init__(self, location):
+        """
+        Constructor, reading the member list of the archive once
+
+        :param location: the zip archive
+        """
+        super().__init__(os.path.realpath(location))
+        self.archive = zipfile.ZipFile(self.location)
+        self.lock = threading.Lock()
+        self.spill = None
+        for name in sorted(self.archive.namelist()):
+            if name.endswith("/"):
+                continue
+            dirname, basename = name.rpartition("/")[::2]
+            if self.log_index is None and basename == "log-index":
+                self.log_index = name
+            if self.log_file is None and basename == "log":
+                self.log_file = name
+            if (
+                dirname.rpartition("/")[2] == "workflow" and
+                dirname not in self.workflow_dirs
+            ):
+                self.workflow_dirs.append(dirname)
+        self._check_layout()
+
+    def scan_node_files(self) -> dict:
+        """
+        Collects the xml node files out of the member list of the archive
+
+        :returns: A dictionary of the node file name without extension mapped
+            to the member name inside the archive
+        """
+        node_files = dict()
+        for name in self.archive.namelist():
+            dirname, basename = name.rpartition("/")[::2]
+            if (
+                dirname in self.workflow_dirs and
+                basename.endswith(".xml") and
+                not basename.startswith(".")
+            ):
+                node_files.update({basename[:-len(".xml")]: name})
+        return node_files
+
+    def fingerprint(self) -> str:
+        """
+        Creates a fingerprint out of the content of the whole archive
+
+        :returns: the fingerprint as hex string
+        """
+        digest = hashlib.sha256()
+        with open(self.location, "rb") as stream:
+            for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def open(self, name):
+        """
+        Opens a member of the archive for reading
+
+        :param name: the member name
+        :returns: a binary file object
+        """
+        # opening is not thread safe, reading the opened members is
+        with self.lock:
+            return self.archive.open(name)
+
+    def map_log(self) -> memoryview:
+        """
+        Memory maps the raw log once. A stored (uncompressed) log member is
+        mapped directly out of the archive, a compressed one is decompressed
+        into a temporary file first.
+
+        :returns: A memoryview over the whole log or None if the log is empty
+        """
+        if self.log_view is not None:
+            return self.log_view
+        info = self.archive.getinfo(self.log_file)
+        offset = self._stored_offset(info)
+        if offset is not None:
+            with open(self.location, "rb") as stream:
+                return self._map_stream(stream, offset, info.file_size)
+        self._spill_log()
+        return self._map_stream(self.spill, 0, info.file_size)
+
+    def open_log_source(self) -> tuple:
+        """
+        Opens the raw log once for copying byte ranges out of it by file
+        descriptor. A stored log member is read directly out of the archive,
+        a compressed one out of the temporary file it is decompressed into.
+
+        :returns: a tuple of the file descriptor and the offset of the log
+            inside the file or None if the log is empty
+        """
+        if self.log_source is not None:
+            return self.log_source
+        info = self.archive.getinfo(self.log_file)
+        if info.file_size == 0:
+            return None
+        offset = self._stored_offset(info)
+        if offset is not None:
+            self.log_source = (os.open(self.location, os.O_RDONLY), offset)
+        else:
+            self._spill_log()
+            self.log_source = (os.dup(self.spill.fileno()), 0)
+        return self.log_source
+
+    def _stored_offset(self, info) -> int:
+        """
+        Internal method locating the data of an uncompressed member inside
+        the archive file
+
+        :param info: the ZipInfo of the member
+        :returns: the offset of the data or None if the member is compressed
+        """
+        if info.compress_type != zipfile.ZIP_STORED:
+            return None
+        with open(self.location, "rb") as stream:
+            stream.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(stream.read(_LOCAL_HEADER.size))
+        if header[0] != _LOCAL_HEADER_SIGNATURE:
+            return None
+        return (
+            info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+        )
+
+    def _spill_log(self):
+        """
+        Internal method decompressing the raw log once into a temporary file
+        """
+        if self.spill is not None:
+            return
+        self.spill = tempfile.TemporaryFile()
+        with self.archive.open(self.log_file) as member:
+            shutil.copyfileobj(member, self.spill, 1024 * 1024)
+        self.spill.flush()
+
+    def close(self):
+        """
+        Releases the memory mapped log, the temporary file of a compressed
+        log and the archive
+        """
+        super().close()
+        if self.spill is not None:
+            self.spill.close()
+            self.spill = None
+        self.archive.close()
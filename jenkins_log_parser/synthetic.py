@@ -0,0 +1,372 @@
+#! /usr/bin/env python3
+
+"""
+The synthetic module generating Jenkins builds for tests and benchmarks:
+workflow node xml files with stages and parallel branches, the log-index and
+the raw log, written as build directory or zip archive
+"""
+import argparse
+import os
+import random
+import zipfile
+
+FLOW_START = "cps.n.FlowStartNode"
+FLOW_END = "cps.n.FlowEndNode"
+STEP_START = "cps.n.StepStartNode"
+STEP_END = "cps.n.StepEndNode"
+STEP_ATOM = "cps.n.StepAtomNode"
+STAGE_STEP = "org.jenkinsci.plugins.workflow.support.steps.StageStep"
+PARALLEL_STEP = "org.jenkinsci.plugins.workflow.cps.steps.ParallelStep"
+ATOM_STEPS = [
+    "org.jenkinsci.plugins.workflow.steps.EchoStep",
+    "org.jenkinsci.plugins.workflow.steps.durable_task.ShellStep",
+    "org.jenkinsci.plugins.workflow.steps.durable_task.ShellStep",
+    "org.jenkinsci.plugins.workflow.steps.SleepStep",
+]
+LABEL_ACTION = """\
+    <wf.a.LabelAction plugin="workflow-api@2.40">
+      <displayName>{}</displayName>
+    </wf.a.LabelAction>
+"""
+BRANCH_ACTION = """\
+    <org.jenkinsci.plugins.workflow.cps.steps.ParallelStepExecution_-\
+ParallelLabelAction plugin="workflow-cps@2.80">
+      <branchName>{}</branchName>
+    </org.jenkinsci.plugins.workflow.cps.steps.ParallelStepExecution_-\
+ParallelLabelAction>
+"""
+TIMING_ACTION = """\
+    <wf.a.TimingAction plugin="workflow-api@2.40">
+      <startTime>{}</startTime>
+    </wf.a.TimingAction>
+"""
+START_TIME = 1600000000000
+
+
+class SyntheticBuild:
+    """
+    The SyntheticBuild class writes a build which resembles the ones Jenkins
+    archives. Stages consist of an unlabeled and a labeled StepStartNode,
+    parallel steps of a start node, one start node per branch and a join
+    node with the ends of all branches as parents. Every block is closed by
+    a StepEndNode with the startId of its start node. The structure is
+    random but reproducible with the seed.
+    """
+    def __init__(
+        self,
+        path,
+        nodes: int = 1000,
+        depth: int = 2,
+        fanout: int = 3,
+        steps: int = 20,
+        log_lines: int = 2,
+        seed: int = 1
+    ):
+        """
+        Constructor
+
+        :param path: the build directory or, ending with .zip, the archive
+        :param nodes: the number of workflow nodes (optional)
+        :param depth: the maximum nesting depth of stages and parallel steps
+            below the top level stages (optional)
+        :param fanout: the maximum number of branches of a parallel step
+            (optional)
+        :param steps: the maximum number of steps in a block (optional)
+        :param log_lines: the mean number of log lines of a step (optional)
+        :param seed: the seed of the random structure (optional)
+        """
+        self.path = path
+        self.nodes = max(nodes, 2)
+        self.depth = depth
+        self.fanout = max(fanout, 1)
+        self.steps = max(steps, 1)
+        self.log_lines = log_lines
+        self.random = random.Random(seed)
+        self.next_id = 2
+        self.reserved = 0
+        self.log = bytearray()
+        self.index = list()
+        self.archive = None
+        self.stats = {
+            "nodes": 0,
+            "stages": 0,
+            "branches": 0,
+            "log_bytes": 0
+        }
+
+    def _free(self) -> int:
+        """
+        Internal method providing the number of nodes which can still be
+        added, besides the FlowEndNode and the end nodes of the open blocks
+
+        :returns: the number of nodes
+        """
+        return self.nodes - (self.next_id - 2) - 1 - self.reserved
+
+    def _node(
+        self,
+        node_class,
+        parents,
+        descriptor=None,
+        actions="",
+        start=None
+    ) -> int:
+        """
+        Internal method creating the xml file of a node
+
+        :param node_class: the class attribute of the node
+        :param parents: the list of parent ids
+        :param descriptor: the descriptorId (optional)
+        :param actions: the xml of the additional actions (optional)
+        :param start: the startId of an end node (optional)
+        :returns: the node id
+        """
+        node_id = self.next_id
+        self.next_id += 1
+        lines = [
+            "<?xml version='1.1' encoding='UTF-8'?>",
+            "<Tag plugin=\"workflow-support@3.5\">",
+            "  <node class=\"{}\" plugin=\"workflow-cps@2.80\">".format(
+                node_class
+            ),
+        ]
+        if len(parents) == 0:
+            lines.append("    <parentIds/>")
+        else:
+            lines.append("    <parentIds>")
+            lines.extend(
+                "      <string>{}</string>".format(parent)
+                for parent in parents
+            )
+            lines.append("    </parentIds>")
+        lines.append("    <id>{}</id>".format(node_id))
+        if start is not None:
+            lines.append("    <startId>{}</startId>".format(start))
+        if descriptor is not None:
+            lines.append(
+                "    <descriptorId>{}</descriptorId>".format(descriptor)
+            )
+        lines.append("  </node>")
+        lines.append("  <actions>")
+        content = "\n".join(lines) + "\n" + actions + TIMING_ACTION.format(
+            START_TIME + node_id
+        ) + "  </actions>\n</Tag>\n"
+        self._write(
+            "workflow/{}.xml".format(node_id), content.encode("utf-8")
+        )
+        return node_id
+
+    def _emit(self, node_id, text: str):
+        """
+        Internal method appending the output of a node to the log
+
+        :param node_id: the node id, None for output without node
+        :param text: the output
+        """
+        if node_id is None:
+            self.index.append("{}".format(len(self.log)))
+        else:
+            self.index.append("{} {}".format(len(self.log), node_id))
+        self.log += text.encode("utf-8")
+
+    def _steps(self, parent, level, prefix) -> int:
+        """
+        Internal method creating a block of steps, stages and parallel steps
+
+        :param parent: the id of the node opening the block
+        :param level: the current nesting depth
+        :param prefix: the name prefix of nested stages and branches
+        :returns: the id of the last node of the block
+        """
+        last = parent
+        for i in range(self.random.randint(1, self.steps)):
+            free = self._free()
+            if free < 1:
+                break
+            choice = self.random.random()
+            nested = level < self.depth and free >= 4
+            if choice < 0.1 and nested:
+                last = self._stage(
+                    last, level + 1, "{}-s{}".format(prefix, i)
+                )
+            elif choice < 0.15 and nested:
+                last = self._parallel(
+                    last, level + 1, "{}-p{}".format(prefix, i)
+                )
+            else:
+                last = self._node(
+                    STEP_ATOM, [last], self.random.choice(ATOM_STEPS)
+                )
+                if self.random.random() < 0.3:
+                    self._emit(None, "[Pipeline] {}\n".format(
+                        "sh" if self.random.random() < 0.5 else "echo"
+                    ))
+                lines = self.random.randint(0, 2 * self.log_lines)
+                if lines > 0:
+                    self._emit(last, "".join(
+                        "+ step {} line {} é\n".format(last, line)
+                        for line in range(lines)
+                    ))
+        return last
+
+    def _stage(self, parent, level, name) -> int:
+        """
+        Internal method creating a stage with its steps, needs four free
+        nodes
+
+        :param parent: the id of the parent node
+        :param level: the nesting depth of the stage
+        :param name: the name of the stage
+        :returns: the id of the end node of the stage
+        """
+        self.stats.update({"stages": self.stats.get("stages") + 1})
+        self.reserved += 2
+        outer = self._node(STEP_START, [parent], STAGE_STEP)
+        inner = self._node(
+            STEP_START, [outer], STAGE_STEP, LABEL_ACTION.format(name)
+        )
+        self._emit(None, "[Pipeline] {{ ({})\n".format(name))
+        last = self._steps(inner, level, name)
+        self.reserved -= 1
+        last = self._node(STEP_END, [last], STAGE_STEP, start=inner)
+        self.reserved -= 1
+        return self._node(STEP_END, [last], STAGE_STEP, start=outer)
+
+    def _parallel(self, parent, level, prefix) -> int:
+        """
+        Internal method creating a parallel step with its branches, needs
+        four free nodes
+
+        :param parent: the id of the parent node
+        :param level: the nesting depth of the parallel step
+        :param prefix: the name prefix of the branches
+        :returns: the id of the join node
+        """
+        self.reserved += 1
+        start = self._node(STEP_START, [parent], PARALLEL_STEP)
+        branches = list()
+        for i in range(self.random.randint(1, self.fanout)):
+            if self._free() < 2:
+                break
+            self.reserved += 1
+            branches.append(self._node(
+                STEP_START,
+                [start],
+                PARALLEL_STEP,
+                BRANCH_ACTION.format("{}-b{}".format(prefix, i))
+            ))
+        self.stats.update({
+            "branches": self.stats.get("branches") + len(branches)
+        })
+        ends = list()
+        for branch in branches:
+            last = self._steps(branch, level, "{}-b".format(prefix))
+            self.reserved -= 1
+            ends.append(self._node(
+                STEP_END, [last], PARALLEL_STEP, start=branch
+            ))
+        self.reserved -= 1
+        return self._node(STEP_END, ends, PARALLEL_STEP, start=start)
+
+    def generate(self) -> dict:
+        """
+        Generates the whole build and writes it
+
+        :returns: a dictionary with the number of nodes, stages, branches
+            and the size of the log
+        """
+        if self.path.endswith(".zip"):
+            self.archive = zipfile.ZipFile(
+                self.path, "w", zipfile.ZIP_DEFLATED
+            )
+        else:
+            os.makedirs(os.path.join(self.path, "workflow"), exist_ok=True)
+        try:
+            last = self._node(FLOW_START, [])
+            stage = 0
+            while self._free() >= 4:
+                last = self._stage(last, 0, "Stage {}".format(stage))
+                stage += 1
+            while self._free() > 0:
+                last = self._node(
+                    STEP_ATOM, [last], self.random.choice(ATOM_STEPS)
+                )
+            end = self._node(FLOW_END, [last])
+            self._emit(end, "Finished: SUCCESS\n")
+            self._write(
+                "log-index", ("\n".join(self.index) + "\n").encode()
+            )
+            self._write("log", bytes(self.log))
+        finally:
+            if self.archive is not None:
+                self.archive.close()
+                self.archive = None
+        self.stats.update({
+            "nodes": self.next_id - 2,
+            "log_bytes": len(self.log)
+        })
+        return self.stats
+
+    def _write(self, name, content: bytes):
+        """
+        Internal method writing a file into the directory or the zip archive
+
+        :param name: the name of the file relative to the build
+        :param content: the content of the file
+        """
+        if self.archive is not None:
+            self.archive.writestr(name, content)
+            return
+        with open(os.path.join(self.path, name), "wb") as stream:
+            stream.write(content)
+
+
+def generate_build(path, **kwargs) -> dict:
+    """
+    Generates a synthetic build
+
+    :param path: the build directory or, ending with .zip, the archive
+    :param kwargs: the parameters of SyntheticBuild
+    :returns: a dictionary with the number of nodes, stages, branches and
+        the size of the log
+    """
+    return SyntheticBuild(path, **kwargs).generate()
+
+
+def main():
+    """
+    Main function generating a build out of the command line arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "path",
+        type=str,
+        help="the build directory or, ending with .zip, the archive"
+    )
+    parser.add_argument("-n", "--nodes", type=int, default=1000)
+    parser.add_argument("-d", "--depth", type=int, default=2)
+    parser.add_argument("-f", "--fanout", type=int, default=3)
+    parser.add_argument("-s", "--steps", type=int, default=20)
+    parser.add_argument("-l", "--log-lines", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    stats = generate_build(
+        args.path,
+        nodes=args.nodes,
+        depth=args.depth,
+        fanout=args.fanout,
+        steps=args.steps,
+        log_lines=args.log_lines,
+        seed=args.seed
+    )
+    print("{}: {} nodes, {} stages, {} branches, {} log bytes".format(
+        args.path,
+        stats.get("nodes"),
+        stats.get("stages"),
+        stats.get("branches"),
+        stats.get("log_bytes")
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,43 +4,90 @@ The TreeWalker module
 from jenkins_log_parser.lognode import LogNode
 
 
+def walk_order(tree, start: int = None) -> list:
+    """
+    Computes the order in which the TreeWalker visits the nodes of a tree.
+
+    From the current node the walk proceeds to the first not yet visited
+    child. When there is none, it continues with the smallest not yet visited
+    node number of the whole tree. As the sorted node numbers and the child
+    lists are only scanned forward, the order is computed in linear time
+    after sorting.
+
+    :param tree: The tree structure BuildLog is providing
+    :param start: the node number to start from, which is itself not part of
+        the order (optional, by default the first root node is the start and
+        part of the order)
+    :returns: a list of node numbers in visiting order
+    """
+    keys = sorted(key for key in tree.keys() if key is not None)
+    visited = set()
+    order = list()
+    if start is None:
+        current = tree.get(None)[0]
+        order.append(current)
+    else:
+        current = start
+    visited.add(current)
+    key_pos = 0
+    while True:
+        following = None
+        for i in tree.get(current):
+            if i not in visited:
+                following = i
+                break
+        if following is None:
+            while key_pos < len(keys) and keys[key_pos] in visited:
+                key_pos += 1
+            if key_pos == len(keys):
+                return order
+            following = keys[key_pos]
+        current = following
+        visited.add(current)
+        order.append(current)
+
+
 class TreeWalker:
     """
     The TreeWalker class is meant for traversing the tree produced by
     the class BuildLog in an orderly manner.
     """
-    def __init__(self, nodes, tree):
+    def __init__(self, nodes, tree, ancestry=None):
         """
         Constructor
 
         :param nodes: The nodes how the class BuildLog is providing them
         :param tree: The tree structure BuildLog is providing
+        :param ancestry: The AncestorIndex BuildLog is providing, used for
+            ancestor checks when given (optional)
         """
         self.nodes = nodes
-        self.tree = tree.copy()
+        self.tree = tree
+        self.ancestry = ancestry
         self.current = None
-        self.done = []
+        self.order = None
+        self.position = 0
 
     def next(self) -> LogNode:
         """
         Proceed to the next LogNode and return it like the tree structure
         dictates
         """
-        if self.current is not None:
-            self.done.append(self.current)
-        else:
-            self.current = self.tree.get(self.current)[0]
-            del self.tree[None]
-            return self.nodes.get(self.current)
-        for i in self.tree.get(self.current):
-            if i not in self.done:
-                self.current = i
-                return self.nodes.get(self.current)
-        for i in sorted(self.tree.keys()):
-            if i not in self.done:
-                self.current = i
-                return self.nodes.get(self.current)
-        return None
+        if self.order is None:
+            self.order = walk_order(self.tree)
+        if self.position >= len(self.order):
+            return None
+        self.current = self.order[self.position]
+        self.position += 1
+        return self.nodes.get(self.current)
+
+    def reset(self):
+        """
+        Restarts the traversal from the beginning, reusing the already
+        computed order
+        """
+        self.current = None
+        self.position = 0
 
     def is_parent_node_of(self, probable_parent, node_no) -> bool:
         """
@@ -50,6 +97,12 @@ class TreeWalker:
         :param node_no: the node number to check
         :returns: True or False
         """
+        if (
+            self.ancestry is not None and
+            probable_parent in self.ancestry and
+            node_no in self.ancestry
+        ):
+            return self.ancestry.is_ancestor(probable_parent, node_no)
         current = node_no
         while current is not None:
             current = self.nodes.get(current).parent_id
@@ -64,6 +117,8 @@ class TreeWalker:
         :param node_no: the node to calculate
         :returns: the depth in integer
         """
+        if self.ancestry is not None and node_no in self.ancestry:
+            return self.ancestry.get_depth(node_no)
         current = node_no
         i = 0
         while current is not None:
@@ -92,4 +147,6 @@ class TreeWalker:
 
         :param node_no: the node number to start from
         """
+        self.order = walk_order(self.tree, node_no)
+        self.position = 0
         self.current = node_no
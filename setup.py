@@ -78,12 +78,14 @@ setup(
             "jenkins_log_parser"
         )
     ],
-    python_requires=">=3.5.2",
+    python_requires=">=3.7",
     dependency_links=[],
     setup_requires=[],
     tests_require=[],
     install_requires=[],
-    extras_require={},
+    extras_require={
+        "zstd": ["zstandard"],
+    },
     packages=[
         "jenkins_log_parser",
     ],
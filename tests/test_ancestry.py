@@ -0,0 +1,111 @@
+import unittest
+import random
+from jenkins_log_parser.ancestry import AncestorIndex
+from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.noderecord import LABEL_PATH, BRANCH_PATH
+from jenkins_log_parser.treewalker import TreeWalker
+
+
+class StubNode:
+    def __init__(self, node_no, parent_id, step=None, text=None):
+        self.node_no = node_no
+        self.parent_id = parent_id
+        self.step = step
+        self.text = text
+
+    def get_step(self):
+        return self.step
+
+    def get_path_text(self, path):
+        if (
+            (path == LABEL_PATH and self.step == "StageStep") or
+            (path == BRANCH_PATH and self.step == "ParallelStep")
+        ):
+            return self.text
+        return None
+
+
+def random_nodes(size, seed):
+    rnd = random.Random(seed)
+    nodes = {2: StubNode(2, None)}
+    for node_no in range(3, size + 2):
+        parent_id = rnd.choice([node_no - 1, rnd.randint(2, node_no - 1)])
+        step = rnd.choice([None, None, None, "StageStep", "ParallelStep"])
+        text = None
+        if step is not None and rnd.random() < 0.7:
+            text = "{}-{}".format(step, node_no)
+        nodes[node_no] = StubNode(node_no, parent_id, step, text)
+    return nodes
+
+
+class TestAncestorIndex(unittest.TestCase):
+    def test_parity_with_parent_walks(self):
+        nodes = random_nodes(400, 3)
+        ancestry = AncestorIndex(nodes)
+        processor = LogProcessor(None)
+        plain = TreeWalker(nodes, {})
+        indexed = TreeWalker(nodes, {}, ancestry)
+        for node_no, node in nodes.items():
+            self.assertEqual(plain.depth(node_no), indexed.depth(node_no))
+            self.assertEqual(
+                processor.get_parent_stage(node, plain),
+                processor.get_parent_stage(node, indexed))
+            self.assertEqual(
+                processor.get_parent_parallel(node, plain),
+                processor.get_parent_parallel(node, indexed))
+        rnd = random.Random(5)
+        for _ in range(2000):
+            parent = rnd.randint(2, 401)
+            node_no = rnd.randint(2, 401)
+            self.assertEqual(
+                plain.is_parent_node_of(parent, node_no),
+                indexed.is_parent_node_of(parent, node_no))
+
+    def test_index_values(self):
+        nodes = {
+            2: StubNode(2, None),
+            3: StubNode(3, 2, "StageStep", "Build"),
+            4: StubNode(4, 3, "ParallelStep", "linux"),
+            5: StubNode(5, 4),
+            6: StubNode(6, 3),
+        }
+        ancestry = AncestorIndex(nodes)
+        self.assertEqual(4, ancestry.get_depth(5))
+        self.assertEqual("Build", ancestry.get_stage(5))
+        self.assertIsNone(ancestry.get_stage(3))
+        self.assertEqual("linux", ancestry.get_branch(5))
+        self.assertIsNone(ancestry.get_branch(6))
+        self.assertTrue(ancestry.is_ancestor(3, 5))
+        self.assertFalse(ancestry.is_ancestor(5, 3))
+        self.assertFalse(ancestry.is_ancestor(6, 5))
+        self.assertFalse(ancestry.is_ancestor(5, 5))
+
+    def test_added_nodes(self):
+        nodes = random_nodes(400, 7)
+        complete = AncestorIndex(nodes)
+        grown = dict((k, v) for k, v in nodes.items() if k < 200)
+        ancestry = AncestorIndex(grown)
+        for node_no in range(200, 402):
+            grown.update({node_no: nodes.get(node_no)})
+            self.assertTrue(ancestry.add(node_no))
+        for node_no in nodes:
+            self.assertEqual(
+                complete.get_depth(node_no), ancestry.get_depth(node_no))
+            self.assertEqual(
+                complete.get_stage(node_no), ancestry.get_stage(node_no))
+            self.assertEqual(
+                complete.get_branch(node_no), ancestry.get_branch(node_no))
+        rnd = random.Random(9)
+        for _ in range(2000):
+            parent = rnd.randint(2, 401)
+            node_no = rnd.randint(2, 401)
+            self.assertEqual(
+                complete.is_ancestor(parent, node_no),
+                ancestry.is_ancestor(parent, node_no))
+
+    def test_orphans(self):
+        nodes = {2: StubNode(2, None), 4: StubNode(4, 3)}
+        ancestry = AncestorIndex(nodes)
+        self.assertSetEqual({3}, ancestry.orphans)
+        nodes.update({5: StubNode(5, 3)})
+        self.assertFalse(ancestry.add(5))
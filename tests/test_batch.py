@@ -0,0 +1,57 @@
+import unittest
+import os
+import tempfile
+from jenkins_log_parser.batch import (
+    expand_locations, build_targets, process_build, format_summary
+)
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = self.tempdir.name
+        for build in ("1", "2"):
+            os.makedirs(os.path.join(self.root, "builds", build, "workflow"))
+        for archive in ("a.zip", "b.zip"):
+            with open(os.path.join(self.root, archive), "wb") as stream:
+                stream.write(b"")
+        os.makedirs(
+            os.path.join(self.root, "extracted", "job", "7", "workflow"))
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_expand_locations(self):
+        builds = expand_locations([
+            os.path.join(self.root, "builds"),
+            os.path.join(self.root, "*.zip"),
+            os.path.join(self.root, "builds", "1"),
+            os.path.join(self.root, "extracted")
+        ])
+        self.assertListEqual([
+            os.path.join(self.root, "builds", "1"),
+            os.path.join(self.root, "builds", "2"),
+            os.path.join(self.root, "a.zip"),
+            os.path.join(self.root, "b.zip"),
+            os.path.join(self.root, "builds", "1"),
+            os.path.join(self.root, "extracted")
+        ], builds)
+
+    def test_build_targets(self):
+        targets = build_targets(
+            ["x/1", "x/a.zip", "y/1/", "z/1"], "target")
+        self.assertListEqual([
+            os.path.join("target", "1"),
+            os.path.join("target", "a"),
+            os.path.join("target", "1_2"),
+            os.path.join("target", "1_3")
+        ], targets)
+
+    def test_process_build_failure(self):
+        result = process_build(
+            os.path.join(self.root, "a.zip"),
+            os.path.join(self.root, "target", "a")
+        )
+        self.assertIsNotNone(result.get("error"))
+        self.assertIn("FAILED", format_summary([result], 1.0))
+        self.assertIn("1 failed", format_summary([result], 1.0))
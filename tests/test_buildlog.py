@@ -1,7 +1,22 @@
 import unittest
+import asyncio
 import os
 import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+
+NODE_XML = """<?xml version='1.1' encoding='UTF-8'?>
+<Tag plugin="workflow-support">
+  <node class="cps.n.{cls}" plugin="workflow-cps">
+    <parentIds>{parents}</parentIds>
+    <id>{node}</id>
+    <descriptorId>org.jenkinsci.plugins.workflow.{step}</descriptorId>
+  </node>
+  <actions>{actions}</actions>
+</Tag>
+"""
 
 
 class TestLogNode(unittest.TestCase):
@@ -35,6 +50,14 @@ class TestLogNode(unittest.TestCase):
         self.assertTrue(5 in nodes.keys())
         self.assertTrue(1003 in nodes.keys())
 
+    def test_node_files(self):
+        node_files = self.buildlog.scan_node_files()
+        self.assertEqual(len(self.buildlog.nodes), len(node_files))
+        self.assertTrue(
+            node_files.get("5").endswith(os.path.join("workflow", "5.xml")))
+        self.assertEqual(
+            node_files.get("5"), self.buildlog.nodes.get(5).node_file)
+
     def test_node_log_collect(self):
         self.buildlog.collect_nodes_logs()
 
@@ -52,3 +75,165 @@ class TestLogNode(unittest.TestCase):
         self.assertEqual(tree.get(4), [5])
         self.assertEqual(tree.get(3), [4])
         self.assertEqual(tree.get(119), [126, 127, 128, 129, 130, 131, 132])
+
+
+class TempBuildCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.build_dir = os.path.join(self.tempdir.name, "build")
+        self.target = os.path.join(self.tempdir.name, "target")
+        os.makedirs(os.path.join(self.build_dir, "workflow"))
+        os.makedirs(self.target)
+        self.write_node(2, None, "FlowStartNode", "")
+        self.write_node(
+            3, 2, "StepStartNode", "support.steps.StageStep",
+            "<wf.a.LabelAction><displayName>Build</displayName>"
+            "</wf.a.LabelAction>")
+        self.write_node(4, 3, "StepStartNode", "support.steps.StageStep")
+        self.write("log", b"")
+        self.write("log-index", b"")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write(self, name, data, mode="wb"):
+        with open(os.path.join(self.build_dir, name), mode) as stream:
+            stream.write(data)
+
+    def write_node(self, node, parent, cls, step, actions=""):
+        self.write(
+            os.path.join("workflow", "%d.xml" % node),
+            NODE_XML.format(
+                node=node, cls=cls, step=step,
+                parents="" if parent is None else
+                "<string>%d</string>" % parent,
+                actions=actions
+            ).encode()
+        )
+
+
+class TestRefresh(TempBuildCase):
+    def test_refresh(self):
+        build_log = BuildLog(self.build_dir, lazy=True)
+        processor = LogProcessor(self.target)
+        changes = build_log.refresh()
+        self.assertListEqual([2, 3, 4], changes.get("nodes"))
+        self.assertListEqual([], changes.get("ranges"))
+        processor.append(
+            build_log.nodes, build_log.tree, changes, build_log.ancestry)
+
+        self.write("log", b"first\nsec")
+        self.write("log-index", b"0 4\n6 5\n")
+        changes = build_log.refresh()
+        # node 5 has no xml file yet, its line waits
+        self.assertListEqual([(4, 0, 6)], changes.get("ranges"))
+        processor.append(
+            build_log.nodes, build_log.tree, changes, build_log.ancestry)
+
+        self.write_node(5, 4, "StepAtomNode", "steps.EchoStep")
+        self.write("log", b"ond\nthird\n", "ab")
+        self.write("log-index", b"13 4\n1", "ab")
+        changes = build_log.refresh()
+        self.assertListEqual([5], changes.get("nodes"))
+        # the incomplete line leaves the end of the range open
+        self.assertListEqual([(5, 6, 13)], changes.get("ranges"))
+        self.assertEqual("Build", build_log.ancestry.get_stage(5))
+        self.assertListEqual([5], build_log.tree.get(4))
+        processor.append(
+            build_log.nodes, build_log.tree, changes, build_log.ancestry)
+
+        self.write("log-index", b"9\n", "ab")
+        changes = build_log.refresh()
+        self.assertListEqual([(4, 13, 19)], changes.get("ranges"))
+        processor.append(
+            build_log.nodes, build_log.tree, changes, build_log.ancestry)
+        self.assertEqual("first\nthird\n", build_log.nodes.get(4).get_log())
+        self.assertEqual("second\n", build_log.nodes.get(5).get_log())
+        with open(os.path.join(self.target, "Build.log"), "rb") as stream:
+            self.assertEqual(
+                b">>> NodeID: 4, Step: StageStep\nfirst\n"
+                b">>> NodeID: 5, Step: EchoStep\nsecond\n"
+                b">>> NodeID: 4, Step: StageStep\nthird\n",
+                stream.read())
+        build_log.close()
+
+    def test_refresh_without_new_data(self):
+        self.write_node(5, 4, "StepAtomNode", "steps.EchoStep")
+        build_log = BuildLog(self.build_dir, lazy=True)
+        self.write("log", b"first\n")
+        self.write("log-index", b"0 4\n")
+        build_log.refresh()
+        changes = build_log.refresh()
+        self.assertListEqual([], changes.get("nodes"))
+        self.assertListEqual([], changes.get("ranges"))
+        self.assertEqual("first\n", build_log.nodes.get(4).get_log())
+        # the log grows for another node only, node 4 keeps its mapping
+        self.write("log", b"second\n", "ab")
+        self.write("log-index", b"6 5\n", "ab")
+        changes = build_log.refresh()
+        self.assertListEqual([(5, 6, 13)], changes.get("ranges"))
+        self.assertEqual("first\n", build_log.nodes.get(4).get_log())
+        self.assertEqual("second\n", build_log.nodes.get(5).get_log())
+        build_log.close()
+
+    def test_refresh_partial_node_file(self):
+        build_log = BuildLog(self.build_dir, lazy=True, extractor="scan")
+        build_log.refresh()
+        self.write_node(
+            5, 4, "StepStartNode", "support.steps.StageStep",
+            "<wf.a.LabelAction><displayName>Test</displayName>"
+            "</wf.a.LabelAction>")
+        path = os.path.join(self.build_dir, "workflow", "5.xml")
+        with open(path, "rb") as stream:
+            data = stream.read()
+        self.write(
+            os.path.join("workflow", "5.xml"),
+            data[:data.find(b"</node>") + len(b"</node>") + 5])
+        # the file is still being written, it is read again next time
+        self.assertListEqual([], build_log.refresh().get("nodes"))
+        self.write(os.path.join("workflow", "5.xml"), data)
+        self.assertListEqual([5], build_log.refresh().get("nodes"))
+        self.assertEqual("Test", build_log.nodes.get(5).get_record().label)
+        build_log.close()
+
+
+class TestCollectNodesAsync(TempBuildCase):
+    def test_parity(self):
+        for lazy in (False, True):
+            serial = BuildLog(self.build_dir, lazy=lazy)
+            concurrent = BuildLog(self.build_dir, lazy=lazy)
+            nodes = serial.collect_nodes()
+            loaded = asyncio.run(concurrent.collect_nodes_async(2))
+            self.assertListEqual(sorted(nodes.keys()), sorted(loaded.keys()))
+            for node_no, node in nodes.items():
+                other = loaded.get(node_no)
+                self.assertEqual(node.node_file, other.node_file)
+                self.assertEqual(node.parent_id, other.parent_id)
+                self.assertEqual(node.get_step(), other.get_step())
+            self.assertEqual(
+                "Build", loaded.get(3).get_path_text(
+                    "./actions/wf.a.LabelAction/displayName"))
+            serial.close()
+            concurrent.close()
+
+    def test_process_executor(self):
+        build_log = BuildLog(self.build_dir, lazy=True)
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(ValueError):
+                asyncio.run(build_log.collect_nodes_async(2, executor))
+        build_log.close()
+
+
+class TestCollectNodesParallel(TempBuildCase):
+    def test_parity(self):
+        serial = BuildLog(self.build_dir, lazy=True)
+        parallel = BuildLog(self.build_dir)
+        nodes = serial.collect_nodes()
+        parsed = parallel.collect_nodes_parallel(processes=2, chunk_size=2)
+        self.assertListEqual(sorted(nodes.keys()), sorted(parsed.keys()))
+        for node_no, node in nodes.items():
+            self.assertEqual(node.node_file, parsed.get(node_no).node_file)
+            self.assertEqual(
+                node.get_record(), parsed.get(node_no).get_record())
+        serial.close()
+        parallel.close()
@@ -0,0 +1,108 @@
+import unittest
+import os
+import pickle
+import tempfile
+import zlib
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.cache import BuildCache
+from jenkins_log_parser.logindex import LogIndex
+from jenkins_log_parser.lognode import LogNode
+from jenkins_log_parser.noderecord import NodeRecord
+from jenkins_log_parser.synthetic import generate_build
+
+
+class TestBuildCache(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tempdir.name, "cache")
+        self.nodes = {
+            2: LogNode(2, node_file="workflow/2.xml", record=NodeRecord(
+                node_class="cps.n.StepStartNode",
+                descriptor_id="org.jenkinsci.plugins.workflow.support"
+                              ".steps.StageStep",
+                label="Build"
+            )),
+            3: LogNode(3, node_file="workflow/3.xml", record=NodeRecord(
+                node_class="cps.n.StepAtomNode",
+                descriptor_id="org.jenkinsci.plugins.workflow.steps.EchoStep",
+                parent_id=2
+            ))
+        }
+        self.tree = {2: [3], 3: []}
+        self.index = LogIndex()
+        self.index.parse([b"0 3", b"10", b"20 3"])
+        self.index.finish(30)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_roundtrip(self):
+        cache = BuildCache(self.cache_dir)
+        self.assertIsNone(cache.load("missing"))
+        cache.store("key", self.nodes, self.tree, self.index)
+        data = cache.load("key")
+        self.assertDictEqual(self.tree, data.get("tree"))
+        self.assertListEqual(
+            [
+                (2, "workflow/2.xml", self.nodes.get(2).get_record()),
+                (3, "workflow/3.xml", self.nodes.get(3).get_record())
+            ],
+            data.get("nodes")
+        )
+        self.assertIsNone(data.get("nodes")[0][2].parent_id)
+        self.assertListEqual(
+            [(0, 10), (20, 30)], data.get("index").get_ranges(3).ranges())
+
+    def test_build_tree(self):
+        build = os.path.join(self.tempdir.name, "build")
+        generate_build(build, nodes=30)
+        build_log = BuildLog(build, lazy=True)
+        build_log.collect_nodes()
+        tree = build_log.create_tree()
+        build_log.collect_nodes_logs()
+        build_log.close()
+        self.assertIn(None, tree)
+        cache = BuildCache(self.cache_dir)
+        cache.store("key", build_log.nodes, tree, build_log.index)
+        data = cache.load("key")
+        self.assertIsNotNone(data)
+        self.assertDictEqual(tree, data.get("tree"))
+        self.assertTrue(
+            os.path.exists(os.path.join(self.cache_dir, "key.cache")))
+
+    def test_corrupt_entry(self):
+        cache = BuildCache(self.cache_dir)
+        with open(os.path.join(self.cache_dir, "key.cache"), "wb") as stream:
+            stream.write(b"garbage")
+        self.assertIsNone(cache.load("key"))
+        self.assertListEqual([], os.listdir(self.cache_dir))
+
+    def test_damaged_entry(self):
+        cache = BuildCache(self.cache_dir)
+        cache.store("key", self.nodes, self.tree, self.index)
+        path = os.path.join(self.cache_dir, "key.cache")
+        with open(path, "rb") as stream:
+            data = zlib.decompress(stream.read())
+        for damaged in [
+            data[:-3],
+            data.replace(b'"tree": [[', b'"tree": [["x", '),
+            data.replace(b'"label": [', b'"label": [null, '),
+            pickle.dumps({"version": 4})
+        ]:
+            with open(path, "wb") as stream:
+                stream.write(zlib.compress(damaged))
+            self.assertIsNone(cache.load("key"))
+            self.assertFalse(os.path.exists(path))
+
+    def test_eviction(self):
+        cache = BuildCache(self.cache_dir)
+        cache.store("old", self.nodes, self.tree, self.index)
+        cache.store("new", self.nodes, self.tree, self.index)
+        size = os.path.getsize(os.path.join(self.cache_dir, "old.cache"))
+        os.utime(os.path.join(self.cache_dir, "old.cache"), (1, 1))
+        os.utime(os.path.join(self.cache_dir, "new.cache"), (2, 2))
+        # loading marks the entry as recently used
+        cache.load("old")
+        cache.max_size = size
+        cache.evict()
+        self.assertListEqual(["old.cache"], os.listdir(self.cache_dir))
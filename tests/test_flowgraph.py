@@ -0,0 +1,142 @@
+import unittest
+from jenkins_log_parser.ancestry import AncestorIndex
+from jenkins_log_parser.flowgraph import FlowGraph
+from jenkins_log_parser.lognode import LogNode
+from jenkins_log_parser.noderecord import NodeRecord
+from jenkins_log_parser.treewalker import TreeWalker
+
+STAGE = "org.jenkinsci.plugins.workflow.support.steps.StageStep"
+PARALLEL = "org.jenkinsci.plugins.workflow.cps.steps.ParallelStep"
+ECHO = "org.jenkinsci.plugins.workflow.steps.EchoStep"
+
+# node number, class, descriptor, parent ids, start id, label, branch name
+FLOW = [
+    (2, "cps.n.FlowStartNode", None, (), None, None, None),
+    (3, "cps.n.StepStartNode", STAGE, (2,), None, None, None),
+    (4, "cps.n.StepStartNode", STAGE, (3,), None, "Build", None),
+    (5, "cps.n.StepStartNode", PARALLEL, (4,), None, None, None),
+    (6, "cps.n.StepStartNode", PARALLEL, (5,), None, None, "a"),
+    (7, "cps.n.StepStartNode", PARALLEL, (5,), None, None, "b"),
+    (8, "cps.n.StepAtomNode", ECHO, (6,), None, None, None),
+    (9, "cps.n.StepAtomNode", ECHO, (7,), None, None, None),
+    (10, "cps.n.StepEndNode", PARALLEL, (8,), 6, None, None),
+    (11, "cps.n.StepEndNode", PARALLEL, (9,), 7, None, None),
+    (12, "cps.n.StepEndNode", PARALLEL, (10, 11), 5, None, None),
+    (13, "cps.n.StepAtomNode", ECHO, (12,), None, None, None),
+    (14, "cps.n.StepEndNode", STAGE, (13,), 4, None, None),
+    (15, "cps.n.StepEndNode", STAGE, (14,), 3, None, None),
+    (16, "cps.n.StepAtomNode", ECHO, (15,), None, None, None),
+    (17, "cps.n.FlowEndNode", None, (16,), None, None, None),
+]
+
+
+def create_nodes(flow) -> dict:
+    nodes = dict()
+    for node_no, node_class, descriptor, parents, start, label, branch in (
+        flow
+    ):
+        record = NodeRecord(
+            node_class=node_class,
+            descriptor_id=descriptor,
+            label=label,
+            branch_name=branch,
+            start_id=start
+        )
+        for parent_id in parents:
+            record.add_parent_id(parent_id)
+        nodes[node_no] = LogNode(
+            node_no, node_file="{}.xml".format(node_no), record=record
+        )
+    return nodes
+
+
+class TestFlowGraph(unittest.TestCase):
+    def test_edges(self):
+        graph = FlowGraph(create_nodes(FLOW))
+        self.assertEqual(len(FLOW), len(graph))
+        self.assertEqual([10, 11], graph.get_parents(12))
+        self.assertEqual([12], graph.get_children(10))
+        self.assertEqual([12], graph.get_children(11))
+        self.assertEqual([6, 7], graph.get_children(5))
+        self.assertEqual([], graph.get_parents(2))
+        self.assertEqual(set(), graph.orphans)
+
+    def test_topological_order(self):
+        graph = FlowGraph(create_nodes(FLOW))
+        order = graph.topological_order()
+        self.assertEqual(sorted(order), [flow[0] for flow in FLOW])
+        position = {node_no: i for i, node_no in enumerate(order)}
+        for node_no in order:
+            for parent in graph.get_parents(node_no):
+                self.assertLess(position[parent], position[node_no])
+
+    def test_blocks(self):
+        graph = FlowGraph(create_nodes(FLOW))
+        expected = {
+            2: (None, None, None),
+            4: (None, None, 3),
+            5: ("Build", None, 4),
+            8: ("Build", "a", 6),
+            9: ("Build", "b", 7),
+            10: ("Build", None, 5),
+            12: ("Build", None, 4),
+            13: ("Build", None, 4),
+            14: (None, None, 3),
+            15: (None, None, None),
+            16: (None, None, None),
+        }
+        for node_no, (stage, branch, block) in expected.items():
+            self.assertEqual(stage, graph.get_stage(node_no), node_no)
+            self.assertEqual(branch, graph.get_branch(node_no), node_no)
+            self.assertEqual(block, graph.get_block(node_no), node_no)
+        self.assertEqual(1, graph.get_depth(2))
+        self.assertEqual(5, graph.get_depth(8))
+        self.assertEqual(3, graph.get_depth(13))
+
+    def test_is_ancestor(self):
+        graph = FlowGraph(create_nodes(FLOW))
+        self.assertTrue(graph.is_ancestor(4, 13))
+        self.assertTrue(graph.is_ancestor(4, 8))
+        self.assertTrue(graph.is_ancestor(6, 8))
+        self.assertFalse(graph.is_ancestor(6, 9))
+        self.assertFalse(graph.is_ancestor(6, 12))
+        self.assertFalse(graph.is_ancestor(4, 16))
+        self.assertFalse(graph.is_ancestor(99, 16))
+        walker = TreeWalker(graph.nodes, {}, graph)
+        self.assertTrue(walker.is_parent_node_of(4, 13))
+
+    def test_first_parent_difference(self):
+        nodes = create_nodes(FLOW)
+        graph = FlowGraph(nodes)
+        ancestry = AncestorIndex(nodes)
+        # the first parent chain of 16 passes through the stage node 4
+        self.assertEqual("Build", ancestry.get_stage(16))
+        self.assertEqual(None, graph.get_stage(16))
+        self.assertEqual("a", ancestry.get_branch(13))
+        self.assertEqual(None, graph.get_branch(13))
+
+    def test_join_without_start(self):
+        flow = FLOW[:9] + [
+            (10, "cps.n.StepAtomNode", ECHO, (8, 9), None, None, None),
+            (11, "cps.n.StepAtomNode", ECHO, (8, 10), None, None, None),
+        ]
+        graph = FlowGraph(create_nodes(flow))
+        self.assertEqual("Build", graph.get_stage(10))
+        self.assertEqual(None, graph.get_branch(10))
+        self.assertEqual(None, graph.get_branch(11))
+        flow[-1] = (11, "cps.n.StepAtomNode", ECHO, (8, 8), None, None, None)
+        graph = FlowGraph(create_nodes(flow))
+        self.assertEqual("a", graph.get_branch(11))
+
+    def test_orphans_and_cycles(self):
+        flow = [
+            (3, "cps.n.StepAtomNode", ECHO, (2,), None, None, None),
+            (4, "cps.n.StepAtomNode", ECHO, (3, 9), None, None, None),
+        ]
+        graph = FlowGraph(create_nodes(flow))
+        self.assertEqual({2, 9}, graph.orphans)
+        self.assertEqual([3, 4], graph.topological_order())
+        flow.append((5, "cps.n.StepAtomNode", ECHO, (6,), None, None, None))
+        flow.append((6, "cps.n.StepAtomNode", ECHO, (5,), None, None, None))
+        with self.assertRaises(ValueError):
+            FlowGraph(create_nodes(flow))
@@ -0,0 +1,31 @@
+import os
+from jenkins_log_parser.follow import follow_build
+from test_buildlog import TempBuildCase
+
+
+class TestFollow(TempBuildCase):
+    def setUp(self):
+        super().setUp()
+        self.write("log", b"running\n")
+        self.write("log-index", b"0 4\n")
+        self.sleeps = list()
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        if len(self.sleeps) == 1:
+            self.write("log", b"still running\n", "ab")
+            self.write_node(5, 4, "FlowEndNode", "")
+        else:
+            self.write("log", b"done\n", "ab")
+
+    def test_follow(self):
+        polls = follow_build(
+            self.build_dir, self.target, interval=0.5, sleep=self.sleep)
+        self.assertEqual(3, polls)
+        self.assertEqual(2, len(self.sleeps))
+        self.assertTrue(all(0.0 <= s <= 0.5 for s in self.sleeps))
+        with open(os.path.join(self.target, "Build.log"), "rb") as stream:
+            self.assertEqual(
+                b">>> NodeID: 4, Step: StageStep\n"
+                b"running\nstill running\ndone\n",
+                stream.read())
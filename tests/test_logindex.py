@@ -0,0 +1,53 @@
+import unittest
+import io
+from jenkins_log_parser.logindex import LogIndex
+
+
+class TestLogIndex(unittest.TestCase):
+    def test_parse(self):
+        index = LogIndex()
+        index.parse(io.BytesIO(b"0 5\n10 6\n25\n40 5\n\n50 7\n60\n70 8\n"))
+        index.finish(100)
+        self.assertEqual(7, index.lines)
+        self.assertEqual(5, len(index))
+        self.assertListEqual([5, 6, 7, 8], index.get_node_ids())
+        self.assertListEqual(
+            [(0, 10), (40, 50)], index.get_ranges(5).ranges())
+        self.assertListEqual([(10, 25)], index.get_ranges(6).ranges())
+        self.assertListEqual([(50, 60)], index.get_ranges(7).ranges())
+        # the trailing entry lasts until the end of the log
+        self.assertListEqual([(70, 100)], index.get_ranges(8).ranges())
+        self.assertEqual(0, len(index.get_ranges(4)))
+        self.assertEqual(0, len(index.get_ranges(1000)))
+
+    def test_index_view(self):
+        index = LogIndex()
+        index.parse(["0 5", "10", "20 5", "30"])
+        index.finish(30)
+        view = index.get_ranges(5)
+        self.assertEqual(2, len(view))
+        self.assertEqual(20, view[1].get("start"))
+        self.assertEqual(30, view[-1].get("end"))
+        self.assertListEqual(
+            [{"start": 0, "end": 10}, {"start": 20, "end": 30}], list(view))
+        with self.assertRaises(IndexError):
+            _ = view[2]
+
+    def test_advance(self):
+        index = LogIndex()
+        index.parse([b"0 5", b"10 6"])
+        index.advance(15)
+        index.advance(15)
+        self.assertListEqual([(10, 15)], index.get_ranges(6).ranges())
+        index.parse([b"20 5"])
+        index.finish(30)
+        self.assertListEqual(
+            [(10, 15), (15, 20)], index.get_ranges(6).ranges())
+        self.assertListEqual(
+            [(0, 10), (20, 30)], index.get_ranges(5).ranges())
+
+    def test_empty(self):
+        index = LogIndex()
+        index.finish(0)
+        self.assertEqual(0, len(index))
+        self.assertEqual(0, len(index.get_ranges(2)))
@@ -43,6 +43,21 @@ class TestLogNode(unittest.TestCase):
             "org.jenkinsci.plugins.workflow.steps.EchoStep",
             lognode.get_path_text("node/descriptorId"))
 
+    def test_lazy_content_retrieval(self):
+        eager = LogNode(5)
+        lognode = LogNode(5, lazy=True)
+        self.assertIsNone(lognode.root)
+        self.assertEqual(eager.get_node_class(), lognode.get_node_class())
+        self.assertEqual(
+            eager.get_node_descriptorId(),
+            lognode.get_node_descriptorId())
+        self.assertEqual(eager.get_parent_id(), lognode.get_parent_id())
+        self.assertEqual(eager.get_step(), lognode.get_step())
+        self.assertEqual(
+            eager.get_path_text("node/descriptorId"),
+            lognode.get_path_text("node/descriptorId"))
+        self.assertIn("node/descriptorId", lognode.path_cache)
+
     def test_get_log(self):
         lognode = LogNode(5)
         lognode.set_log_file("log")
@@ -51,3 +66,13 @@ class TestLogNode(unittest.TestCase):
         self.assertEqual(
             "<replace-with-expected-strings>",  # noqa
             lognode.get_log())
+
+    def test_get_log_views(self):
+        lognode = LogNode(5)
+        lognode.set_log_file("log", memoryview(b"0123456789"))
+        lognode.add_index(2, 5)
+        lognode.add_index(7, 9)
+        views = lognode.get_log_views()
+        self.assertListEqual([b"234", b"78"], [bytes(v) for v in views])
+        self.assertEqual("23478", lognode.get_log())
+        self.assertEqual("01", lognode.get_log_part(0, 2))
@@ -0,0 +1,105 @@
+import unittest
+import io
+import os
+import tempfile
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+
+
+def read_tree(path):
+    content = dict()
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            full = os.path.join(dirpath, filename)
+            with open(full, "rb") as stream:
+                content.update({os.path.relpath(full, path): stream.read()})
+    return content
+
+
+class TestLogProcessor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.buildlog = BuildLog(
+            os.path.join(
+                os.path.dirname(
+                    os.path.realpath(__file__)
+                ),
+                "input_data"
+            )
+        )
+        cls.buildlog.collect_nodes()
+        cls.tree = cls.buildlog.create_tree()
+        cls.buildlog.collect_nodes_logs()
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def process(self, name, **kwargs):
+        target = os.path.join(self.tempdir.name, name)
+        os.makedirs(target)
+        LogProcessor(target, **kwargs).process(
+            self.buildlog.nodes,
+            self.tree,
+            self.buildlog.ancestry
+        )
+        return read_tree(target)
+
+    def test_single_pass_parity(self):
+        multi_pass = self.process("multi_pass")
+        single_pass = self.process("single_pass", single_pass=True)
+        self.assertGreater(len(multi_pass), 0)
+        self.assertListEqual(
+            sorted(multi_pass.keys()), sorted(single_pass.keys()))
+        for path, content in multi_pass.items():
+            self.assertEqual(content, single_pass.get(path), path)
+
+    def test_parallel_parity(self):
+        multi_pass = self.process("multi_pass")
+        parallel = self.process("parallel", jobs=4)
+        self.assertDictEqual(multi_pass, parallel)
+
+    def test_query_parity(self):
+        target = os.path.join(self.tempdir.name, "query")
+        os.makedirs(target)
+        processor = LogProcessor(target)
+        processor.process(
+            self.buildlog.nodes, self.tree, self.buildlog.ancestry
+        )
+        written = read_tree(target)
+        entries = processor.list_entries()
+        self.assertGreater(len(entries), 0)
+        self.assertListEqual(
+            sorted(written.keys()),
+            sorted(
+                os.path.relpath(entry.get("path"), target)
+                for entry, _ in entries
+            ))
+        for entry, _ in entries:
+            stream = io.BytesIO()
+            processor.query(
+                self.buildlog.nodes,
+                self.tree,
+                stream,
+                stage=entry.get("entry"),
+                branch=entry.get("branch"),
+                ancestry=self.buildlog.ancestry
+            )
+            self.assertEqual(
+                written.get(os.path.relpath(entry.get("path"), target)),
+                stream.getvalue(),
+                entry.get("path"))
+
+    def test_query_unknown(self):
+        processor = LogProcessor(None)
+        for stage, branch in ((None, None), ("no stage", None), (None, "no")):
+            with self.assertRaises(ValueError):
+                processor.query(
+                    self.buildlog.nodes,
+                    self.tree,
+                    io.BytesIO(),
+                    stage=stage,
+                    branch=branch
+                )
@@ -0,0 +1,72 @@
+import unittest
+import io
+from jenkins_log_parser.noderecord import (
+    NodeRecord, parse_record, LABEL_PATH, BRANCH_PATH, TIMING_PATH
+)
+
+STAGE_XML = b"""<?xml version='1.1' encoding='UTF-8'?>
+<Tag plugin="workflow-support@3.5">
+  <node class="cps.n.StepStartNode" plugin="workflow-cps@2.80">
+    <parentIds>
+      <string>3</string>
+      <string>7</string>
+    </parentIds>
+    <id>4</id>
+    <descriptorId>org.jenkinsci.plugins.workflow.support.steps.StageStep\
+</descriptorId>
+  </node>
+  <actions>
+    <wf.a.LabelAction plugin="workflow-api@2.40">
+      <displayName>Build</displayName>
+    </wf.a.LabelAction>
+    <org.jenkinsci.plugins.workflow.cps.steps.ParallelStepExecution_-\
+ParallelLabelAction>
+      <branchName>linux</branchName>
+    </org.jenkinsci.plugins.workflow.cps.steps.ParallelStepExecution_-\
+ParallelLabelAction>
+    <wf.a.TimingAction plugin="workflow-api@2.40">
+      <startTime>1588000000123</startTime>
+    </wf.a.TimingAction>
+  </actions>
+</Tag>
+"""
+
+START_XML = b"""<?xml version='1.1' encoding='UTF-8'?>
+<Tag plugin="workflow-support@3.5">
+  <node class="cps.n.FlowStartNode" plugin="workflow-cps@2.80">
+    <parentIds/>
+    <id>2</id>
+  </node>
+  <actions/>
+</Tag>
+"""
+
+
+class TestNodeRecord(unittest.TestCase):
+    def test_parse_record(self):
+        record = parse_record(io.BytesIO(STAGE_XML))
+        print("__ %s" % record)
+        self.assertEqual("cps.n.StepStartNode", record.node_class)
+        self.assertEqual(
+            "org.jenkinsci.plugins.workflow.support.steps.StageStep",
+            record.descriptor_id)
+        self.assertEqual(3, record.parent_id)
+        self.assertEqual("Build", record.label)
+        self.assertEqual("linux", record.branch_name)
+        self.assertEqual([3, 7], record.get_parent_ids())
+        self.assertEqual(1588000000123, record.start_time)
+
+    def test_parse_record_without_fields(self):
+        record = parse_record(io.BytesIO(START_XML))
+        self.assertEqual(
+            NodeRecord(node_class="cps.n.FlowStartNode"), record)
+
+    def test_get_path_text(self):
+        record = NodeRecord(
+            label="Build", branch_name="linux", start_time=1588000000123
+        )
+        self.assertEqual((True, "Build"), record.get_path_text(LABEL_PATH))
+        self.assertEqual((True, "linux"), record.get_path_text(BRANCH_PATH))
+        self.assertEqual(
+            (True, "1588000000123"), record.get_path_text(TIMING_PATH))
+        self.assertFalse(record.get_path_text("node/descriptorId")[0])
@@ -0,0 +1,99 @@
+import unittest
+import bz2
+import gzip
+import lzma
+import os
+import tempfile
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.outputcodec import (
+    CODECS, available_codecs, codec_suffix, create_compressor
+)
+from jenkins_log_parser.synthetic import generate_build
+
+DECOMPRESS = {
+    "gzip": gzip.decompress,
+    "bz2": bz2.decompress,
+    "xz": lzma.decompress,
+}
+
+
+class TestOutputCodec(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        build = os.path.join(self.tempdir.name, "build")
+        generate_build(build, nodes=300, log_lines=20)
+        self.buildlog = BuildLog(build, lazy=True)
+        self.buildlog.collect_nodes()
+        self.buildlog.create_tree()
+        self.buildlog.collect_nodes_logs()
+
+    def tearDown(self):
+        self.buildlog.close()
+        self.tempdir.cleanup()
+
+    def process(self, name, **kwargs) -> dict:
+        target = os.path.join(self.tempdir.name, name)
+        os.makedirs(target)
+        LogProcessor(target, **kwargs).process(
+            self.buildlog.nodes, self.buildlog.tree, self.buildlog.ancestry
+        )
+        files = dict()
+        for root, _, names in os.walk(target):
+            for file_name in names:
+                with open(os.path.join(root, file_name), "rb") as stream:
+                    files[os.path.relpath(
+                        os.path.join(root, file_name), target
+                    )] = stream.read()
+        return files
+
+    def test_codecs(self):
+        expected = self.process("plain")
+        self.assertGreater(len(expected), 3)
+        for codec in DECOMPRESS:
+            for name, kwargs in [
+                ("multi", dict()),
+                ("single", {"single_pass": True, "max_open_files": 2}),
+                ("jobs", {"jobs": 2, "level": 1}),
+            ]:
+                files = self.process(
+                    "{}-{}".format(codec, name), codec=codec, **kwargs
+                )
+                suffix = codec_suffix(codec)
+                self.assertEqual(
+                    sorted(path + suffix for path in expected),
+                    sorted(files.keys())
+                )
+                for path, content in expected.items():
+                    self.assertEqual(
+                        content,
+                        DECOMPRESS.get(codec)(files.get(path + suffix))
+                    )
+
+    def test_levels(self):
+        self.assertIsNone(create_compressor("none"))
+        for codec in available_codecs():
+            if codec == "none":
+                continue
+            lowest, highest = CODECS.get(codec).get("levels")
+            self.assertIsNotNone(create_compressor(codec, lowest))
+            self.assertIsNotNone(create_compressor(codec, highest))
+            with self.assertRaises(ValueError):
+                create_compressor(codec, highest + 1)
+        with self.assertRaises(ValueError):
+            create_compressor("rar")
+        with self.assertRaises(ValueError):
+            LogProcessor(self.tempdir.name, codec="gzip", level=10)
+
+    def test_append(self):
+        processor = LogProcessor(self.tempdir.name, codec="gzip")
+        with self.assertRaises(ValueError):
+            processor.append(
+                self.buildlog.nodes,
+                self.buildlog.tree,
+                {"nodes": [], "ranges": []}
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import unittest
+import asyncio
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from jenkins_log_parser import profiling
+from jenkins_log_parser.profiling import (
+    Profiler, add_hook, remove_hook, bind, count, merge_records, phase,
+    profiled, replay, run_captured
+)
+
+
+@profiled("double")
+def double(value):
+    count("calls")
+    return 2 * value
+
+
+@profiled("waiting")
+async def waiting(value):
+    count("calls")
+    await asyncio.sleep(0)
+    return value
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+        add_hook(self.profiler)
+
+    def tearDown(self):
+        remove_hook(self.profiler)
+
+    def test_phases(self):
+        with phase("outer"):
+            count("items", 3)
+            with phase("inner"):
+                count("items")
+            count("items")
+        self.assertEqual(
+            ["inner", "outer"],
+            [record.get("phase") for record in self.profiler.records])
+        inner = self.profiler.records[0]
+        outer = self.profiler.records[1]
+        self.assertEqual(1, inner.get("depth"))
+        self.assertEqual(0, outer.get("depth"))
+        self.assertEqual({"items": 1}, inner.get("counts"))
+        self.assertEqual({"items": 4}, outer.get("counts"))
+        self.assertGreaterEqual(outer.get("wall"), inner.get("wall"))
+        self.assertGreaterEqual(outer.get("cpu"), 0.0)
+        if profiling.resource is not None:
+            self.assertGreater(outer.get("peak_rss"), 0)
+
+    def test_decorators(self):
+        self.assertEqual(4, double(2))
+        self.assertEqual(5, asyncio.run(waiting(5)))
+        self.assertEqual(
+            [("double", {"calls": 1}), ("waiting", {"calls": 1})],
+            [
+                (record.get("phase"), record.get("counts"))
+                for record in self.profiler.records
+            ])
+
+    def test_without_hooks(self):
+        remove_hook(self.profiler)
+        with phase("outer"):
+            count("items")
+        self.assertEqual(4, double(2))
+        self.assertEqual([], self.profiler.records)
+
+    def test_reports(self):
+        with phase("first"):
+            with phase("nested"):
+                pass
+        with phase("second"):
+            pass
+        lines = self.profiler.format_text().splitlines()
+        self.assertEqual(4, len(lines))
+        self.assertTrue(lines[1].startswith("first "))
+        self.assertTrue(lines[2].startswith("  nested "))
+        self.assertTrue(lines[3].startswith("second "))
+        self.assertEqual(
+            ["nested", "first", "second"],
+            [
+                record.get("phase")
+                for record in json.loads(self.profiler.format_json())
+            ])
+
+    def test_threads(self):
+        with phase("outer"):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for future in [
+                    executor.submit(bind(double), i) for i in range(4)
+                ]:
+                    future.result()
+            # an unbound thread has no running phase to count into
+            thread = threading.Thread(target=count, args=("stray",))
+            thread.start()
+            thread.join()
+        records = self.profiler.records
+        self.assertEqual(
+            ["double"] * 4 + ["outer"],
+            [record.get("phase") for record in records])
+        self.assertEqual(
+            [1] * 4 + [0], [record.get("depth") for record in records])
+        self.assertEqual({}, records[-1].get("counts"))
+
+    def test_worker_records(self):
+        with phase("outer"):
+            # forked workers start with the phases running at the fork
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results = list(executor.map(
+                    run_captured, [True, True, False], [double] * 3,
+                    [1, 2, 3]
+                ))
+            self.assertEqual([2, 4, 6], [result for result, _ in results])
+            self.assertEqual([], results[2][1])
+            self.assertEqual(
+                [0, 0], [records[0].get("depth") for _, records in results[:2]]
+            )
+            self.assertEqual([], self.profiler.records)
+            replay(merge_records(results[0][1] + results[1][1]))
+        self.assertEqual(2, len(self.profiler.records))
+        merged = self.profiler.records[0]
+        outer = self.profiler.records[1]
+        self.assertEqual("double", merged.get("phase"))
+        self.assertEqual(1, merged.get("depth"))
+        self.assertEqual(
+            {"calls": 2, "merged": 2}, merged.get("counts"))
+        self.assertEqual(0, outer.get("depth"))
@@ -0,0 +1,172 @@
+import unittest
+import os
+import tempfile
+import zipfile
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.rangecopy import (
+    COPY_METHODS, RangeWriter, WriterPool
+)
+from jenkins_log_parser.storage import open_storage
+from jenkins_log_parser.synthetic import generate_build
+
+
+class TestRangeCopy(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.build = os.path.join(self.tempdir.name, "build")
+        generate_build(self.build, nodes=300, log_lines=20)
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def load(self, location) -> BuildLog:
+        build_log = BuildLog(location, lazy=True)
+        build_log.collect_nodes()
+        build_log.create_tree()
+        build_log.collect_nodes_logs()
+        return build_log
+
+    def read_target(self, target) -> dict:
+        files = dict()
+        for root, _, names in os.walk(target):
+            for name in names:
+                with open(os.path.join(root, name), "rb") as stream:
+                    files[os.path.relpath(
+                        os.path.join(root, name), target
+                    )] = stream.read()
+        return files
+
+    def archive(self, name, compression) -> str:
+        path = os.path.join(self.tempdir.name, name)
+        with zipfile.ZipFile(path, "w", compression) as archive:
+            for root, _, names in os.walk(self.build):
+                for file_name in names:
+                    archive.write(
+                        os.path.join(root, file_name),
+                        os.path.relpath(
+                            os.path.join(root, file_name), self.build
+                        )
+                    )
+        return path
+
+    def test_methods(self):
+        output = os.path.join(self.tempdir.name, "out.log")
+        for location in [
+            self.build,
+            self.archive("stored.zip", zipfile.ZIP_STORED),
+            self.archive("deflated.zip", zipfile.ZIP_DEFLATED)
+        ]:
+            build_log = self.load(location)
+            nodes = [
+                build_log.nodes.get(node_no)
+                for node_no in sorted(build_log.nodes.keys())
+            ]
+            expected = b"".join(
+                bytes(view) for node in nodes for view in node.get_log_views()
+            )
+            self.assertGreater(len(expected), 0)
+            for method in COPY_METHODS:
+                with RangeWriter(
+                    output,
+                    build_log.storage.open_log_source(),
+                    method,
+                    min_copy=0
+                ) as writer:
+                    for node in nodes:
+                        writer.write_log(node)
+                    self.assertEqual(len(expected), writer.tell())
+                with open(output, "rb") as stream:
+                    self.assertEqual(expected, stream.read(), method)
+            build_log.close()
+
+    def test_log_source(self):
+        with open(os.path.join(self.build, "log"), "rb") as stream:
+            expected = stream.read()
+        for location in [
+            self.build,
+            self.archive("stored.zip", zipfile.ZIP_STORED),
+            self.archive("deflated.zip", zipfile.ZIP_DEFLATED)
+        ]:
+            storage = open_storage(location)
+            fd_in, offset = storage.open_log_source()
+            self.assertEqual(
+                (fd_in, offset), storage.open_log_source()
+            )
+            self.assertEqual(
+                expected, os.pread(fd_in, len(expected) + 1, offset)[
+                    :len(expected)
+                ]
+            )
+            storage.close()
+            self.assertIsNone(storage.log_source)
+
+    def test_process(self):
+        build_log = self.load(self.build)
+        outputs = list()
+        for method in COPY_METHODS:
+            target = os.path.join(self.tempdir.name, method)
+            os.makedirs(target)
+            processor = LogProcessor(target, copy_method=method)
+            processor.process(
+                build_log.nodes, build_log.tree, build_log.ancestry
+            )
+            self.assertEqual(method == "mmap", processor.source is None)
+            outputs.append(self.read_target(target))
+        build_log.close()
+        for files in outputs[1:]:
+            self.assertEqual(outputs[0], files)
+
+    def test_pool(self):
+        pool = WriterPool(2)
+        paths = [
+            os.path.join(self.tempdir.name, "{}.log".format(i))
+            for i in range(5)
+        ]
+        writers = [
+            RangeWriter(path, pool=pool, buffer_size=8) for path in paths
+        ]
+        expected = [bytearray() for _ in paths]
+        for i in range(200):
+            data = "line {}\n".format(i).encode() * (i % 3)
+            writers[i * 7 % 5].write(data)
+            expected[i * 7 % 5] += data
+            self.assertLessEqual(
+                sum(writer.stream is not None for writer in writers), 2
+            )
+        empty = RangeWriter(
+            os.path.join(self.tempdir.name, "empty.log"), pool=pool
+        )
+        for writer, content in zip(writers + [empty], expected + [b""]):
+            self.assertEqual(len(content), writer.tell())
+            writer.close()
+            with open(writer.path, "rb") as stream:
+                self.assertEqual(bytes(content), stream.read())
+        self.assertEqual(0, len(pool.writers))
+
+    def test_single_pass_pool(self):
+        build_log = self.load(self.build)
+        outputs = list()
+        for single_pass, max_open_files in [(False, 1), (True, 1), (True, 3)]:
+            target = os.path.join(self.tempdir.name, "{}-{}".format(
+                single_pass, max_open_files
+            ))
+            os.makedirs(target)
+            LogProcessor(
+                target,
+                single_pass=single_pass,
+                max_open_files=max_open_files
+            ).process(build_log.nodes, build_log.tree, build_log.ancestry)
+            outputs.append(self.read_target(target))
+        build_log.close()
+        self.assertGreater(len(outputs[0]), 3)
+        for files in outputs[1:]:
+            self.assertEqual(outputs[0], files)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            RangeWriter(os.path.join(self.tempdir.name, "out.log"), None, "x")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import tempfile
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.readplan import ReadPlan, coalesce, merge_adjacent
+from jenkins_log_parser.synthetic import generate_build
+
+
+class RecordingStorage:
+    def __init__(self):
+        self.spans = list()
+
+    def advise_log(self, spans):
+        self.spans.extend(spans)
+
+
+class RangeNode:
+    def __init__(self, ranges):
+        self.ranges = ranges
+
+    def get_ranges(self) -> list:
+        return self.ranges
+
+
+class TestReadPlan(unittest.TestCase):
+    def test_coalesce(self):
+        self.assertEqual([], coalesce([]))
+        self.assertEqual(
+            [(0, 30), (40, 50)],
+            coalesce([(40, 50), (20, 30), (0, 10), (10, 20), (5, 8)])
+        )
+        self.assertEqual(
+            [(0, 50)], coalesce([(40, 50), (0, 10), (20, 30)], gap=10)
+        )
+        self.assertEqual([(0, 10)], coalesce([(0, 10), (12, 12)]))
+
+    def test_merge_adjacent(self):
+        self.assertEqual(
+            [(10, 30), (0, 10), (40, 50)],
+            merge_adjacent([(10, 20), (20, 30), (0, 10), (40, 50)])
+        )
+
+    def test_advise(self):
+        plan = ReadPlan(
+            [RangeNode([(100, 200), (0, 50)]), RangeNode([(60, 90)])],
+            gap=5
+        )
+        self.assertEqual([(0, 50), (60, 90), (100, 200)], plan.spans)
+        self.assertEqual(180, plan.size())
+        storage = RecordingStorage()
+        self.assertEqual(70, plan.advise(storage, limit=70))
+        self.assertEqual([(0, 50), (60, 80)], storage.spans)
+        self.assertEqual(0, plan.advise(None))
+
+    def test_storage(self):
+        with tempfile.TemporaryDirectory() as path:
+            generate_build(path, nodes=200)
+            build_log = BuildLog(path, lazy=True)
+            build_log.collect_nodes()
+            build_log.collect_nodes_logs()
+            nodes = build_log.nodes.values()
+            plan = ReadPlan(nodes, gap=0)
+            self.assertEqual(
+                coalesce(span for node in nodes for span in node.get_ranges()),
+                plan.spans
+            )
+            self.assertEqual(plan.size(), plan.advise(build_log.storage))
+            build_log.storage.open_log_source()
+            plan.advise(build_log.storage)
+            build_log.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
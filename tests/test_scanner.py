@@ -0,0 +1,126 @@
+import unittest
+import io
+import xml.etree.ElementTree as ET
+from jenkins_log_parser.noderecord import (
+    NodeRecord, parse_record, record_from_root
+)
+from jenkins_log_parser.scanner import scan_record, extract_record
+
+STAGE_XML = b"""<?xml version='1.1' encoding='UTF-8'?>
+<Tag plugin="workflow-support@3.5">
+  <node class="cps.n.StepStartNode" plugin="workflow-cps@2.80">
+    <parentIds>
+      <string>3</string>
+      <string>7</string>
+    </parentIds>
+    <id>4</id>
+    <descriptorId>org.jenkinsci.plugins.workflow.support.steps.StageStep\
+</descriptorId>
+  </node>
+  <actions>
+    <wf.a.LabelAction plugin="workflow-api@2.40">
+      <displayName>Build</displayName>
+    </wf.a.LabelAction>
+    <org.jenkinsci.plugins.workflow.cps.steps.ParallelStepExecution_-\
+ParallelLabelAction>
+      <branchName>linux</branchName>
+    </org.jenkinsci.plugins.workflow.cps.steps.ParallelStepExecution_-\
+ParallelLabelAction>
+    <wf.a.TimingAction plugin="workflow-api@2.40">
+      <startTime>1588000000123</startTime>
+    </wf.a.TimingAction>
+  </actions>
+</Tag>
+"""
+
+VARIANTS = [
+    STAGE_XML,
+    b"""<?xml version='1.1' encoding='UTF-8'?>
+<Tag plugin="workflow-support@3.5">
+  <node class="cps.n.FlowStartNode" plugin="workflow-cps@2.80">
+    <parentIds/>
+    <id>2</id>
+  </node>
+  <actions/>
+</Tag>
+""",
+    b"""<Tag><node class='cps.n.StepEndNode'><parentIds><string>12</string>\
+</parentIds><descriptorId></descriptorId><nodes/></node><actions>\
+<wf.a.LabelAction><displayName/></wf.a.LabelAction></actions></Tag>""",
+    b"""<Tag><node/><actions><wf.a.TimingAction/></actions></Tag>""",
+    b"""<?xml version='1.1' encoding='UTF-8'?>
+<Tag plugin="workflow-support@3.5">
+  <node class="cps.n.StepEndNode" plugin="workflow-cps@2.80">
+    <parentIds>
+      <string>21</string>
+      <string>25</string>
+      <string>29</string>
+    </parentIds>
+    <id>30</id>
+    <startId>17</startId>
+    <descriptorId>org.jenkinsci.plugins.workflow.cps.steps.ParallelStep\
+</descriptorId>
+  </node>
+  <actions/>
+</Tag>
+""",
+    b"""<Tag><node class="cps.n.StepEndNode"><parentIds><string>12</string>\
+<string>14</string></parentIds><id>15</id><startId>3</startId></node>\
+<actions/></Tag>""",
+]
+
+
+class TestScanner(unittest.TestCase):
+    def test_parity(self):
+        for data in VARIANTS:
+            self.assertEqual(
+                record_from_root(ET.fromstring(data)), scan_record(data))
+
+    def test_scan_record(self):
+        self.assertEqual(
+            NodeRecord(
+                node_class="cps.n.StepStartNode",
+                descriptor_id="org.jenkinsci.plugins.workflow.support.steps"
+                              ".StageStep",
+                parent_id=3,
+                label="Build",
+                branch_name="linux",
+                extra_parent_ids=(7,),
+                start_time=1588000000123
+            ),
+            scan_record(STAGE_XML))
+
+    def test_end_node(self):
+        record = scan_record(VARIANTS[4])
+        self.assertEqual([21, 25, 29], record.get_parent_ids())
+        self.assertEqual(17, record.start_id)
+        record = scan_record(VARIANTS[5])
+        self.assertEqual([12, 14], record.get_parent_ids())
+        self.assertEqual(3, record.start_id)
+        self.assertEqual(record, parse_record(io.BytesIO(VARIANTS[5])))
+
+    def test_fallback(self):
+        for data in (
+            STAGE_XML.replace(b">Build<", b">Build &amp; Test<"),
+            STAGE_XML.replace(b">Build<", b"><![CDATA[Build & Test]]><"),
+            STAGE_XML.replace(b"UTF-8", b"ISO-8859-1").replace(
+                b">Build<", b">Build \xe4nd Test<"),
+        ):
+            with self.assertRaises(ValueError):
+                scan_record(data)
+            self.assertEqual(
+                record_from_root(ET.fromstring(data)),
+                extract_record(io.BytesIO(data)))
+
+    def test_truncated(self):
+        cut = STAGE_XML.find(b"</node>") + len(b"</node>") + 5
+        with self.assertRaises(ValueError):
+            scan_record(STAGE_XML[:cut])
+        with self.assertRaises(ET.ParseError):
+            extract_record(io.BytesIO(STAGE_XML[:cut]))
+        # ElementTree stops after the actions, which are complete here
+        data = STAGE_XML[:-len(b"</Tag>\n")]
+        with self.assertRaises(ValueError):
+            scan_record(data)
+        self.assertEqual(
+            scan_record(STAGE_XML), extract_record(io.BytesIO(data)))
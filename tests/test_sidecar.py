@@ -0,0 +1,138 @@
+import unittest
+import io
+import os
+import sqlite3
+import tempfile
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.sidecar import SidecarIndex, write_sidecar
+from jenkins_log_parser.synthetic import generate_build
+
+
+class TestSidecar(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.buildlog = BuildLog(
+            os.path.join(
+                os.path.dirname(
+                    os.path.realpath(__file__)
+                ),
+                "input_data"
+            ),
+            lazy=True
+        )
+        self.buildlog.collect_nodes()
+        self.buildlog.create_tree()
+        self.buildlog.collect_nodes_logs()
+        self.processor = LogProcessor(self.tempdir.name)
+        self.processor.process(
+            self.buildlog.nodes, self.buildlog.tree, self.buildlog.ancestry
+        )
+        self.path = os.path.join(self.tempdir.name, "index.sqlite")
+        write_sidecar(self.path, self.buildlog, self.processor)
+        self.sidecar = SidecarIndex(self.path)
+
+    def tearDown(self):
+        self.sidecar.close()
+        self.buildlog.close()
+        self.tempdir.cleanup()
+
+    def test_entries(self):
+        entries = self.sidecar.list_entries()
+        self.assertGreater(len(entries), 0)
+        for entry in entries:
+            stage, branch = self.sidecar.connection.execute(
+                "SELECT stage, branch FROM entries WHERE path = ?",
+                (entry.get("path"),)
+            ).fetchone()
+            stream = io.BytesIO()
+            written = self.sidecar.write_entry(stream, stage, branch)
+            self.assertEqual(entry.get("nodes"), written)
+            with open(
+                os.path.join(self.tempdir.name, entry.get("path")), "rb"
+            ) as expected:
+                self.assertEqual(expected.read(), stream.getvalue())
+
+    def test_nodes(self):
+        nodes = self.sidecar.find_nodes()
+        self.assertEqual(len(self.buildlog.nodes), len(nodes))
+        for node in nodes:
+            lognode = self.buildlog.nodes.get(node.get("node_id"))
+            self.assertEqual(lognode.get_step(), node.get("step"))
+            self.assertEqual(lognode.get_start_time(), node.get("start_time"))
+            stream = io.BytesIO()
+            self.assertTrue(
+                self.sidecar.write_node(node.get("node_id"), stream))
+            header = stream.getvalue().split(b"\n", 1)[0]
+            self.assertEqual(
+                len(stream.getvalue()) - len(header) - 1, node.get("size"))
+        for node in self.sidecar.find_nodes(step="ShellStep"):
+            self.assertEqual("ShellStep", node.get("step"))
+        self.assertFalse(self.sidecar.write_node(-1, io.BytesIO()))
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            self.sidecar.write_entry(io.BytesIO(), "no stage")
+        with self.assertRaises(ValueError):
+            SidecarIndex(os.path.join(self.tempdir.name, "missing.sqlite"))
+
+
+class TestSidecarChecks(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.build = os.path.join(self.tempdir.name, "build")
+        self.target = os.path.join(self.tempdir.name, "target")
+        generate_build(self.build, nodes=50)
+        os.makedirs(self.target)
+        build_log = BuildLog(self.build, lazy=True)
+        build_log.collect_nodes()
+        build_log.create_tree()
+        build_log.collect_nodes_logs()
+        processor = LogProcessor(self.target)
+        processor.process(build_log.nodes, build_log.tree, build_log.ancestry)
+        self.path = os.path.join(self.target, "index.sqlite")
+        write_sidecar(self.path, build_log, processor)
+        build_log.close()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_stale_log(self):
+        with open(os.path.join(self.build, "log"), "ab") as stream:
+            stream.write(b"more output\n")
+        sidecar = SidecarIndex(self.path)
+        node_id = max(
+            sidecar.find_nodes(), key=lambda node: node.get("size")
+        ).get("node_id")
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                sidecar.write_node(node_id, io.BytesIO())
+        self.assertIsNone(sidecar.log_stream)
+        sidecar.close()
+
+    def test_version(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("UPDATE meta SET value = '0' WHERE key = 'version'")
+        connection.commit()
+        connection.close()
+        with self.assertRaises(ValueError):
+            SidecarIndex(self.path)
+
+    def test_duplicate_stage(self):
+        connection = sqlite3.connect(self.path)
+        stage = connection.execute(
+            "SELECT stage FROM entries WHERE branch IS NULL "
+            "AND stage IS NOT NULL"
+        ).fetchone()[0]
+        connection.execute(
+            "INSERT INTO entries SELECT "
+            "(SELECT MAX(entry_id) + 1 FROM entries), 'copy.log', "
+            "stage, branch, node_id, unbranched FROM entries "
+            "WHERE stage = ? AND branch IS NULL", (stage,)
+        )
+        connection.commit()
+        connection.close()
+        sidecar = SidecarIndex(self.path)
+        with self.assertRaisesRegex(ValueError, "Several stages"):
+            sidecar.write_entry(io.BytesIO(), stage)
+        sidecar.close()
@@ -0,0 +1,84 @@
+import unittest
+import os
+import tempfile
+import zipfile
+from jenkins_log_parser.storage import (
+    open_storage, DirectoryStorage, Storage, ZipStorage
+)
+
+LOG = b"first line\nsecond line\n"
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.build_dir = os.path.join(self.tempdir.name, "build")
+        os.makedirs(os.path.join(self.build_dir, "workflow"))
+        for node in (2, 3):
+            with open(
+                os.path.join(self.build_dir, "workflow", "%d.xml" % node),
+                "wb"
+            ) as stream:
+                stream.write(b"<Tag/>")
+        with open(os.path.join(self.build_dir, "log"), "wb") as stream:
+            stream.write(LOG)
+        with open(
+            os.path.join(self.build_dir, "log-index"), "wb"
+        ) as stream:
+            stream.write(b"0 3\n11\n")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def create_zip(self, name, compression):
+        archive_path = os.path.join(self.tempdir.name, name)
+        with zipfile.ZipFile(archive_path, "w", compression) as archive:
+            for dirpath, _, filenames in os.walk(self.build_dir):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    archive.write(
+                        path, os.path.relpath(path, self.tempdir.name)
+                    )
+        return archive_path
+
+    def check_storage(self, storage):
+        node_files = storage.scan_node_files()
+        self.assertListEqual(["2", "3"], sorted(node_files.keys()))
+        with storage.open(node_files.get("3")) as stream:
+            self.assertEqual(b"<Tag/>", stream.read())
+        with storage.open(storage.log_index) as stream:
+            self.assertEqual(b"0 3\n11\n", stream.read())
+        self.assertEqual(LOG, bytes(storage.map_log()))
+        storage.close()
+
+    def test_directory(self):
+        storage = open_storage(self.build_dir)
+        self.assertIsInstance(storage, DirectoryStorage)
+        self.check_storage(storage)
+
+    def test_zip_stored(self):
+        storage = open_storage(
+            self.create_zip("stored.zip", zipfile.ZIP_STORED)
+        )
+        self.assertIsInstance(storage, ZipStorage)
+        self.assertEqual("build/log", storage.log_file)
+        self.check_storage(storage)
+
+    def test_zip_deflated(self):
+        storage = open_storage(
+            self.create_zip("deflated.zip", zipfile.ZIP_DEFLATED)
+        )
+        self.check_storage(storage)
+
+    def test_unsupported(self):
+        with self.assertRaises(ValueError):
+            open_storage(os.path.join(self.build_dir, "log"))
+
+    def test_incomplete_backend(self):
+        # pylint: disable=abstract-method,abstract-class-instantiated
+        class PartialStorage(Storage):
+            def open(self, name):
+                return open(name, "rb")
+
+        with self.assertRaises(TypeError):
+            PartialStorage(self.build_dir)
@@ -0,0 +1,73 @@
+import unittest
+import os
+import tempfile
+from jenkins_log_parser.buildlog import BuildLog
+from jenkins_log_parser.logprocessor import LogProcessor
+from jenkins_log_parser.scanner import cross_check
+from jenkins_log_parser.storage import open_storage
+from jenkins_log_parser.synthetic import generate_build
+
+
+class TestSynthetic(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def process(self, path) -> dict:
+        target = os.path.join(self.tempdir.name, os.path.basename(path) + "-")
+        os.makedirs(target)
+        build_log = BuildLog(path)
+        build_log.collect_nodes()
+        build_log.create_tree()
+        build_log.collect_nodes_logs()
+        LogProcessor(target).process(
+            build_log.nodes, build_log.tree, build_log.ancestry
+        )
+        build_log.close()
+        files = dict()
+        for root, _, names in os.walk(target):
+            for name in names:
+                with open(os.path.join(root, name), "rb") as stream:
+                    files[os.path.relpath(
+                        os.path.join(root, name), target
+                    )] = stream.read()
+        return files
+
+    def test_node_count(self):
+        for nodes in [2, 3, 5, 50, 300]:
+            path = os.path.join(self.tempdir.name, "build{}".format(nodes))
+            stats = generate_build(path, nodes=nodes, seed=nodes)
+            self.assertEqual(nodes, stats.get("nodes"))
+            self.assertEqual(nodes, len(os.listdir(
+                os.path.join(path, "workflow")
+            )))
+            build_log = BuildLog(path)
+            self.assertEqual(nodes, len(build_log.collect_nodes()))
+            build_log.close()
+
+    def test_directory_and_zip(self):
+        directory = os.path.join(self.tempdir.name, "build")
+        archive = os.path.join(self.tempdir.name, "build.zip")
+        stats = generate_build(directory, nodes=400, fanout=4)
+        self.assertEqual(stats, generate_build(archive, nodes=400, fanout=4))
+        self.assertGreater(stats.get("stages"), 0)
+        self.assertGreater(stats.get("branches"), 0)
+        files = self.process(directory)
+        self.assertGreater(len(files), stats.get("stages"))
+        self.assertEqual(files, self.process(archive))
+
+    def test_scanner(self):
+        path = os.path.join(self.tempdir.name, "build")
+        generate_build(path, nodes=300, depth=3)
+        storage = open_storage(path)
+        result = cross_check(storage)
+        storage.close()
+        self.assertEqual(300, result.get("checked"))
+        self.assertEqual([], result.get("fallbacks"))
+        self.assertEqual([], result.get("mismatches"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,81 @@
 import unittest
 import os
 import json
+import random
 from jenkins_log_parser.buildlog import BuildLog
-from jenkins_log_parser.treewalker import TreeWalker
+from jenkins_log_parser.treewalker import TreeWalker, walk_order
+
+
+def legacy_walk_order(tree):
+    """
+    The walk of the former TreeWalker.next implementation used as reference
+    """
+    tree = tree.copy()
+    current = tree.get(None)[0]
+    del tree[None]
+    order = [current]
+    done = []
+    while True:
+        done.append(current)
+        following = None
+        for i in tree.get(current):
+            if i not in done:
+                following = i
+                break
+        if following is None:
+            for i in sorted(tree.keys()):
+                if i not in done:
+                    following = i
+                    break
+        if following is None:
+            return order
+        current = following
+        order.append(current)
+
+
+def random_tree(size, seed):
+    """
+    Creates a tree like BuildLog.create_tree with randomly chosen parents,
+    where the parent is not necessarily smaller than the child
+    """
+    rnd = random.Random(seed)
+    parents = {2: None}
+    for nodeid in range(3, size + 2):
+        if rnd.random() < 0.7:
+            parents[nodeid] = nodeid - 1
+        else:
+            parents[nodeid] = rnd.randint(2, size + 1)
+            while parents[nodeid] == nodeid:
+                parents[nodeid] = rnd.randint(2, size + 1)
+    tree = {}
+    for nodeid in sorted(parents.keys()):
+        parent_id = parents[nodeid]
+        if parent_id not in tree:
+            tree.update({parent_id: [nodeid]})
+        else:
+            tree.get(parent_id).append(nodeid)
+        tree.update({nodeid: []})
+    return tree
+
+
+class TestWalkOrder(unittest.TestCase):
+    def test_order_parity(self):
+        for seed in range(20):
+            tree = random_tree(300, seed)
+            self.assertListEqual(legacy_walk_order(tree), walk_order(tree))
+
+    def test_walker_reset(self):
+        tree = random_tree(50, 1)
+        nodes = {
+            nodeid: nodeid for nodeid in tree.keys() if nodeid is not None
+        }
+        walker = TreeWalker(nodes, tree)
+        first = [walker.next() for _ in range(len(nodes))]
+        self.assertIsNone(walker.next())
+        walker.reset()
+        second = [walker.next() for _ in range(len(nodes))]
+        self.assertListEqual(first, second)
+        self.assertListEqual(walk_order(tree), first)
 
 
 class TestTreeWalker(unittest.TestCase):